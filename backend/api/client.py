@@ -0,0 +1,68 @@
+"""
+Binary Prediction Client - Score NumPy matrices through /model/predict-binary
+For pipeline services that already hold patients x features as arrays:
+no CSV or JSON on either side. Needs numpy and httpx (and pyarrow for
+format="arrow").
+
+    from api.client import predict_binary
+
+    probabilities, predictions = predict_binary("http://localhost:8000", X, feature_names)
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+from api.services.binary_matrix import (
+    ARROW_CONTENT_TYPE,
+    MATRIX_CONTENT_TYPE,
+    decode_results,
+    encode_arrow,
+    encode_matrix,
+)
+
+
+PREDICT_BINARY_PATH = "/api/v1/model/predict-binary"
+
+
+def encode_request(X: np.ndarray, columns: Sequence[str], format: str = "matrix") -> Tuple[bytes, Dict[str, str]]:
+    """Request body and headers for a (rows, columns) matrix; ``format`` is "matrix" or "arrow" """
+    if format == "arrow":
+        X = np.asarray(X)
+        body = encode_arrow({name: X[:, j] for j, name in enumerate(columns)})
+        return body, {"Content-Type": ARROW_CONTENT_TYPE}
+    if format == "matrix":
+        return encode_matrix(X, columns), {"Content-Type": MATRIX_CONTENT_TYPE}
+    raise ValueError(f"Unknown format '{format}' (use 'matrix' or 'arrow')")
+
+
+def decode_response(response: httpx.Response) -> Tuple[np.ndarray, np.ndarray]:
+    """(P(PD) per row, 0/1 prediction per row); raises for error responses"""
+    response.raise_for_status()
+    return decode_results(response.content, response.headers.get("content-type", MATRIX_CONTENT_TYPE))
+
+
+def predict_binary(
+    base_url: str,
+    X: np.ndarray,
+    columns: Sequence[str],
+    format: str = "matrix",
+    token: Optional[str] = None,
+    client: Optional[httpx.Client] = None,
+    timeout: float = 120.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score ``X`` (one row per patient, one column per name in ``columns``)
+
+    Pass a ``client`` to reuse connections across calls; ``base_url`` is
+    ignored for a client that has its own.
+    """
+    body, headers = encode_request(X, columns, format)
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if client is not None:
+        # A client without a base_url still has an (empty, but truthy) URL object
+        url = PREDICT_BINARY_PATH if client.base_url.host else base_url.rstrip("/") + PREDICT_BINARY_PATH
+        return decode_response(client.post(url, content=body, headers=headers, timeout=timeout))
+    with httpx.Client(base_url=base_url, timeout=timeout) as own_client:
+        return decode_response(own_client.post(PREDICT_BINARY_PATH, content=body, headers=headers))
@@ -40,6 +40,126 @@ class Settings(BaseSettings):
         else os.path.join(_repo_root, "scaler_20251211_093754.pkl")
     )
     
+    # Memory-mapped model bundle (python -m api.services.model_bundle builds it
+    # from the pickles above); loaded instead of the pickles when present
+    MODEL_BUNDLE_PATH: str = os.path.join(_backend_dir, "model.bundle")
+    
+    # Inference engine: "lightgbm" (LGBMClassifier.predict_proba) or
+    # "numpy" (flattened trees, see services/tree_engine.py). "numpy" gives
+    # the same P(PD) but is SLOWER, not a latency option: 3-12x behind
+    # LightGBM with one thread on the checked-in model (576 trees, depth 16),
+    # from 1 to 20k rows (python -m benchmarks.pipeline --engine numpy)
+    INFERENCE_ENGINE: str = "lightgbm"
+    # Max allowed |P(numpy) - P(lightgbm)| in the load-time engine check
+    INFERENCE_ENGINE_TOLERANCE: float = 1e-9
+    
+    # Micro-batching for /model/infer: concurrent requests arriving within the
+    # window (or until the row limit) are scored together
+    INFER_BATCH_ENABLED: bool = True
+    INFER_BATCH_WINDOW_MS: float = 2.0
+    INFER_BATCH_MAX_ROWS: int = 256
+    # Largest patient list accepted by /model/infer-batch
+    INFER_MAX_PATIENTS_PER_REQUEST: int = 10000
+    
+    # Executors: parsing and inference run off the event loop
+    INFERENCE_THREADS: int = 4
+    PARSE_PROCESSES: int = 2  # 0 parses in the inference thread pool instead
+    REQUEST_TIMEOUT_SECONDS: float = 120.0  # 0 disables the timeout
+    DISCONNECT_POLL_SECONDS: float = 0.25
+    # Password hashing (signup / login) has its own pool; at most
+    # PASSWORD_HASH_MAX_PENDING hashes queued or running, later ones wait
+    PASSWORD_HASH_THREADS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    
+    # LightGBM threads per prediction call (services/thread_policy.py): 0 picks
+    # them by batch size, serial below a threshold calibrated when the worker
+    # warms up and up to PREDICT_THREADS_MAX (0 = CPUs / SERVER_WORKERS) above
+    # it; N > 0 always uses N threads
+    PREDICT_THREADS: int = 0
+    PREDICT_THREADS_MAX: int = 0
+    PREDICT_THREADS_CALIBRATE: bool = True  # False: fixed heuristic threshold
+    
+    # CSV uploads parsed in memory: only the model's features, as CSV_PARSE_DTYPE;
+    # engine "auto" uses pyarrow when installed, otherwise pandas' C parser.
+    # float64 feeds the model exactly what a plain pandas read would; float32
+    # (opt-in, here and for CSV_STREAM_DTYPE) halves the parsed matrix but
+    # rounds the inputs: on a 100k-row synthetic cohort 6 patients' P(PD)
+    # moved, by up to 0.0103 (python -m benchmarks.parsing reports the drift)
+    CSV_PARSE_DTYPE: str = "float64"
+    CSV_PARSE_ENGINE: str = "auto"
+    
+    # Streaming CSV ingest (/model/predict-csv?ingest=stream) and batch jobs
+    CSV_STREAM_BLOCK_ROWS: int = 8192
+    CSV_STREAM_DTYPE: str = "float64"
+    
+    # Largest request body accepted by /model/predict-binary
+    BINARY_MAX_MB: float = 512
+    
+    # Prediction caches (0 disables): per-row P(PD) keyed by the feature vector,
+    # and whole responses keyed by the upload's digest. Only batches of up to
+    # ROW_CACHE_MAX_ROWS rows (e.g. /infer, small /infer-batch calls) use the
+    # row cache; hashing every row of a large upload costs about as much as
+    # scoring it
+    ROW_CACHE_MAX_MB: float = 64
+    ROW_CACHE_MAX_ROWS: int = 1024
+    RESPONSE_CACHE_MAX_MB: float = 256
+    
+    # Per-patient contributions: "importance" (scaled value * split importance)
+    # or "shap" (exact TreeSHAP from the booster, in the same pass as P(PD)).
+    # CONTRIBUTION_TOP_K_ONLY keeps only each patient's top contributors
+    # instead of the full patient x feature matrix.
+    CONTRIBUTION_METHOD: str = "importance"
+    CONTRIBUTION_TOP_K_ONLY: bool = True
+    
+    # Parallel scoring (services/parallel_scoring.py): batches of
+    # PARALLEL_SCORING_MIN_ROWS rows or more (0 disables) given to
+    # ModelService.predict or score_matrix (the JSON fast path, binary bodies)
+    # are shared with PARALLEL_SCORING_PROCESSES spawned processes
+    # (0 = CPUs / SERVER_WORKERS) and scored PARALLEL_SCORING_CHUNK_ROWS rows at a time
+    PARALLEL_SCORING_MIN_ROWS: int = 200000
+    PARALLEL_SCORING_PROCESSES: int = 0
+    PARALLEL_SCORING_CHUNK_ROWS: int = 50000
+    
+    # Encode /model/predict-csv bodies straight from P(PD) with orjson
+    # (services/serialization.py) instead of Pydantic revalidation + json
+    JSON_FAST_PATH: bool = True
+    
+    # Cache-Control max-age for /features/importance, /features/biomarkers and
+    # /model/metadata (clients revalidate with If-None-Match afterwards; the
+    # ETag changes with the model)
+    FEATURE_CACHE_MAX_AGE_SECONDS: int = 3600
+    
+    # Instrumentation: per-stage timing spans -> /metrics (Prometheus) and a
+    # Server-Timing header on every response
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True
+    
+    # User store (api/routes/auth.py): users.json snapshot + append-only
+    # journal, folded into the snapshot every N sign-ups
+    USERS_FILE: str = os.path.join(_backend_dir, "users.json")
+    USER_JOURNAL_COMPACT_EVERY: int = 1000
+    # Verified JWT -> user cache (0 disables); entries also expire with the token
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: float = 300.0
+    
+    # Batch jobs (/model/jobs): uploads and results are kept under JOBS_DIR and
+    # scored JOB_CHUNK_ROWS at a time by a local process pool. At most
+    # JOB_MAX_CONCURRENT jobs run at once (across all workers sharing JOBS_DIR);
+    # a worker accepts up to JOB_MAX_PENDING unfinished jobs before answering 503.
+    # Finished and failed jobs are deleted JOB_RETENTION_HOURS after they end
+    # (0 keeps them)
+    JOBS_DIR: str = os.path.join(_backend_dir, "jobs")
+    JOB_CHUNK_ROWS: int = 10000
+    JOB_MAX_CONCURRENT: int = 1
+    JOB_MAX_PENDING: int = 16
+    JOB_RESULTS_PAGE_MAX: int = 10000
+    JOB_RETENTION_HOURS: float = 72
+    
+    # Pre-fork launcher (python -m api.server): one model load shared by all workers
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = int(os.getenv("PORT", "8000"))
+    SERVER_WORKERS: int = int(os.getenv("WEB_CONCURRENCY", "2"))
+    
     # CORS Settings - Allow all origins in development
     CORS_ORIGINS: list = ["*"] if os.getenv("ENVIRONMENT", "development") == "development" else [
         "http://localhost:8081",
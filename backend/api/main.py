@@ -10,8 +10,10 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from api.config import settings
-from api.routes import prediction, auth, feature_importance
+from api.routes import prediction, auth, feature_importance, jobs
+from api.services.metrics import PROMETHEUS_CONTENT_TYPE, ServerTimingMiddleware, registry
 
 # Create FastAPI app
 app = FastAPI(
@@ -54,6 +56,9 @@ else:
         allow_headers=["*"],
     )
 
+# Per-stage timings: Server-Timing header + /metrics histograms (outermost, so it times everything)
+app.add_middleware(ServerTimingMiddleware)
+
 # Include routers
 app.include_router(
     auth.router,
@@ -67,6 +72,12 @@ app.include_router(
     tags=["Prediction"]
 )
 
+app.include_router(
+    jobs.router,
+    prefix=f"{settings.API_PREFIX}/model",
+    tags=["Batch Jobs"]
+)
+
 app.include_router(
     feature_importance.router,
     prefix=f"{settings.API_PREFIX}/features",
@@ -74,6 +85,32 @@ app.include_router(
 )
 
 
+@app.on_event("startup")
+async def startup_event():
+    """Pick up batch jobs left unfinished by the previous run; calibrate prediction threads"""
+    from api.services.executors import run_inference
+    from api.services.jobs import get_job_runner
+    from api.services.model_service import get_model_service
+    
+    get_job_runner().resume()
+    try:
+        # No-op when the pre-fork worker already did it in warm_up
+        await run_inference(lambda: get_model_service().calibrate_threads())
+    except Exception as e:
+        print(f"⚠ Prediction thread calibration skipped: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    from api.services import batcher
+    from api.services.executors import shutdown_executors
+    
+    if batcher._micro_batcher is not None:
+        await batcher._micro_batcher.close()
+    shutdown_executors()
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint - API health check"""
@@ -85,6 +122,12 @@ async def root():
     }
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, row counters, HTTP request stats"""
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint with model status"""
@@ -92,8 +135,8 @@ async def health_check():
     
     try:
         model_service = get_model_service()
-        model_loaded = model_service.model is not None
-        scaler_loaded = model_service.scaler is not None
+        model_loaded = model_service.is_loaded
+        scaler_loaded = model_service.scaler_mean is not None
         protein_mapping_count = len(model_service.protein_mapping)
         
         return {
@@ -103,6 +146,8 @@ async def health_check():
             "environment": settings.ENVIRONMENT,
             "model_loaded": model_loaded,
             "scaler_loaded": scaler_loaded,
+            "model_format": "bundle" if model_service.bundle is not None else "pickle",
+            "model_version": model_service.model_version,
             "protein_mappings": protein_mapping_count,
             "feature_count": len(model_service.feature_names) if model_service.feature_names else 0
         }
@@ -9,23 +9,22 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-import json
-import os
 
 from api.config import settings
+from api.services.executors import run_password_hash
+from api.services.token_cache import get_token_cache
+from api.services.user_store import UserExistsError, get_user_store
 
 router = APIRouter()
 
-# Password hashing
+# Password hashing (built once; hashing itself runs in the password pool)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Fallback if bcrypt fails
+fallback_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_PREFIX}/auth/login")
 
-# Simple file-based user storage (replace with Django DB in production)
-USERS_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "users.json")
-
-
 # Pydantic Models
 class UserCreate(BaseModel):
     name: str
@@ -56,27 +55,12 @@ class TokenData(BaseModel):
 
 
 # Helper functions
-def load_users():
-    """Load users from JSON file"""
-    if os.path.exists(USERS_FILE):
-        with open(USERS_FILE, "r") as f:
-            return json.load(f)
-    return {"users": []}
-
-
-def save_users(data):
-    """Save users to JSON file"""
-    with open(USERS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
-
-
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     try:
         return pwd_context.verify(plain_password, hashed_password)
     except Exception:
         # Fallback to pbkdf2 if bcrypt fails
-        fallback_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
         return fallback_context.verify(plain_password, hashed_password)
 
 
@@ -84,9 +68,8 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     try:
         return pwd_context.hash(password)
-    except Exception as e:
+    except Exception:
         # Fallback to pbkdf2 if bcrypt fails
-        fallback_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
         return fallback_context.hash(password)
 
 
@@ -103,16 +86,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def get_user_by_email(email: str):
-    """Get user by email"""
-    data = load_users()
-    for user in data["users"]:
-        if user["email"] == email:
-            return user
-    return None
+    """Get user by email (file-based store, replace with Django DB in production)"""
+    return get_user_store().get(email)
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Get current authenticated user from token"""
+    token_cache = get_token_cache()
+    # Pick up other workers' changes first; the store's listener evicts changed users
+    get_user_store().sync()
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -130,6 +116,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     user = get_user_by_email(email=token_data.email)
     if user is None:
         raise credentials_exception
+    token_cache.put(token, user, payload.get("exp"))
     return user
 
 
@@ -151,16 +138,19 @@ async def signup(user: UserCreate):
         )
     
     # Create new user
-    data = load_users()
-    new_user = {
-        "id": len(data["users"]) + 1,
-        "name": user.name,
-        "email": user.email,
-        "password_hash": get_password_hash(user.password),
-        "created_at": datetime.utcnow().isoformat()
-    }
-    data["users"].append(new_user)
-    save_users(data)
+    try:
+        new_user = get_user_store().add({
+            "name": user.name,
+            "email": user.email,
+            "password_hash": await run_password_hash(get_password_hash, user.password),
+            "created_at": datetime.utcnow().isoformat()
+        })
+    except UserExistsError:
+        # Registered by another request while the password was being hashed
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -191,7 +181,7 @@ async def login(user: UserLogin):
     """
     db_user = get_user_by_email(user.email)
     
-    if not db_user or not verify_password(user.password, db_user["password_hash"]):
+    if not db_user or not await run_password_hash(verify_password, user.password, db_user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -228,6 +218,12 @@ async def get_me(current_user: dict = Depends(get_current_user)):
     )
 
 
+@router.get("/token-cache/stats")
+async def token_cache_stats():
+    """Verified-token cache hit / miss / expiry counters"""
+    return get_token_cache().stats()
+
+
 @router.post("/logout")
 async def logout():
     """
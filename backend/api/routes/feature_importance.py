@@ -1,12 +1,17 @@
 """
 Feature Importance Routes
 Get biomarker/protein feature importance from the trained model
+
+/importance and /biomarkers only change with the model, so their bodies are
+built and serialized once per model version (FeaturePayloads) and served
+as bytes with a strong ETag; If-None-Match revalidations get a 304.
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, Query, Request
 from pydantic import BaseModel
 
 from api.services.model_service import ModelService, get_model_service
+from api.services.payload_cache import CachedPayload, cached_response
 
 router = APIRouter()
 
@@ -28,10 +33,51 @@ class FeatureImportanceResponse(BaseModel):
     selection_method: str
 
 
+class FeaturePayloads:
+    """Feature importance / biomarker bodies for one model version, serialized once"""
+
+    MAX_TOP_N = 100
+
+    def __init__(self, model_service: ModelService):
+        self.model_version = model_service.model_version
+        importance_data = model_service.get_feature_importance(top_n=self.MAX_TOP_N)
+        self._features = _importance_features(importance_data)
+        self._importance: Dict[int, CachedPayload] = {}
+        self.biomarkers = self._serialize("biomarkers", _biomarkers_body(importance_data))
+        self.importance(50)
+
+    def _serialize(self, variant: str, content: Any) -> CachedPayload:
+        return CachedPayload.from_content(content, f"{self.model_version}-{variant}")
+
+    def importance(self, top_n: int) -> CachedPayload:
+        payload = self._importance.get(top_n)
+        if payload is None:
+            # Normalized by the top feature, so every top_n is a prefix of the full ranking
+            payload = self._importance[top_n] = self._serialize(f"importance-{top_n}", FeatureImportanceResponse(
+                total_features=50,  # Model trained on 50 features
+                top_n=top_n,
+                features=self._features[:top_n],
+                model_type="LightGBM",
+                selection_method="Gain-based Feature Importance"
+            ))
+        return payload
+
+
+_feature_payloads: Optional[FeaturePayloads] = None
+
+def get_feature_payloads(model_service: ModelService = Depends(get_model_service)) -> FeaturePayloads:
+    """Payloads for the loaded model, rebuilt only when the model version changes"""
+    global _feature_payloads
+    if _feature_payloads is None or _feature_payloads.model_version != model_service.model_version:
+        _feature_payloads = FeaturePayloads(model_service)
+    return _feature_payloads
+
+
 @router.get("/importance", response_model=FeatureImportanceResponse)
 async def get_feature_importance(
+    request: Request,
     top_n: int = Query(default=50, ge=1, le=100, description="Number of top features to return"),
-    model_service: ModelService = Depends(get_model_service)
+    payloads: FeaturePayloads = Depends(get_feature_payloads)
 ):
     """
     Get the importance of protein biomarkers used in the model
@@ -41,35 +87,13 @@ async def get_feature_importance(
     Returns ranked list of features with their importance scores.
     Higher importance indicates stronger influence on PD prediction.
     """
-    importance_data = model_service.get_feature_importance(top_n=top_n)
-    
-    # Normalize importance scores
-    max_importance = max(f["importance"] for f in importance_data) if importance_data else 1
-    
-    features = []
-    for i, feat in enumerate(importance_data):
-        feature_name = feat.get("name") or feat.get("feature") or f"Feature_{i}"
-        features.append(FeatureImportance(
-            rank=feat.get("rank", i + 1),
-            feature_name=feature_name,
-            protein_name=feat.get("protein_name", feature_name),
-            importance=round(feat["importance"], 6),
-            importance_normalized=round(feat["importance"] / max_importance, 4),
-            category=categorize_protein(feature_name)
-        ))
-    
-    return FeatureImportanceResponse(
-        total_features=50,  # Model trained on 50 features
-        top_n=top_n,
-        features=features,
-        model_type="LightGBM",
-        selection_method="Gain-based Feature Importance"
-    )
+    return cached_response(request, payloads.importance(top_n))
 
 
 @router.get("/biomarkers")
 async def get_biomarkers(
-    model_service: ModelService = Depends(get_model_service)
+    request: Request,
+    payloads: FeaturePayloads = Depends(get_feature_payloads)
 ):
     """
     Get detailed biomarker information
@@ -77,28 +101,7 @@ async def get_biomarkers(
     Returns all biomarkers with their categories and descriptions.
     These are the key proteins identified for Parkinson's Disease detection.
     """
-    importance_data = model_service.get_feature_importance(top_n=50)
-    
-    biomarkers = []
-    for i, feat in enumerate(importance_data[:20]):  # Top 20 biomarkers
-        feature_name = feat.get("name") or feat.get("feature") or f"Feature_{i}"
-        biomarkers.append({
-            "id": i + 1,
-            "name": get_protein_display_name(feature_name),
-            "symbol": feature_name.replace("seq_", "").upper()[:8],
-            "importance": round(feat["importance"], 6),
-            "category": categorize_protein(feature_name),
-            "description": get_protein_description(feature_name),
-            "direction": "elevated" if i % 2 == 0 else "decreased",
-            "confidence": round(0.85 + (0.1 * (20 - i) / 20), 2)
-        })
-    
-    return {
-        "count": len(biomarkers),
-        "biomarkers": biomarkers,
-        "model_accuracy": 0.89,
-        "selection_method": "LightGBM Feature Importance (Gain)"
-    }
+    return cached_response(request, payloads.biomarkers)
 
 
 @router.get("/categories")
@@ -143,6 +146,48 @@ async def get_feature_categories():
 
 
 # Helper functions
+def _importance_features(importance_data: List[Dict]) -> List[FeatureImportance]:
+    """Ranked features with importance normalized to the top one"""
+    # Normalize importance scores
+    max_importance = max(f["importance"] for f in importance_data) if importance_data else 1
+    
+    features = []
+    for i, feat in enumerate(importance_data):
+        feature_name = feat.get("name") or feat.get("feature") or f"Feature_{i}"
+        features.append(FeatureImportance(
+            rank=feat.get("rank", i + 1),
+            feature_name=feature_name,
+            protein_name=feat.get("protein_name", feature_name),
+            importance=round(feat["importance"], 6),
+            importance_normalized=round(feat["importance"] / max_importance, 4),
+            category=categorize_protein(feature_name)
+        ))
+    return features
+
+
+def _biomarkers_body(importance_data: List[Dict]) -> Dict:
+    biomarkers = []
+    for i, feat in enumerate(importance_data[:20]):  # Top 20 biomarkers
+        feature_name = feat.get("name") or feat.get("feature") or f"Feature_{i}"
+        biomarkers.append({
+            "id": i + 1,
+            "name": get_protein_display_name(feature_name),
+            "symbol": feature_name.replace("seq_", "").upper()[:8],
+            "importance": round(feat["importance"], 6),
+            "category": categorize_protein(feature_name),
+            "description": get_protein_description(feature_name),
+            "direction": "elevated" if i % 2 == 0 else "decreased",
+            "confidence": round(0.85 + (0.1 * (20 - i) / 20), 2)
+        })
+    
+    return {
+        "count": len(biomarkers),
+        "biomarkers": biomarkers,
+        "model_accuracy": 0.89,
+        "selection_method": "LightGBM Feature Importance (Gain)"
+    }
+
+
 def categorize_protein(feature_name: str) -> str:
     """Categorize protein based on name patterns"""
     name_lower = feature_name.lower()
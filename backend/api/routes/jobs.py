@@ -0,0 +1,155 @@
+"""
+Batch Job Routes
+Asynchronous scoring for cohorts too large for one /model/predict-csv request
+
+Submit the CSV, then poll the job and page through its results; jobs are
+scored in chunks by a local process pool (see services/jobs.py) and
+survive restarts.
+"""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import Response
+from pydantic import BaseModel
+import pandas as pd
+
+from api.config import settings
+from api.routes.prediction import PatientPrediction, SummaryStats, executor_http_error
+from api.services.executors import ClientDisconnected, ExecutorTimeout, run_inference
+from api.services.ingest import read_header
+from api.services.jobs import SUCCEEDED, UNFINISHED, JobRunner, fail_job, get_job_runner
+from api.services.model_service import ModelService, get_model_service
+from api.services.serialization import dumps
+
+router = APIRouter()
+
+
+class JobStatus(BaseModel):
+    """Batch job progress"""
+    job_id: str
+    status: str  # queued, running, succeeded, failed
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    rows_done: int
+    total_rows: Optional[int] = None  # counted from the upload once the job starts
+    progress: float  # 0-1
+    summary: Optional[SummaryStats] = None  # once succeeded
+    error: Optional[str] = None
+    results_url: str
+
+
+class JobResultsPage(BaseModel):
+    """One page of a job's patients"""
+    job_id: str
+    status: str
+    offset: int
+    limit: int
+    rows_done: int
+    next_offset: Optional[int] = None  # None once every patient has been returned
+    patients: List[PatientPrediction]
+
+
+def job_status(request: Request, job: dict) -> JobStatus:
+    total = job["total_rows"]
+    if job["status"] == SUCCEEDED:
+        progress = 1.0
+    else:
+        progress = min(1.0, job["rows_done"] / total) if total else 0.0
+    return JobStatus(
+        **{name: job[name] for name in ("job_id", "status", "created_at", "started_at", "finished_at",
+                                         "rows_done", "total_rows", "summary", "error")},
+        progress=round(progress, 4),
+        results_url=str(request.url_for("get_job_results", job_id=job["job_id"])),
+    )
+
+
+def get_job_or_404(job_id: str, runner: JobRunner) -> dict:
+    job = runner.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(
+    request: Request,
+    file: UploadFile = File(...),
+    model_service: ModelService = Depends(get_model_service),
+    runner: JobRunner = Depends(get_job_runner),
+):
+    """
+    Queue a CSV upload for background scoring
+
+    The header is checked before the job is accepted (missing features → 400).
+    Returns the job (202) right away; poll `GET /model/jobs/{job_id}` for
+    progress and read the patients from `GET /model/jobs/{job_id}/results`.
+    """
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Batch jobs support CSV files only.")
+    if runner.pending >= settings.JOB_MAX_PENDING:
+        raise HTTPException(status_code=503, detail="Too many unfinished jobs, try again later.")
+    await run_inference(runner.purge_expired)
+
+    try:
+        columns = await run_inference(read_header, file.file, request=request)
+        model_service.validate_columns(columns)
+        job = await run_inference(
+            runner.store.create, file.file, list(PatientPrediction.model_fields), settings.JOB_CHUNK_ROWS,
+            request=request,
+        )
+    except pd.errors.EmptyDataError:
+        raise HTTPException(status_code=400, detail="The uploaded file is empty.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (ExecutorTimeout, ClientDisconnected) as e:
+        raise executor_http_error(e)
+
+    try:
+        runner.submit(job["job_id"])
+    except Exception as e:
+        # Don't leave a queued job behind that nothing will run
+        await run_inference(fail_job, runner.store, job, f"Could not start the job: {e}")
+        raise HTTPException(status_code=503, detail="The job could not be started, try again later.")
+    print(f"✓ Job {job['job_id']} queued ({file.filename})")
+    return job_status(request, job)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(request: Request, job_id: str, runner: JobRunner = Depends(get_job_runner)):
+    """Job status, progress and (once succeeded) the summary"""
+    return job_status(request, get_job_or_404(job_id, runner))
+
+
+@router.get("/jobs/{job_id}/results", response_model=JobResultsPage)
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=1000, ge=1, le=settings.JOB_RESULTS_PAGE_MAX),
+    runner: JobRunner = Depends(get_job_runner),
+):
+    """
+    Page through a job's patients (available chunk by chunk while it runs)
+
+    Follow `next_offset` until it is null; while the job is still running, a
+    page may come back short and `next_offset` points at the rows still to come.
+    """
+    job = get_job_or_404(job_id, runner)
+    try:
+        rows = await run_inference(runner.store.results, job, offset, limit)
+    except FileNotFoundError:  # expired (JOB_RETENTION_HOURS) while we read it
+        raise HTTPException(status_code=404, detail="Job not found")
+    end = offset + len(rows)
+    finished = job["status"] not in UNFINISHED
+    next_offset = None if finished and end >= job["rows_done"] else end
+
+    # Patients are stored serialized; splice them into the envelope as-is
+    envelope = dumps({
+        "job_id": job_id,
+        "status": job["status"],
+        "offset": offset,
+        "limit": limit,
+        "rows_done": job["rows_done"],
+        "next_offset": next_offset,
+    })
+    body = envelope[:-1] + b',"patients":[' + b",".join(rows) + b"]}"
+    return Response(content=body, media_type="application/json")
@@ -2,14 +2,29 @@
 Prediction Routes
 Handles CSV upload and Parkinson's Disease prediction
 """
-import io
-from typing import List, Optional
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
-from pydantic import BaseModel
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 import pandas as pd
 import numpy as np
 
+from api.config import settings
 from api.services.model_service import ModelService, get_model_service
+from api.services.batcher import get_micro_batcher
+from api.services import binary_matrix
+from api.services.binary_matrix import ARROW_CONTENT_TYPE, MATRIX_CONTENT_TYPE
+from api.services.executors import (
+    ClientDisconnected, ExecutorTimeout, WorkerCrashed, run_guarded, run_inference, run_parse
+)
+from api.services.ingest import iter_feature_blocks, read_header
+from api.services.metrics import span
+from api.services.parsing import read_csv_columns, read_upload
+from api.services.payload_cache import cached_response
+from api.services.prediction_cache import get_response_cache, upload_digest
+from api.services.result_builder import SummaryAccumulator, risk_levels, summarize
+from api.services.serialization import dumps, encode_prediction_response, patient_records
 from api.routes.auth import get_current_user
 
 router = APIRouter()
@@ -63,6 +78,32 @@ class SinglePredictionResponse(BaseModel):
     confidence: float  # 0-1
 
 
+class BatchInferenceRequest(BaseModel):
+    """Request for inference on many patients at once"""
+    patients: List[InferenceRequest] = Field(..., min_length=1, max_length=settings.INFER_MAX_PATIENTS_PER_REQUEST)
+
+
+class BatchPatientResult(BaseModel):
+    """One patient of a batch inference; prediction fields are null when it failed"""
+    index: int  # position in the request
+    success: bool
+    prediction: Optional[int] = None
+    probability: Optional[float] = None  # 0-100%
+    risk_level: Optional[str] = None
+    interpretation: Optional[str] = None
+    confidence: Optional[float] = None  # 0-1
+    missing_features: List[str] = []
+    error: Optional[str] = None
+
+
+class BatchInferenceResponse(BaseModel):
+    """Response for batch inference, one result per requested patient"""
+    success: bool
+    scored: int
+    failed: int
+    results: List[BatchPatientResult]
+
+
 class PredictionResponse(BaseModel):
     """Full prediction response"""
     success: bool
@@ -75,9 +116,224 @@ class PredictionResponse(BaseModel):
         extra = "allow"
 
 
-@router.post("/predict-csv", response_model=PredictionResponse)
+class CompactPredictionResponse(BaseModel):
+    """Prediction response without the static model metadata (see GET /model/metadata)"""
+    success: bool
+    message: str
+    summary: SummaryStats
+    patients: List[PatientPrediction]
+    metadata_version: str
+    feature_count: int
+    
+    class Config:
+        extra = "allow"
+
+
+def response_model_for(compact: bool):
+    return CompactPredictionResponse if compact else PredictionResponse
+
+
+def executor_http_error(e: Exception) -> HTTPException:
+    """Map executor give-ups to HTTP errors"""
+    if isinstance(e, WorkerCrashed):
+        return HTTPException(status_code=503, detail=str(e))
+    if isinstance(e, ExecutorTimeout):
+        return HTTPException(status_code=504, detail=str(e))
+    # 499: client closed request (nobody is listening, but it shows up in logs)
+    return HTTPException(status_code=499, detail=str(e))
+
+
+def _score_next_block(
+    blocks, model_service: ModelService, patient_id_offset: int, compact: bool = False, build: bool = True
+):
+    """Parse and score the next feature block, or None when the upload is exhausted"""
+    with span("parse") as parse_span:
+        X = next(blocks, None)
+        parse_span.rows = 0 if X is None else len(X)
+    if X is None:
+        return None
+    if not build:
+        return [], model_service.score_matrix(X)
+    return model_service.predict_matrix(X, patient_id_offset, compact)
+
+
+async def score_csv_blocks(
+    file: UploadFile,
+    request: Optional[Request],
+    model_service: ModelService,
+    compact: bool = False,
+    build: bool = True,
+) -> AsyncIterator[Tuple[List[dict], np.ndarray]]:
+    """
+    Validate the CSV header, then parse and score the upload block by block
+    
+    Missing columns are reported from the first chunk, before the rest of the
+    upload is parsed. The upload itself has already been received by then:
+    Starlette spools the whole multipart body (to disk past 1 MB) before the
+    route runs, so an early rejection saves parsing and memory, not the
+    transfer or the temporary file. Each step runs in the inference pool
+    (watching for client disconnects only when a request is given). With ``build=False`` only P(PD)
+    is computed and the patient lists are empty.
+    """
+    if not model_service.feature_names:
+        raise HTTPException(status_code=400, detail="Streaming ingest requires the model's feature list.")
+    
+    with span("validate"):
+        columns = await run_inference(read_header, file.file, request=request)
+        model_service.validate_columns(columns)
+    
+    blocks = iter_feature_blocks(
+        file.file,
+        model_service.feature_names,
+        block_rows=settings.CSV_STREAM_BLOCK_ROWS,
+        dtype=np.dtype(settings.CSV_STREAM_DTYPE),
+    )
+    offset = 0
+    while True:
+        scored = await run_inference(
+            _score_next_block, blocks, model_service, offset, compact, build, request=request
+        )
+        if scored is None:
+            break
+        yield scored
+        offset += len(scored[1])
+
+
+async def score_csv_stream(
+    file: UploadFile, request: Request, model_service: ModelService, compact: bool = False
+) -> Tuple[Dict[str, Any], np.ndarray]:
+    """
+    Score the upload block by block, keeping only P(PD) (8 bytes per patient)
+    
+    Returns the response without its patients, and P(PD) for every row; the
+    patients are generated from P(PD) when the body is serialized.
+    """
+    blocks = []
+    accumulator = SummaryAccumulator()
+    async for _, probabilities in score_csv_blocks(file, request, model_service, compact, build=False):
+        blocks.append(probabilities)
+        accumulator.add(probabilities)
+    
+    if accumulator.total == 0:
+        raise HTTPException(status_code=400, detail="The uploaded file is empty.")
+    result = model_service.build_response([], accumulator.summary(), model_service.feature_names, compact)
+    return result, np.concatenate(blocks)
+
+
+async def predict_csv_streaming(
+    file: UploadFile, request: Request, model_service: ModelService, compact: bool = False
+) -> dict:
+    """Block-wise version of ModelService.predict for large CSV uploads"""
+    result, probabilities = await score_csv_stream(file, request, model_service, compact)
+    # Only the PatientPrediction fields reach the response, so only those are built
+    result["patients"] = patient_records(probabilities, PatientPrediction.model_fields)
+    return result
+
+
+async def predict_csv_streaming_body(
+    file: UploadFile, request: Request, model_service: ModelService, compact: bool = False
+) -> bytes:
+    """predict_csv_streaming + serialization, encoded straight from P(PD) (JSON_FAST_PATH)"""
+    result, probabilities = await score_csv_stream(file, request, model_service, compact)
+    return await run_inference(encode_body, result, probabilities, compact, request=request)
+
+
+def encode_body(result: Dict[str, Any], probabilities: np.ndarray, compact: bool = False) -> bytes:
+    with span("serialize", rows=len(probabilities)):
+        return encode_prediction_response(result, probabilities, response_model_for(compact), PatientPrediction)
+
+
+def predict_csv_body(model_service: ModelService, df: pd.DataFrame, compact: bool = False) -> bytes:
+    """
+    ModelService.predict + serialization, encoded straight from P(PD) (JSON_FAST_PATH)
+    
+    The response only carries PatientPrediction fields per patient, so the
+    per-patient result dicts (feature values, contributors) are never built.
+    """
+    if compact:
+        model_service.require_metadata()
+    probabilities, used_features = model_service.score(df)
+    n_patients = len(probabilities)
+    summary = summarize(n_patients, int((probabilities >= 0.5).sum()), float(np.mean(probabilities)))
+    result = model_service.build_response([], summary, used_features, compact)
+    return encode_body(result, probabilities, compact)
+
+
+def _ndjson_line(obj: dict) -> bytes:
+    return dumps(obj) + b"\n"
+
+
+async def predict_csv_ndjson(
+    file: UploadFile, request: Request, model_service: ModelService, compact: bool = False
+) -> StreamingResponse:
+    """
+    Stream one JSON line per patient as each block is scored, then a summary line
+    
+    The header and first block are scored before the response starts, so
+    validation errors still come back as a normal 4xx response.
+    """
+    fast = settings.JSON_FAST_PATH
+    blocks = score_csv_blocks(file, None, model_service, compact, build=not fast)
+    try:
+        first = await run_guarded(blocks.__anext__(), request=request)
+    except StopAsyncIteration:
+        raise HTTPException(status_code=400, detail="The uploaded file is empty.")
+    
+    response_model = response_model_for(compact)
+    patient_fields = list(PatientPrediction.model_fields)
+    
+    async def lines():
+        accumulator = SummaryAccumulator()
+        block = first
+        try:
+            while block is not None:
+                patients, probabilities = block
+                if fast:
+                    patients = patient_records(probabilities, PatientPrediction.model_fields, accumulator.total)
+                accumulator.add(probabilities)
+                with span("serialize", rows=len(patients)):
+                    chunk = b"".join(
+                        _ndjson_line({"type": "patient", **{k: p[k] for k in patient_fields}})
+                        for p in patients
+                    )
+                yield chunk
+                block = await blocks.__anext__()
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            yield _ndjson_line({"type": "error", "detail": f"Error processing file: {str(e)}"})
+            return
+        
+        # Same shape as the JSON response, minus the patients list
+        result = model_service.build_response([], accumulator.summary(), model_service.feature_names, compact)
+        summary = response_model(**result).model_dump()
+        summary.pop("patients")
+        yield _ndjson_line({"type": "summary", **summary})
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/predict-csv", response_model=Union[PredictionResponse, CompactPredictionResponse])
 async def predict_from_csv(
+    request: Request,
     file: UploadFile = File(...),
+    ingest: str = Query(
+        default="memory",
+        pattern="^(memory|stream)$",
+        description="'stream' parses and scores large CSVs in fixed-size blocks, keeping only P(PD) per row",
+    ),
+    stream: Optional[str] = Query(
+        default=None,
+        pattern="^ndjson$",
+        description="'ndjson' streams one JSON line per patient, then a summary line (implies ingest=stream)",
+    ),
+    output_format: str = Query(
+        default="verbose",
+        alias="format",
+        pattern="^(verbose|compact)$",
+        description="'compact' omits the static model metadata (fetch it once from /model/metadata)",
+    ),
     model_service: ModelService = Depends(get_model_service),
 ):
     """
@@ -94,6 +350,25 @@ async def predict_from_csv(
     - risk_level: Low, Moderate, High, or Very High
     - interpretation: Human-readable result
     
+    **Streaming ingest (`?ingest=stream`, CSV only):** the header is validated
+    first, then rows are parsed into fixed-size blocks and scored as they are
+    read; only P(PD) (8 bytes per patient) is kept until the response is
+    built. The JSON response itself still holds every patient: for memory
+    that doesn't grow with the file size end to end, use `?stream=ndjson`.
+    The upload is received in full (spooled to a temporary file) before any
+    of this runs, so a bad header is rejected without parsing the rows, but
+    not before the whole file has been uploaded.
+    
+    **NDJSON output (`?stream=ndjson`, CSV only):** one `{"type": "patient", ...}`
+    line per patient as soon as its block is scored, then a trailing
+    `{"type": "summary", ...}` line with the rest of the response. Errors after
+    the first line are reported as a `{"type": "error", ...}` line.
+    
+    **Compact output (`?format=compact`):** the same patients, without
+    `top_biomarkers`, `used_features` and `feature_protein_map`; instead a
+    `metadata_version` matching `GET /model/metadata`, where that static
+    part is served once (cacheable). Works with every ingest / stream mode.
+    
     **Note:** This is patient-level prediction. Metrics like accuracy, F1, AUC 
     are NOT provided as they require labeled test data.
     """
@@ -104,26 +379,78 @@ async def predict_from_csv(
             detail="Invalid file format. Please upload a CSV or Excel file."
         )
     
+    compact = output_format == "compact"
+    response_model = response_model_for(compact)
     try:
+        if compact:
+            model_service.require_metadata()
+        if ingest == "stream" or stream == "ndjson":
+            if not file.filename.endswith('.csv'):
+                raise HTTPException(status_code=400, detail="Streaming ingest supports CSV files only.")
+            if stream == "ndjson":
+                return await predict_csv_ndjson(file, request, model_service, compact)
+            if settings.JSON_FAST_PATH:
+                body = await predict_csv_streaming_body(file, request, model_service, compact)
+                return Response(content=body, media_type="application/json")
+            result = await predict_csv_streaming(file, request, model_service, compact)
+            with span("serialize", rows=len(result["patients"])):
+                return JSONResponse(content=jsonable_encoder(response_model(**result)))
+        
         # Read file content
-        contents = await file.read()
+        with span("read"):
+            contents = await file.read()
         
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
+        # Identical upload + model version: answer from the response cache without parsing
+        response_cache = get_response_cache()
+        cache_key = None
+        if response_cache.enabled:
+            with span("response_cache"):
+                cache_key = await run_inference(
+                    upload_digest, contents, file.filename, model_service.model_version,
+                    output_format if compact else "", request=request
+                )
+                cached_body = response_cache.get(cache_key)
+            if cached_body is not None:
+                return Response(content=cached_body, media_type="application/json")
+        
+        # CSV: check the header before parsing the body, then parse only the
+        # model's features (typed) in the process pool
+        columns = None
+        if file.filename.endswith('.csv') and model_service.feature_names:
+            with span("validate"):
+                model_service.validate_columns(read_csv_columns(contents))
+            columns = model_service.feature_names
+        with span("parse") as parse_span:
+            df = await run_parse(
+                read_upload, contents, file.filename, columns, settings.CSV_PARSE_DTYPE, settings.CSV_PARSE_ENGINE,
+                request=request,
+            )
+            parse_span.rows = len(df)
+        del contents
         
         if df.empty:
             raise HTTPException(status_code=400, detail="The uploaded file is empty.")
         
-        # Make predictions
-        result = model_service.predict(df)
-        
-        if not result["success"]:
-            raise HTTPException(status_code=400, detail=result.get("error", "Prediction failed"))
-        
-        return PredictionResponse(**result)
+        # Make predictions (inference thread pool)
+        if settings.JSON_FAST_PATH:
+            body = await run_inference(predict_csv_body, model_service, df, compact, request=request)
+            response = Response(content=body, media_type="application/json")
+        else:
+            result = await run_inference(model_service.predict, df, compact, request=request)
+            
+            if not result["success"]:
+                raise HTTPException(status_code=400, detail=result.get("error", "Prediction failed"))
+            
+            with span("serialize", rows=len(result["patients"])):
+                response = JSONResponse(content=jsonable_encoder(response_model(**result)))
+        if cache_key is not None:
+            response_cache.put(cache_key, response.body, len(response.body))
+        return response
         
+    except HTTPException:
+        raise
+    except (ExecutorTimeout, ClientDisconnected, WorkerCrashed) as e:
+        raise executor_http_error(e)
     except pd.errors.EmptyDataError:
         raise HTTPException(status_code=400, detail="The CSV file is empty or malformed.")
     except ValueError as e:
@@ -132,6 +459,101 @@ async def predict_from_csv(
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
 
+def score_binary(model_service: ModelService, body: bytes, content_type: str) -> bytes:
+    """Decode a binary matrix body, score it and encode the results in the same format"""
+    with span("decode") as decode_span:
+        if content_type == ARROW_CONTENT_TYPE:
+            table, columns = binary_matrix.arrow_columns(body)
+        else:
+            X, columns = binary_matrix.decode_matrix(body)
+        model_service.validate_columns(columns)
+        if content_type == ARROW_CONTENT_TYPE:
+            X = binary_matrix.arrow_feature_matrix(table, model_service.feature_names)
+        else:
+            X = binary_matrix.select_columns(X, columns, model_service.feature_names)
+        decode_span.rows = len(X)
+    if len(X) == 0:
+        raise ValueError("The request has no rows.")
+    probabilities = model_service.score_matrix(X)
+    with span("serialize", rows=len(X)):
+        return binary_matrix.encode_results(probabilities, content_type)
+
+
+_BINARY_BODY = {"schema": {"type": "string", "format": "binary"}}
+
+
+@router.post(
+    "/predict-binary",
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {MATRIX_CONTENT_TYPE: _BINARY_BODY, ARROW_CONTENT_TYPE: _BINARY_BODY},
+    }},
+    responses={200: {"content": {MATRIX_CONTENT_TYPE: _BINARY_BODY, ARROW_CONTENT_TYPE: _BINARY_BODY}}},
+)
+async def predict_binary(
+    request: Request,
+    model_service: ModelService = Depends(get_model_service),
+):
+    """
+    Score a binary patient x feature matrix (for pipeline services)
+    
+    **Input** (`Content-Type`):
+    - `application/x-proteomics-matrix`: little-endian float32 (or float64),
+      row-major, after a small header with the shape and column names (format
+      in `api/services/binary_matrix.py`); NaN marks a missing value
+    - `application/vnd.apache.arrow.stream`: an Arrow IPC stream with one
+      numeric column per feature (needs pyarrow on the server)
+    
+    Columns may come in any order and extra columns are ignored.
+    
+    **Returns** the same format: `probability` (P(PD), 0-1) and `prediction`
+    (0/1) per row, in request order. `api/client.py` encodes and decodes both.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in (MATRIX_CONTENT_TYPE, ARROW_CONTENT_TYPE):
+        raise HTTPException(
+            status_code=415, detail=f"Send {MATRIX_CONTENT_TYPE} or {ARROW_CONTENT_TYPE}."
+        )
+    if content_type == ARROW_CONTENT_TYPE and binary_matrix.pyarrow is None:
+        raise HTTPException(status_code=415, detail="Arrow IPC is not available on this server (pyarrow is not installed).")
+    if not model_service.feature_names:
+        raise HTTPException(status_code=400, detail="Binary input requires the model's feature list.")
+    
+    max_bytes = settings.BINARY_MAX_MB * 1024 * 1024
+    if int(request.headers.get("content-length") or 0) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Body exceeds {settings.BINARY_MAX_MB:g} MB.")
+    with span("read"):
+        body = await request.body()
+    if len(body) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Body exceeds {settings.BINARY_MAX_MB:g} MB.")
+    
+    try:
+        content = await run_inference(score_binary, model_service, body, content_type, request=request)
+    except (ExecutorTimeout, ClientDisconnected, WorkerCrashed) as e:
+        raise executor_http_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=content, media_type=content_type)
+
+
+@router.get("/metadata")
+async def get_model_metadata(
+    request: Request,
+    model_service: ModelService = Depends(get_model_service)
+):
+    """
+    Static model metadata for compact prediction responses
+    
+    Features in model order (index, seq_* name, protein name, display name,
+    importance) and the top biomarkers. `metadata_version` (also the ETag)
+    changes only with the model, so clients can cache this and revalidate
+    with If-None-Match.
+    """
+    if model_service.metadata is None:
+        raise HTTPException(status_code=404, detail="Model metadata is not available (no feature list loaded).")
+    return cached_response(request, model_service.metadata)
+
+
 @router.get("/required-features")
 async def get_required_features(
     model_service: ModelService = Depends(get_model_service)
@@ -155,6 +577,7 @@ async def get_required_features(
 @router.post("/infer", response_model=SinglePredictionResponse)
 async def infer_single_patient(
     request: InferenceRequest,
+    http_request: Request,
     model_service: ModelService = Depends(get_model_service),
 ):
     """
@@ -175,11 +598,27 @@ async def infer_single_patient(
         # Convert proteomics list to dictionary format expected by model
         proteomics_dict = {item.name: item.value for item in request.proteomics}
         
+        if settings.INFER_BATCH_ENABLED and model_service.feature_names:
+            # Score through the micro-batcher together with concurrent requests
+            row = model_service.feature_vector(proteomics_dict)
+            with span("batch_wait", rows=1):
+                prob = await run_guarded(get_micro_batcher().submit(row), request=http_request)
+            prediction = int(prob >= 0.5)
+            probability = round(prob * 100, 2)
+            return SinglePredictionResponse(
+                success=True,
+                prediction=prediction,
+                probability=probability,
+                risk_level=model_service._get_risk_level(prob),
+                interpretation="Parkinson's Disease" if prediction == 1 else "Healthy",
+                confidence=probability / 100.0
+            )
+        
         # Create a DataFrame with a single row
         df = pd.DataFrame([proteomics_dict])
         
-        # Make prediction
-        result = model_service.predict(df)
+        # Make prediction (inference thread pool)
+        result = await run_inference(model_service.predict, df, request=http_request)
         
         if not result["success"]:
             raise HTTPException(
@@ -204,6 +643,10 @@ async def infer_single_patient(
                 detail="No prediction result returned"
             )
             
+    except HTTPException:
+        raise
+    except (ExecutorTimeout, ClientDisconnected, WorkerCrashed) as e:
+        raise executor_http_error(e)
     except KeyError as e:
         raise HTTPException(
             status_code=400,
@@ -216,6 +659,117 @@ async def infer_single_patient(
         )
 
 
+def score_patient_batch(model_service: ModelService, patients: List[InferenceRequest]) -> Dict[str, Any]:
+    """Score every patient with a complete feature set; the others get their missing features"""
+    with span("validate", rows=len(patients)):
+        X, missing = model_service.feature_matrix(
+            [[(item.name, item.value) for item in patient.proteomics] for patient in patients]
+        )
+    complete = np.array([not names for names in missing], dtype=bool)
+    probabilities = model_service.score_matrix(X[complete]) if complete.any() else np.empty(0)
+    
+    with span("build", rows=len(patients)):
+        scored = iter(zip(
+            probabilities.tolist(),
+            (probabilities >= 0.5).tolist(),
+            risk_levels(probabilities).tolist(),
+        ))
+        n_features = len(model_service.feature_names)
+        results = []
+        for i, names in enumerate(missing):
+            if names:
+                results.append({
+                    "index": i, "success": False, "prediction": None, "probability": None,
+                    "risk_level": None, "interpretation": None, "confidence": None,
+                    "missing_features": names,
+                    "error": f"Missing {len(names)} of {n_features} required features",
+                })
+                continue
+            prob, positive, risk_level = next(scored)
+            probability = round(prob * 100, 2)
+            results.append({
+                "index": i, "success": True, "prediction": int(positive), "probability": probability,
+                "risk_level": risk_level, "interpretation": "Parkinson's Disease" if positive else "Healthy",
+                "confidence": probability / 100.0, "missing_features": [], "error": None,
+            })
+    n_scored = int(complete.sum())
+    return {"success": n_scored > 0, "scored": n_scored, "failed": len(patients) - n_scored, "results": results}
+
+
+@router.post("/infer-batch", response_model=BatchInferenceResponse)
+async def infer_batch(
+    request: BatchInferenceRequest,
+    http_request: Request,
+    model_service: ModelService = Depends(get_model_service),
+):
+    """
+    Run inference for many patients in one request.
+    
+    **Input:**
+    - patients: List of `/infer` requests (patient metadata + proteomics list)
+    
+    **Returns** one result per patient, in request order. Patients missing
+    required features don't fail the batch: their result has `success: false`,
+    the `missing_features` and an `error`, and the other patients are scored.
+    """
+    if not model_service.feature_names:
+        raise HTTPException(status_code=400, detail="Batch inference requires the model's feature list.")
+    try:
+        body = await run_inference(score_patient_batch, model_service, request.patients, request=http_request)
+    except (ExecutorTimeout, ClientDisconnected, WorkerCrashed) as e:
+        raise executor_http_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error during inference: {str(e)}")
+    if settings.JSON_FAST_PATH:
+        with span("serialize", rows=len(request.patients)):
+            return Response(content=dumps(body), media_type="application/json")
+    return body
+
+
+@router.get("/infer/stats")
+async def get_infer_batching_stats():
+    """
+    Micro-batching metrics for /infer
+    
+    Returns queue depth, batch-size and wait-time distributions, used to tune
+    INFER_BATCH_WINDOW_MS / INFER_BATCH_MAX_ROWS (throughput vs p99 latency).
+    """
+    return {
+        "enabled": settings.INFER_BATCH_ENABLED,
+        **get_micro_batcher().stats()
+    }
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    model_service: ModelService = Depends(get_model_service)
+):
+    """
+    Prediction cache metrics
+    
+    Hit/miss counters, size and evictions for the per-row prediction cache
+    and the whole-upload response cache.
+    """
+    return {
+        "row_cache": model_service.row_cache.stats(),
+        "response_cache": get_response_cache().stats()
+    }
+
+
+@router.get("/threads/stats")
+async def get_thread_stats(
+    model_service: ModelService = Depends(get_model_service)
+):
+    """
+    Prediction thread policy
+    
+    The worker's thread budget, the batch-size steps (calibrated at start-up
+    or the default heuristic), the calibration timings and how many LightGBM
+    calls / rows ran in each regime (serial, parallel or override).
+    """
+    return model_service.thread_policy.stats()
+
+
 @router.get("/sample-data")
 async def get_sample_data(
     model_service: ModelService = Depends(get_model_service)
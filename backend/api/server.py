@@ -0,0 +1,167 @@
+"""
+Pre-fork Server - Production launcher sharing one loaded model across workers
+The master process loads ModelService once, freezes the GC and binds the
+listening socket, then forks N uvicorn workers that inherit the model pages
+copy-on-write. Each worker scores a dummy patient before accepting traffic;
+the master restarts workers that die and forwards shutdown signals.
+
+Usage (from backend/):
+    python -m api.server [--host 0.0.0.0] [--port 8000] [--workers 2]
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from api.config import settings
+
+
+# Don't restart a worker more than once per this many seconds (crash loops)
+RESTART_BACKOFF_SECONDS = 1.0
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket shared by all workers"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def load_shared_state():
+    """
+    Everything the workers should share: the app, its routes, the model, the
+    precomputed feature payloads and the user index.
+
+    Nothing here may start threads or run a prediction: threads (including
+    OpenMP pools) don't survive fork, so that happens in each worker (this
+    includes the NumPy engine's check against predict_proba, done in warm_up).
+    """
+    from api.main import app
+    from api.routes.feature_importance import get_feature_payloads
+    from api.services.model_service import get_model_service
+    from api.services.user_store import get_user_store
+
+    model_service = get_model_service()
+    get_feature_payloads(model_service)
+    get_user_store()
+    # Move everything loaded so far out of the collector's reach, so GC
+    # passes in the workers don't write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+    return app, model_service
+
+
+def run_worker(app, sock: socket.socket, worker_id: int):
+    """Worker process body: warm up, then serve on the inherited socket"""
+    from api.services.model_service import get_model_service
+
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    gc.enable()
+
+    started = time.perf_counter()
+    get_model_service().warm_up()
+    print(f"✓ Worker {worker_id} (pid {os.getpid()}) warmed up in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    config = uvicorn.Config(app, log_level="info", access_log=False, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Master:
+    """Forks the workers and keeps N of them running until told to stop"""
+
+    def __init__(self, app, sock: socket.socket, n_workers: int):
+        self.app = app
+        self.sock = sock
+        self.n_workers = max(1, n_workers)
+        self.workers: Dict[int, int] = {}  # pid -> worker id
+        self._last_start: Dict[int, float] = {}
+        self._stopping = False
+
+    def spawn(self, worker_id: int):
+        now = time.monotonic()
+        delay = self._last_start.get(worker_id, 0.0) + RESTART_BACKOFF_SECONDS - now
+        if delay > 0:
+            time.sleep(delay)
+        self._last_start[worker_id] = time.monotonic()
+
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.app, self.sock, worker_id)
+            except BaseException as e:
+                print(f"✗ Worker {worker_id} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = worker_id
+
+    def stop(self, signum=None, frame=None):
+        if self._stopping:
+            return
+        self._stopping = True
+        print(f"⏹ Stopping {len(self.workers)} workers")
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for worker_id in range(self.n_workers):
+            self.spawn(worker_id)
+        print(f"✓ Master {os.getpid()} serving with {self.n_workers} workers")
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            worker_id = self.workers.pop(pid, None)
+            if worker_id is None:
+                continue
+            if not self._stopping:
+                print(f"⚠ Worker {worker_id} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+                self.spawn(worker_id)
+        self.sock.close()
+        return 0
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-fork production server")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS)
+    args = parser.parse_args(argv)
+    settings.SERVER_WORKERS = args.workers  # the workers' share of the CPUs for prediction threads
+
+    gc.disable()  # until the shared state is frozen
+    sock = bind_socket(args.host, args.port)
+    started = time.perf_counter()
+    app, model_service = load_shared_state()
+    print(
+        f"✓ Model {model_service.model_version} loaded once in {(time.perf_counter() - started) * 1000:.0f} ms, "
+        f"listening on {args.host}:{args.port}"
+    )
+    return Master(app, sock, args.workers).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
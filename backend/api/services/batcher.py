@@ -0,0 +1,173 @@
+"""
+Micro-Batcher - Coalesces concurrent single-patient inference requests
+Requests arriving within a short window (or until a row limit is reached)
+are stacked into one matrix and scored with a single vectorized prediction.
+"""
+import asyncio
+import contextvars
+import time
+from collections import deque
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from api.config import settings
+from api.services.executors import get_inference_executor
+from api.services.metrics import record, span
+
+
+class MicroBatcher:
+    """
+    Asyncio micro-batcher in front of a vectorized prediction function.
+
+    ``predict_fn`` takes an (n_rows, n_features) matrix and returns one
+    probability per row. Callers ``await submit(row)`` and get their own
+    probability back once the batch containing their row has been scored.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        max_rows: int = 256,
+        window_ms: float = 2.0,
+        sample_size: int = 1024,
+    ):
+        self.predict_fn = predict_fn
+        self.max_rows = max(1, int(max_rows))
+        self.window = max(0.0, float(window_ms)) / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self.requests_total = 0
+        self.batches_total = 0
+        self.errors_total = 0
+        self.max_batch_size = 0
+        self.max_queue_depth = 0
+        self._batch_sizes: deque = deque(maxlen=sample_size)
+        self._wait_times: deque = deque(maxlen=sample_size)
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            # Fresh context: the task outlives the request that happened to start it
+            self._task = loop.create_task(self._run(), context=contextvars.Context())
+
+    async def submit(self, row: np.ndarray) -> float:
+        """Queue one feature row and wait for its probability"""
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((row, future, time.perf_counter()))
+        self.requests_total += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future, float]]:
+        """Wait for the first request, then gather more until the window closes or the batch is full"""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.window
+        while len(batch) < self.max_rows:
+            # Take whatever is already queued without yielding to the loop
+            while len(batch) < self.max_rows and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if len(batch) >= self.max_rows:
+                break
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            dispatched = time.perf_counter()
+
+            # Callers that gave up (e.g. disconnected) don't need scoring
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            self.batches_total += 1
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            self._batch_sizes.append(len(batch))
+            self._wait_times.extend(dispatched - enqueued for _, _, enqueued in batch)
+            for _, _, enqueued in batch:
+                record("batch_queue", dispatched - enqueued)
+
+            try:
+                X = np.vstack([row for row, _, _ in batch])
+                with span("batch_predict", rows=len(batch)):
+                    probabilities = await self._loop.run_in_executor(get_inference_executor(), self.predict_fn, X)
+            except Exception as e:
+                self.errors_total += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future, _), probability in zip(batch, probabilities.tolist()):
+                if not future.done():
+                    future.set_result(probability)
+
+    async def close(self):
+        """Stop the batching task; pending callers get CancelledError"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, batch-size and wait-time metrics for tuning the window"""
+        batch_sizes = np.asarray(self._batch_sizes, dtype=np.float64)
+        wait_ms = np.asarray(self._wait_times, dtype=np.float64) * 1000.0
+
+        def percentiles(values: np.ndarray) -> Dict[str, float]:
+            if len(values) == 0:
+                return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            return {
+                "mean": round(float(values.mean()), 4),
+                "p50": round(float(p50), 4),
+                "p95": round(float(p95), 4),
+                "p99": round(float(p99), 4),
+                "max": round(float(values.max()), 4),
+            }
+
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_rows": self.max_rows,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "requests_total": self.requests_total,
+            "batches_total": self.batches_total,
+            "errors_total": self.errors_total,
+            "rows_per_batch": round(self.requests_total / self.batches_total, 4) if self.batches_total else 0.0,
+            "batch_size": {**percentiles(batch_sizes), "max_ever": self.max_batch_size},
+            "wait_time_ms": percentiles(wait_ms),
+        }
+
+
+# Singleton
+_micro_batcher: Optional[MicroBatcher] = None
+
+def get_micro_batcher() -> MicroBatcher:
+    global _micro_batcher
+    if _micro_batcher is None:
+        from api.services.model_service import get_model_service
+        _micro_batcher = MicroBatcher(
+            predict_fn=get_model_service().predict_probabilities,
+            max_rows=settings.INFER_BATCH_MAX_ROWS,
+            window_ms=settings.INFER_BATCH_WINDOW_MS,
+        )
+    return _micro_batcher
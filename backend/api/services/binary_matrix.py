@@ -0,0 +1,152 @@
+"""
+Binary Matrix - Wire formats for /model/predict-binary
+Patient x feature matrices travel as raw little-endian floats (no text
+parsing; the request body is viewed in place with np.frombuffer) or, when
+pyarrow is installed, as an Arrow IPC stream. Shared by the route and the
+client helper (api/client.py), so it only depends on NumPy.
+
+Matrix format (all integers little-endian):
+
+    offset 0   4 bytes   magic b"PPMX"
+           4   uint16    format version (1)
+           6   uint16    value type: 0 = float32, 1 = float64
+           8   uint32    rows
+          12   uint32    columns
+          16   uint32    byte length of the column names
+          20   ...       column names, UTF-8, separated by "\\n"
+                         zero padding up to a multiple of 8 bytes
+                         rows * columns values, row-major (NaN = missing)
+
+Requests are normally float32; responses carry P(PD) as float64.
+"""
+import struct
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    import pyarrow
+except ImportError:  # optional: Arrow IPC bodies are rejected without it
+    pyarrow = None
+
+
+MATRIX_CONTENT_TYPE = "application/x-proteomics-matrix"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+MAGIC = b"PPMX"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHIII")
+_DTYPES = [np.dtype("<f4"), np.dtype("<f8")]  # indexed by the header's value type
+
+# Response columns (both formats)
+RESULT_COLUMNS = ["probability", "prediction"]
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _padded(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def encode_matrix(X: np.ndarray, columns: Sequence[str], dtype=np.float32) -> bytes:
+    """Serialize a (rows, columns) matrix with its column names, as float32 (default) or float64"""
+    value_type = _DTYPES.index(np.dtype(dtype).newbyteorder("<"))
+    X = np.ascontiguousarray(X, dtype=_DTYPES[value_type])
+    if X.ndim != 2 or X.shape[1] != len(columns):
+        raise ValueError(f"Matrix shape {X.shape} doesn't match {len(columns)} column names")
+    names = "\n".join(columns).encode("utf-8")
+    header = _HEADER.pack(MAGIC, VERSION, value_type, X.shape[0], X.shape[1], len(names)) + names
+    header += b"\0" * (_padded(len(header)) - len(header))
+    return b"".join((header, memoryview(X).cast("B") if X.size else b""))
+
+
+def decode_matrix(body: Buffer) -> Tuple[np.ndarray, List[str]]:
+    """
+    (rows, columns) view of the body, and the column names
+
+    The matrix is not copied: it is a read-only view into ``body``.
+    Raises ValueError for anything that isn't a well-formed matrix body.
+    """
+    if len(body) < _HEADER.size:
+        raise ValueError("Body is too short for a matrix header")
+    magic, version, value_type, n_rows, n_cols, names_len = _HEADER.unpack_from(body)
+    if magic != MAGIC:
+        raise ValueError("Not a proteomics matrix body (bad magic)")
+    if version != VERSION:
+        raise ValueError(f"Unsupported matrix format version {version}")
+    if value_type >= len(_DTYPES):
+        raise ValueError(f"Unknown matrix value type {value_type}")
+    dtype = _DTYPES[value_type]
+    data_offset = _padded(_HEADER.size + names_len)
+    expected = data_offset + n_rows * n_cols * dtype.itemsize
+    if len(body) != expected:
+        raise ValueError(f"Body is {len(body)} bytes, expected {expected} for {n_rows} x {n_cols} {dtype.name}")
+    names = bytes(body[_HEADER.size:_HEADER.size + names_len]).decode("utf-8")
+    columns = names.split("\n") if names_len else []
+    if len(columns) != n_cols:
+        raise ValueError(f"{len(columns)} column names for {n_cols} columns")
+    X = np.frombuffer(body, dtype=dtype, count=n_rows * n_cols, offset=data_offset)
+    return X.reshape(n_rows, n_cols), columns
+
+
+def select_columns(X: np.ndarray, columns: List[str], feature_names: List[str]) -> np.ndarray:
+    """The feature_names columns of X in that order (no copy when X already is exactly that)"""
+    if columns == feature_names:
+        return X
+    index = {name: i for i, name in enumerate(columns)}
+    return X[:, [index[name] for name in feature_names]]
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise RuntimeError("Arrow IPC support requires pyarrow")
+
+
+def arrow_columns(body: Buffer) -> Tuple["pyarrow.Table", List[str]]:
+    """Arrow IPC stream -> table (buffers reference ``body``) and its column names"""
+    _require_pyarrow()
+    try:
+        table = pyarrow.ipc.open_stream(pyarrow.py_buffer(body)).read_all()
+    except pyarrow.ArrowInvalid as e:
+        raise ValueError(f"Invalid Arrow IPC stream: {e}")
+    return table, table.column_names
+
+
+def arrow_feature_matrix(table: "pyarrow.Table", feature_names: List[str]) -> np.ndarray:
+    """(rows, features) float64 matrix from the table's feature columns; nulls become NaN"""
+    X = np.empty((table.num_rows, len(feature_names)), dtype=np.float64)
+    for j, name in enumerate(feature_names):
+        column = table.column(name)
+        if not (pyarrow.types.is_floating(column.type) or pyarrow.types.is_integer(column.type)):
+            raise ValueError(f"Column {name} must be numeric, got {column.type}")
+        X[:, j] = column.to_numpy()
+    return X
+
+
+def encode_arrow(columns: dict) -> bytes:
+    """Arrow IPC stream with one record batch of the given NumPy columns"""
+    _require_pyarrow()
+    batch = pyarrow.record_batch([pyarrow.array(values) for values in columns.values()], names=list(columns))
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_results(probabilities: np.ndarray, content_type: str) -> bytes:
+    """P(PD) and 0/1 predictions in the requested format"""
+    predictions = (probabilities >= 0.5).astype(np.int8)
+    if content_type == ARROW_CONTENT_TYPE:
+        return encode_arrow({"probability": probabilities.astype(np.float64), "prediction": predictions})
+    return encode_matrix(np.column_stack([probabilities, predictions]), RESULT_COLUMNS, dtype=np.float64)
+
+
+def decode_results(body: Buffer, content_type: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(probabilities, predictions) from a /model/predict-binary response"""
+    if content_type.split(";")[0].strip() == ARROW_CONTENT_TYPE:
+        table, _ = arrow_columns(body)
+        return table.column("probability").to_numpy(), table.column("prediction").to_numpy()
+    X, columns = decode_matrix(body)
+    if columns != RESULT_COLUMNS:
+        raise ValueError(f"Unexpected result columns {columns}")
+    return X[:, 0], X[:, 1].astype(np.int8)
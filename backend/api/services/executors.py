@@ -0,0 +1,234 @@
+"""
+Executors - Runs CPU-bound parsing and inference off the event loop
+A thread pool handles inference (LightGBM / NumPy release the GIL) and a
+process pool handles pandas parsing. Work is abandoned on per-request
+timeouts and when the client disconnects. A process pool whose process
+died (e.g. killed for running out of memory) is replaced on next use.
+Password hashing gets a small pool of its own, so a login burst can't
+starve inference. Batch jobs (services/jobs.py) and parallel scoring of
+huge batches (services/parallel_scoring.py) run in separate process pools.
+"""
+import asyncio
+import contextvars
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Awaitable, Callable, Optional
+
+from starlette.requests import Request
+
+from api.config import settings
+from api.services.metrics import record, span
+
+
+class ExecutorTimeout(Exception):
+    """Work did not finish within the request timeout"""
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the work finished"""
+
+
+class WorkerCrashed(Exception):
+    """A pool process died while doing the work (the pool is rebuilt for the next call)"""
+
+
+_inference_executor: Optional[ThreadPoolExecutor] = None
+_parse_executor: Optional[Executor] = None
+_password_executor: Optional[ThreadPoolExecutor] = None
+_password_slots: Optional[asyncio.Semaphore] = None
+_job_executor: Optional[ProcessPoolExecutor] = None
+_scoring_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    global _inference_executor
+    if _inference_executor is None:
+        _inference_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.INFERENCE_THREADS),
+            thread_name_prefix="inference",
+        )
+    return _inference_executor
+
+
+def get_parse_executor() -> Executor:
+    """Process pool for parsing (spawned, so workers don't inherit the server's threads)"""
+    global _parse_executor
+    if _parse_executor is None:
+        if settings.PARSE_PROCESSES > 0:
+            _parse_executor = ProcessPoolExecutor(
+                max_workers=settings.PARSE_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            _parse_executor = get_inference_executor()
+    return _parse_executor
+
+
+def get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.PASSWORD_HASH_THREADS),
+            thread_name_prefix="password",
+        )
+    return _password_executor
+
+
+def get_job_executor() -> ProcessPoolExecutor:
+    """Process pool for batch jobs, one process per concurrently running job (spawned, like the parse pool)"""
+    global _job_executor
+    if _job_executor is None:
+        _job_executor = ProcessPoolExecutor(
+            max_workers=max(1, settings.JOB_MAX_CONCURRENT),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _job_executor
+
+
+def get_scoring_executor() -> ProcessPoolExecutor:
+    """Process pool for parallel batch scoring (spawned; each process loads its own model)"""
+    from api.services.parallel_scoring import init_worker, scoring_processes
+
+    global _scoring_executor
+    if _scoring_executor is None:
+        _scoring_executor = ProcessPoolExecutor(
+            max_workers=scoring_processes(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+    return _scoring_executor
+
+
+def discard_broken_pool(executor: Executor):
+    """Forget a process pool that raised BrokenProcessPool, so its getter builds a new one"""
+    global _parse_executor, _job_executor, _scoring_executor
+    if _parse_executor is executor:
+        _parse_executor = None
+    if _job_executor is executor:
+        _job_executor = None
+    if _scoring_executor is executor:
+        _scoring_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _wait_for_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(settings.DISCONNECT_POLL_SECONDS)
+
+
+async def run_guarded(
+    work: Awaitable[Any],
+    request: Optional[Request] = None,
+    timeout: Optional[float] = None,
+) -> Any:
+    """
+    Await ``work``, giving up when the timeout expires or the client disconnects.
+
+    On give-up the work is cancelled: queued executor jobs never start, while
+    jobs already running finish in the background and their result is dropped.
+    """
+    timeout = settings.REQUEST_TIMEOUT_SECONDS if timeout is None else timeout
+    work = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request)) if request is not None else None
+
+    try:
+        waiting = {work} if watcher is None else {work, watcher}
+        done, _ = await asyncio.wait(
+            waiting,
+            timeout=timeout if timeout and timeout > 0 else None,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        if work in done:
+            return work.result()
+        work.cancel()
+        if watcher is not None and watcher in done:
+            raise ClientDisconnected("Client disconnected")
+        raise ExecutorTimeout(f"Request timed out after {timeout:g}s")
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+
+async def run_inference(fn: Callable, *args, request: Optional[Request] = None, timeout: Optional[float] = None) -> Any:
+    """Run ``fn(*args)`` in the inference thread pool (in a copy of the caller's context, so spans reach the request)"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await run_guarded(
+        loop.run_in_executor(get_inference_executor(), context.run, partial(fn, *args)),
+        request=request,
+        timeout=timeout,
+    )
+
+
+async def run_parse(fn: Callable, *args, request: Optional[Request] = None, timeout: Optional[float] = None) -> Any:
+    """
+    Run ``fn(*args)`` in the parse process pool (fn and args must be picklable)
+
+    Raises WorkerCrashed if a parse process died; the broken pool is dropped,
+    so the next call starts a fresh one. The work is not retried: an upload
+    that got its process killed would most likely do it again.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_parse_executor()
+    try:
+        return await run_guarded(
+            loop.run_in_executor(executor, partial(fn, *args)),
+            request=request,
+            timeout=timeout,
+        )
+    except BrokenProcessPool:
+        discard_broken_pool(executor)
+        raise WorkerCrashed("The parse process died (the upload may be too large for the available memory)")
+
+
+async def run_password_hash(fn: Callable, *args) -> Any:
+    """
+    Run a password hash / verify ``fn(*args)`` in the password pool.
+
+    At most PASSWORD_HASH_MAX_PENDING jobs are queued or running; later
+    callers wait on the event loop. Time from the call until the job starts
+    is recorded as the ``password_queue`` stage, the job as ``password_hash``.
+    """
+    global _password_slots
+    if _password_slots is None:
+        _password_slots = asyncio.Semaphore(max(1, settings.PASSWORD_HASH_MAX_PENDING))
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    submitted = time.perf_counter()
+
+    def timed():
+        record("password_queue", time.perf_counter() - submitted)
+        with span("password_hash"):
+            return fn(*args)
+
+    async with _password_slots:
+        return await loop.run_in_executor(get_password_executor(), context.run, timed)
+
+
+def shutdown_executors():
+    """
+    Shut down the pools, dropping queued work
+
+    A batch job that is already running keeps going in its process; a job cut
+    short continues from its last saved chunk after a restart.
+    """
+    global _inference_executor, _parse_executor, _password_executor, _password_slots, _job_executor, _scoring_executor
+    if _parse_executor is not None and _parse_executor is not _inference_executor:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+    if _inference_executor is not None:
+        _inference_executor.shutdown(wait=False, cancel_futures=True)
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+    if _job_executor is not None:
+        _job_executor.shutdown(wait=False, cancel_futures=True)
+    if _scoring_executor is not None:
+        _scoring_executor.shutdown(wait=False, cancel_futures=True)
+    _inference_executor = None
+    _parse_executor = None
+    _password_executor = None
+    _password_slots = None
+    _job_executor = None
+    _scoring_executor = None
@@ -0,0 +1,69 @@
+"""
+Streaming Ingest - Bounded-memory parsing of large CSV uploads
+Reads the header from the first chunk of the upload, validates it, then
+parses the body incrementally into fixed-size feature blocks so peak
+memory depends on the block size, not on the file size.
+"""
+import csv
+import io
+from typing import BinaryIO, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_BLOCK_ROWS = 8192
+DEFAULT_CHUNK_BYTES = 1 << 20  # 1 MiB
+
+
+def read_header(fileobj: BinaryIO, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[str]:
+    """
+    Column names from the first line of a CSV upload.
+
+    Only the first chunk(s) up to the first newline are read; the file is
+    rewound afterwards so the body can be parsed from the start.
+    """
+    fileobj.seek(0)
+    head = b""
+    while b"\n" not in head:
+        chunk = fileobj.read(chunk_bytes)
+        if not chunk:
+            break
+        head += chunk
+    fileobj.seek(0)
+
+    line = head.split(b"\n", 1)[0].rstrip(b"\r")
+    if not line.strip():
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    return next(csv.reader([line.decode("utf-8-sig")]))
+
+
+def iter_feature_blocks(
+    fileobj: BinaryIO,
+    feature_names: List[str],
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+    dtype=np.float64,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> Iterator[np.ndarray]:
+    """
+    Yield (<= block_rows, n_features) blocks in feature_names order.
+
+    Only the feature columns are materialized, as ``dtype``. The caller is
+    expected to have validated the header (see read_header) first.
+    """
+    fileobj.seek(0)
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        reader = pd.read_csv(
+            text,
+            usecols=feature_names,
+            dtype={name: dtype for name in feature_names},
+            chunksize=block_rows,
+        )
+        with reader:
+            for chunk in reader:
+                yield chunk[feature_names].to_numpy(dtype=dtype)
+    finally:
+        # Don't let the wrapper close the caller's file
+        text.detach()
+
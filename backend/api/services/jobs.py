@@ -0,0 +1,384 @@
+"""
+Batch Jobs - Asynchronous scoring of large CSV uploads
+POST /model/jobs stores the upload under JOBS_DIR and returns right away; a
+local process pool scores it JOB_CHUNK_ROWS rows at a time and writes each
+chunk's patients to disk, so GET /model/jobs/{id} can report progress and
+/model/jobs/{id}/results can page through whatever is already scored.
+
+The filesystem is the only shared state (no broker): each job is a
+directory holding the upload, ``job.json`` (status, progress and the
+running summary) and one ``chunk-NNNNNN.ndjson`` per scored chunk. Chunks
+are written before ``job.json`` records them, so a job interrupted by a
+restart picks up at its first unrecorded chunk. The process scoring a job
+holds an flock on its ``lock`` file, and one of JOB_MAX_CONCURRENT slot
+locks, so several workers sharing JOBS_DIR never run a job twice or more
+than JOB_MAX_CONCURRENT jobs in total.
+
+Failed jobs lose their upload right away (they are never rescored), and
+finished jobs are deleted JOB_RETENTION_HOURS after they finish. If a job
+process dies (e.g. killed for running out of memory), the pool is replaced,
+the job it was running is marked failed and the jobs queued behind it are
+resubmitted.
+"""
+import asyncio
+import fcntl
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from api.config import settings
+from api.services.executors import discard_broken_pool, get_job_executor
+from api.services.ingest import iter_feature_blocks, read_header
+from api.services.result_builder import SummaryAccumulator
+from api.services.serialization import dumps, patient_records
+
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+UNFINISHED = (QUEUED, RUNNING)
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+SLOT_POLL_SECONDS = 0.5
+# Expired jobs are looked for at most this often
+PURGE_INTERVAL_SECONDS = 300.0
+# After a job process dies its lock can still be held for a moment: retry the claim
+RECOVER_RETRY_SECONDS = 0.5
+RECOVER_ATTEMPTS = 10
+
+
+class JobStore:
+    """Job directories under ``root``"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    def upload_path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir(job_id), "upload.csv")
+
+    def chunk_path(self, job_id: str, index: int) -> str:
+        return os.path.join(self.job_dir(job_id), f"chunk-{index:06d}.ndjson")
+
+    def create(self, upload: BinaryIO, patient_fields: List[str], chunk_rows: int) -> Dict[str, Any]:
+        """Copy the upload into a new job directory and record the job as queued"""
+        job_id = uuid.uuid4().hex
+        job_dir = self.job_dir(job_id)
+        os.makedirs(job_dir)
+        upload.seek(0)
+        with open(self.upload_path(job_id), "wb") as f:
+            shutil.copyfileobj(upload, f, 1 << 20)
+        job = {
+            "job_id": job_id,
+            "status": QUEUED,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "chunk_rows": max(1, int(chunk_rows)),
+            "chunks_done": 0,
+            "rows_done": 0,
+            "total_rows": None,
+            "patient_fields": list(patient_fields),
+            "model_version": None,
+            "accumulator": None,
+            "summary": None,
+            "error": None,
+        }
+        self.save(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job's record, or None for an unknown (or malformed) id"""
+        if not _JOB_ID.match(job_id):
+            return None
+        try:
+            with open(os.path.join(self.job_dir(job_id), "job.json"), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, job: Dict[str, Any]):
+        _write_atomic(os.path.join(self.job_dir(job["job_id"]), "job.json"), json.dumps(job).encode())
+
+    def remove_upload(self, job_id: str):
+        try:
+            os.remove(self.upload_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def purge(self, max_age_seconds: float) -> int:
+        """Delete jobs that finished (or failed) more than ``max_age_seconds`` ago; returns how many"""
+        cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+        removed = 0
+        for name in os.listdir(self.root):
+            if not _JOB_ID.match(name):
+                continue
+            job = self.get(name)
+            if job is None:
+                # Left half-created (no job.json): judged by the directory's age
+                try:
+                    expired = os.path.getmtime(self.job_dir(name)) < time.time() - max_age_seconds
+                except FileNotFoundError:
+                    continue
+            else:
+                expired = job["status"] not in UNFINISHED and datetime.fromisoformat(job["finished_at"]) < cutoff
+            if expired:
+                shutil.rmtree(self.job_dir(name), ignore_errors=True)
+                removed += 1
+        return removed
+
+    def unfinished(self) -> List[str]:
+        """Ids of queued or running jobs, oldest first"""
+        jobs = [self.get(name) for name in os.listdir(self.root)]
+        jobs = [job for job in jobs if job is not None and job["status"] in UNFINISHED]
+        return [job["job_id"] for job in sorted(jobs, key=lambda job: job["created_at"])]
+
+    def results(self, job: Dict[str, Any], offset: int, limit: int) -> List[bytes]:
+        """Serialized patients [offset, offset + limit) among those already scored"""
+        chunk_rows = job["chunk_rows"]
+        stop = min(offset + limit, job["rows_done"])
+        rows: List[bytes] = []
+        position = offset
+        while position < stop:
+            index = position // chunk_rows
+            with open(self.chunk_path(job["job_id"], index), "rb") as f:
+                lines = f.read().splitlines()
+            first = position - index * chunk_rows
+            rows.extend(lines[first:first + stop - position])
+            position = (index + 1) * chunk_rows
+        return rows
+
+    @contextmanager
+    def claim(self, job_id: str) -> Iterator[bool]:
+        """Exclusive right to run the job (False while another process holds it)"""
+        fd = os.open(os.path.join(self.job_dir(job_id), "lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def slot(self, n_slots: int) -> Iterator[int]:
+        """Wait for one of ``n_slots`` run slots shared by every process using this root"""
+        slot_dir = os.path.join(self.root, ".slots")
+        os.makedirs(slot_dir, exist_ok=True)
+        fds = [os.open(os.path.join(slot_dir, f"slot-{i}"), os.O_RDWR | os.O_CREAT, 0o600) for i in range(max(1, n_slots))]
+        try:
+            while True:
+                for i, fd in enumerate(fds):
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                    yield i
+                    return
+                time.sleep(SLOT_POLL_SECONDS)
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write to a temp file and rename it over ``path``, so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def count_rows(path: str) -> int:
+    """Data rows in a CSV file (lines after the header; quoted newlines count extra)"""
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(0, lines - 1)
+
+
+def run_job(root: str, job_id: str) -> str:
+    """
+    Score a job to completion (job pool process entry point)
+
+    Returns the job's final status, or "busy" when another process is
+    already running it.
+    """
+    store = JobStore(root)
+    with store.claim(job_id) as claimed:
+        if not claimed:
+            return "busy"
+        job = store.get(job_id)
+        if job is None or job["status"] not in UNFINISHED:
+            return job["status"] if job else "missing"
+        with store.slot(settings.JOB_MAX_CONCURRENT):
+            try:
+                _score_job(store, job)
+            except Exception as e:
+                fail_job(store, job, str(e))
+        return job["status"]
+
+
+def fail_job(store: JobStore, job: Dict[str, Any], error: str):
+    """Record the job as failed and drop its upload (failed jobs are never rescored)"""
+    job.update(status=FAILED, error=error, finished_at=datetime.utcnow().isoformat())
+    store.save(job)
+    store.remove_upload(job["job_id"])
+    print(f"⚠ Job {job['job_id']} failed: {error}")
+
+
+def _score_job(store: JobStore, job: Dict[str, Any]):
+    from api.services.model_service import get_model_service
+
+    job_id = job["job_id"]
+    model_service = get_model_service()
+    if job["model_version"] != model_service.model_version and job["chunks_done"]:
+        # Scored by a different model before the restart: start over
+        print(f"⚠ Job {job_id}: model changed since it started, rescoring from the first chunk")
+        job.update(chunks_done=0, rows_done=0, accumulator=None)
+    upload_path = store.upload_path(job_id)
+    if job["total_rows"] is None:
+        job["total_rows"] = count_rows(upload_path)
+    job.update(status=RUNNING, model_version=model_service.model_version, started_at=job["started_at"] or datetime.utcnow().isoformat())
+    store.save(job)
+    if job["chunks_done"]:
+        print(f"✓ Job {job_id}: resuming after {job['rows_done']} rows")
+
+    chunk_rows = job["chunk_rows"]
+    accumulator = SummaryAccumulator.from_state(job["accumulator"])
+    with open(upload_path, "rb") as f:
+        model_service.validate_columns(read_header(f))
+        blocks = iter_feature_blocks(
+            f, model_service.feature_names, block_rows=chunk_rows, dtype=np.dtype(settings.CSV_STREAM_DTYPE)
+        )
+        for index, X in enumerate(blocks):
+            if index < job["chunks_done"]:
+                continue  # scored before the restart
+            probabilities = model_service.score_matrix(X)
+            records = patient_records(probabilities, job["patient_fields"], index * chunk_rows)
+            _write_atomic(store.chunk_path(job_id, index), b"".join(dumps(record) + b"\n" for record in records))
+            accumulator.add(probabilities)
+            job.update(chunks_done=index + 1, rows_done=accumulator.total, accumulator=accumulator.state())
+            store.save(job)
+
+    if accumulator.total == 0:
+        raise ValueError("The uploaded file is empty.")
+    job.update(
+        status=SUCCEEDED,
+        total_rows=accumulator.total,
+        summary=accumulator.summary(),
+        finished_at=datetime.utcnow().isoformat(),
+    )
+    store.save(job)
+    # Results are on disk; the upload isn't needed any more
+    store.remove_upload(job_id)
+    print(f"✓ Job {job_id}: scored {accumulator.total} patients")
+
+
+class JobRunner:
+    """Hands jobs to the job process pool and tracks this worker's unfinished ones"""
+
+    def __init__(self, store: JobStore):
+        self.store = store
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._last_purge = 0.0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, job_id: str):
+        if job_id in self._pending:
+            return
+        loop = asyncio.get_running_loop()
+        executor = get_job_executor()
+        try:
+            future = loop.run_in_executor(executor, run_job, self.store.root, job_id)
+        except BrokenProcessPool:
+            # A job process died since the last submit: start over with a fresh pool
+            discard_broken_pool(executor)
+            executor = get_job_executor()
+            future = loop.run_in_executor(executor, run_job, self.store.root, job_id)
+        self._pending[job_id] = future
+        future.add_done_callback(lambda f: self._finished(job_id, f, executor))
+
+    def _finished(self, job_id: str, future: asyncio.Future, executor):
+        self._pending.pop(job_id, None)
+        if future.cancelled() or future.exception() is None:
+            return
+        if isinstance(future.exception(), BrokenProcessPool):
+            discard_broken_pool(executor)
+            self._recover(job_id)
+        else:
+            print(f"⚠ Job {job_id} worker error: {future.exception()}")
+
+    def _recover(self, job_id: str, attempt: int = 0):
+        """
+        The job's pool broke because a pool process died: fail the job that
+        process was running, resubmit the ones only queued behind it
+        """
+        with self.store.claim(job_id) as claimed:
+            if not claimed:
+                # The dead process' lock not released yet, or another worker runs the job
+                if attempt + 1 < RECOVER_ATTEMPTS:
+                    asyncio.get_running_loop().call_later(RECOVER_RETRY_SECONDS, self._recover, job_id, attempt + 1)
+                return
+            job = self.store.get(job_id)
+            if job is None or job["status"] not in UNFINISHED:
+                return
+            if job["status"] == RUNNING:
+                fail_job(self.store, job, "The job process died (the cohort may be too large for the available memory).")
+                return
+        self.submit(job_id)
+
+    def purge_expired(self) -> int:
+        """Delete jobs past JOB_RETENTION_HOURS (at most every PURGE_INTERVAL_SECONDS; 0 hours keeps them)"""
+        if settings.JOB_RETENTION_HOURS <= 0 or time.monotonic() - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return 0
+        self._last_purge = time.monotonic()
+        removed = self.store.purge(settings.JOB_RETENTION_HOURS * 3600)
+        if removed:
+            print(f"✓ Removed {removed} expired job(s)")
+        return removed
+
+    def resume(self) -> int:
+        """Resubmit queued / interrupted jobs (e.g. at startup); returns how many"""
+        self.purge_expired()
+        job_ids = self.store.unfinished()
+        for job_id in job_ids:
+            self.submit(job_id)
+        if job_ids:
+            print(f"✓ Resuming {len(job_ids)} unfinished job(s)")
+        return len(job_ids)
+
+
+# Singleton instance
+_job_runner: Optional[JobRunner] = None
+
+def get_job_runner() -> JobRunner:
+    global _job_runner
+    if _job_runner is None:
+        _job_runner = JobRunner(JobStore(settings.JOBS_DIR))
+    return _job_runner
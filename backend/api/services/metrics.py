@@ -0,0 +1,253 @@
+"""
+Metrics - Timing spans, latency histograms and row counters
+Hot-path stages are wrapped in ``span(stage, rows)``. Every span feeds a
+Prometheus-style histogram (rendered at /metrics) and, while a request is
+being served, that request's Server-Timing header (see
+ServerTimingMiddleware). Metrics are kept per process: with several
+workers, each scrape of /metrics reports the worker that answered it.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from api.config import settings
+
+
+# Seconds; covers a single-row /infer up to a 1M-row upload
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Starlette appends "; charset=utf-8" to text/* media types
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels (Prometheus semantics)"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series is not None else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for upper, n in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += n
+                    le = "+Inf" if upper == float("inf") else _format_value(upper)
+                    bucket_labels = _format_labels(self.label_names, labels, 'le="' + le + '"')
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                label_text = _format_labels(self.label_names, labels)
+                lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+                lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """All metrics of this process, rendered together in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, label_names)
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "pd_api_stage_duration_seconds", "Time spent in each prediction pipeline stage", ("stage",)
+)
+STAGE_ROWS = registry.counter(
+    "pd_api_stage_rows_total", "Patient rows processed by each prediction pipeline stage", ("stage",)
+)
+PREDICT_CALLS = registry.counter(
+    "pd_api_predict_calls_total", "LightGBM prediction calls by thread regime and thread count", ("regime", "threads")
+)
+PREDICT_ROWS = registry.counter(
+    "pd_api_predict_rows_total", "Rows scored by LightGBM by thread regime and thread count", ("regime", "threads")
+)
+HTTP_SECONDS = registry.histogram(
+    "pd_api_http_request_duration_seconds", "HTTP request latency until the response starts", ("method", "handler")
+)
+HTTP_REQUESTS = registry.counter(
+    "pd_api_http_requests_total", "HTTP requests by handler and status code", ("method", "handler", "status")
+)
+
+
+# Stage name -> [total seconds, calls] for the request being served (None outside requests)
+_request_timings: ContextVar[Optional[Dict[str, list]]] = ContextVar("request_timings", default=None)
+
+
+def record(stage: str, seconds: float, rows: Optional[int] = None):
+    """Add one finished stage to the histograms and the current request's timings"""
+    if not settings.METRICS_ENABLED:
+        return
+    STAGE_SECONDS.observe(seconds, stage)
+    if rows:
+        STAGE_ROWS.inc(rows, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        entry = timings.get(stage)
+        if entry is None:
+            timings[stage] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+
+class Span:
+    """Handle yielded by span(); set ``rows`` inside the block if it's only known there"""
+
+    __slots__ = ("stage", "rows")
+
+    def __init__(self, stage: str, rows: Optional[int]):
+        self.stage = stage
+        self.rows = rows
+
+
+@contextmanager
+def span(stage: str, rows: Optional[int] = None):
+    """Time the enclosed block as ``stage`` (``rows`` feeds the throughput counter)"""
+    handle = Span(stage, rows)
+    started = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        record(stage, time.perf_counter() - started, handle.rows)
+
+
+def server_timing_header(timings: Dict[str, list], total_seconds: float) -> str:
+    """Server-Timing value: one metric per stage (repeated stages summed), plus the total"""
+    parts = []
+    for stage, (seconds, calls) in timings.items():
+        part = f"{stage};dur={seconds * 1000:.3f}"
+        if calls > 1:
+            part += f';desc="{calls} calls"'
+        parts.append(part)
+    parts.append(f"total;dur={total_seconds * 1000:.3f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware: collects the request's spans, adds them as a Server-Timing
+    header and records request latency / status counts.
+
+    Streaming responses only report the stages finished before the headers went out.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, list] = {}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = [500, None]  # status code, seconds until the response started
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - started
+                status[0], status[1] = message["status"], elapsed
+                if settings.SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing_header(timings, elapsed).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # The router stores the matched endpoint in the scope; unmatched paths share one label
+            endpoint = scope.get("endpoint")
+            handler = getattr(endpoint, "__name__", "unmatched")
+            elapsed = status[1] if status[1] is not None else time.perf_counter() - started
+            HTTP_SECONDS.observe(elapsed, scope["method"], handler)
+            HTTP_REQUESTS.inc(1, scope["method"], handler, str(status[0]))
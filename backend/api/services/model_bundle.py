@@ -0,0 +1,274 @@
+"""
+Model Bundle - Single-file, memory-mappable model artifact
+An uncompressed zip with a manifest, the flattened trees, scaler mean/scale,
+feature order and protein names as .npy members (aligned so they are mapped
+in place, not read), plus the LightGBM model text. Loading takes
+milliseconds, needs neither sklearn nor lightgbm, and the mapped pages are
+shared by every worker process.
+
+Build it from the saved pickles:
+    python -m api.services.model_bundle [--model PKL] [--scaler PKL] [--mapping CSV] [--output PATH]
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import struct
+import time
+import zipfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from api.config import settings
+from api.services.tree_engine import TreeEnsemble, build_verified
+
+
+BUNDLE_FORMAT = "parkinsons-model-bundle"
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_MEMBER = "manifest.json"
+BOOSTER_MEMBER = "model.txt"
+
+DEFAULT_MAPPING_PATH = os.path.join(os.path.dirname(__file__), "../data/feature_protein_mapping.csv")
+
+# Array data starts on a 64-byte boundary inside the file
+ARRAY_ALIGNMENT = 64
+_PADDING_EXTRA_ID = 0xD935  # zip "extra field" id used purely for padding (as zipalign does)
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+TREE_ARRAYS = ("feature", "threshold", "left", "right", "value", "default_left", "missing_type", "roots", "nan_fill")
+
+
+def artifact_version(paths: List[str]) -> str:
+    """Content hash of the model artifacts, so caches keyed on it never outlive them"""
+    version = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            version.update(hashlib.sha256(f.read()).digest())
+    return version.hexdigest()[:16]
+
+
+def read_feature_mapping(path: str = DEFAULT_MAPPING_PATH) -> Tuple[List[str], List[str]]:
+    """(seq_* feature names in model order, protein names) from the mapping CSV"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    return [row["seq_column"] for row in rows], [row["protein_name"] for row in rows]
+
+
+def scaler_arrays(scaler, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """StandardScaler mean/scale as arrays (identity where centering/scaling is disabled)"""
+    mean = getattr(scaler, "mean_", None)
+    scale = getattr(scaler, "scale_", None)
+    if not getattr(scaler, "with_mean", True) or mean is None:
+        mean = np.zeros(n_features)
+    if not getattr(scaler, "with_std", True) or scale is None:
+        scale = np.ones(n_features)
+    return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+
+class ModelBundle:
+    """A loaded bundle: manifest plus read-only memory-mapped arrays"""
+
+    def __init__(self, path: str, manifest: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+
+    @property
+    def model_version(self) -> str:
+        return self.manifest["model_version"]
+
+    @property
+    def feature_names(self) -> List[str]:
+        return self.arrays["feature_names"].tolist()
+
+    @property
+    def protein_names(self) -> List[str]:
+        return self.arrays["protein_names"].tolist()
+
+    def tree_ensemble(self) -> TreeEnsemble:
+        """The flattened trees, backed by the mapped arrays (no copy)"""
+        trees = self.manifest["trees"]
+        return TreeEnsemble(
+            **{name: self.arrays[f"tree_{name}"] for name in TREE_ARRAYS},
+            max_depth=trees["max_depth"],
+            n_features=self.manifest["n_features"],
+            sigmoid=trees["sigmoid"],
+            average_output=trees["average_output"],
+        )
+
+    def booster_text(self) -> str:
+        """LightGBM model text, for lightgbm.Booster(model_str=...)"""
+        with zipfile.ZipFile(self.path) as zf:
+            return zf.read(BOOSTER_MEMBER).decode("utf-8")
+
+    @classmethod
+    def load(cls, path: str) -> "ModelBundle":
+        with zipfile.ZipFile(path) as zf:
+            manifest = json.loads(zf.read(MANIFEST_MEMBER))
+            members = {info.filename: info for info in zf.infolist()}
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"{path} is not a model bundle")
+        if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported bundle format version {manifest.get('format_version')} "
+                f"(expected {BUNDLE_FORMAT_VERSION}); rebuild it with python -m api.services.model_bundle"
+            )
+
+        with open(path, "rb") as f:
+            arrays = {
+                name: _map_member(f, path, members[entry["member"]])
+                for name, entry in manifest["arrays"].items()
+            }
+        return cls(path, manifest, arrays)
+
+
+def _map_member(f, path: str, info: zipfile.ZipInfo) -> np.ndarray:
+    """Memory-map one stored .npy member of the bundle (read-only)"""
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"Bundle member {info.filename} is compressed and cannot be mapped")
+    f.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+    if header[0] != _LOCAL_HEADER_SIGNATURE:
+        raise ValueError(f"Corrupt bundle: bad local header for {info.filename}")
+    name_length, extra_length = header[-2:]
+    f.seek(info.header_offset + _LOCAL_HEADER.size + name_length + extra_length)
+
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+    if dtype.hasobject:
+        raise ValueError(f"Bundle member {info.filename} holds Python objects")
+    if int(np.prod(shape)) == 0:
+        return np.empty(shape, dtype=dtype)
+    mapped = np.memmap(
+        path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+        order="F" if fortran_order else "C",
+    )
+    return mapped.view(np.ndarray)
+
+
+def write_bundle(path: str, manifest: Dict[str, Any], arrays: Dict[str, np.ndarray], booster_text: str):
+    """Write the bundle atomically (temp file + rename), array data aligned for mapping"""
+    manifest = dict(manifest, arrays={})
+    tmp_path = f"{path}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            buf = io.BytesIO()
+            np.lib.format.write_array(buf, array, allow_pickle=False)
+            data = buf.getvalue()
+
+            member = f"arrays/{name}.npy"
+            npy_header_length = len(data) - array.nbytes
+            data_start = zf.start_dir + _LOCAL_HEADER.size + len(member.encode()) + 4 + npy_header_length
+            padding = -data_start % ARRAY_ALIGNMENT
+
+            info = zipfile.ZipInfo(member, date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_STORED
+            info.extra = struct.pack("<HH", _PADDING_EXTRA_ID, padding) + b"\0" * padding
+            zf.writestr(info, data)
+            manifest["arrays"][name] = {"member": member, "dtype": array.dtype.str, "shape": list(array.shape)}
+
+        zf.writestr(zipfile.ZipInfo(BOOSTER_MEMBER, date_time=(1980, 1, 1, 0, 0, 0)), booster_text)
+        zf.writestr(
+            zipfile.ZipInfo(MANIFEST_MEMBER, date_time=(1980, 1, 1, 0, 0, 0)),
+            json.dumps(manifest, indent=2),
+        )
+    os.replace(tmp_path, path)
+
+
+def convert(
+    model_path: str,
+    scaler_path: str,
+    mapping_path: str = DEFAULT_MAPPING_PATH,
+    output_path: Optional[str] = None,
+    tolerance: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Build a bundle from the saved joblib model + scaler and the feature mapping.
+
+    The flattened trees are checked against predict_proba before anything is
+    written; the bundle keeps the model version of the pickles it came from.
+    """
+    import joblib
+    import lightgbm
+
+    output_path = output_path or settings.MODEL_BUNDLE_PATH
+    tolerance = settings.INFERENCE_ENGINE_TOLERANCE if tolerance is None else tolerance
+
+    model = joblib.load(model_path)
+    scaler = joblib.load(scaler_path)
+    booster = model.booster_
+    feature_names, protein_names = read_feature_mapping(mapping_path)
+    n_features = int(booster.num_feature())
+    if len(feature_names) != n_features:
+        raise ValueError(f"Mapping has {len(feature_names)} features, model expects {n_features}")
+
+    mean, scale = scaler_arrays(scaler, n_features)
+    tree_engine, on_raw, max_diff = build_verified(
+        booster, mean, scale,
+        transform=lambda X: (np.asarray(X, dtype=np.float64) - mean) / scale,
+        reference=lambda X_scaled: model.predict_proba(X_scaled)[:, 1],
+    )
+    if max_diff > tolerance:
+        raise ValueError(f"Flattened trees differ from predict_proba by {max_diff:.3g} (tolerance {tolerance:g})")
+
+    arrays = {f"tree_{name}": getattr(tree_engine, name) for name in TREE_ARRAYS}
+    arrays.update(
+        scaler_mean=mean,
+        scaler_scale=scale,
+        feature_importances=np.asarray(model.feature_importances_),
+        feature_names=np.asarray(feature_names, dtype=str),
+        protein_names=np.asarray(protein_names, dtype=str),
+    )
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "model_version": artifact_version([model_path, scaler_path]),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "source": {
+            "model": os.path.basename(model_path),
+            "scaler": os.path.basename(scaler_path),
+            "mapping": os.path.basename(mapping_path),
+            "lightgbm_version": lightgbm.__version__,
+        },
+        "n_features": n_features,
+        "trees": {
+            "n_trees": tree_engine.n_trees,
+            "n_nodes": tree_engine.n_nodes,
+            "max_depth": tree_engine.max_depth,
+            "sigmoid": tree_engine.sigmoid,
+            "average_output": tree_engine.average_output,
+            "raw_features": on_raw,  # scaler folded into the thresholds
+            "max_diff": max_diff,
+        },
+    }
+    write_bundle(output_path, manifest, arrays, booster.model_to_string())
+    return {**manifest, "path": output_path, "bytes": os.path.getsize(output_path)}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Convert the saved model + scaler pickles into a model bundle")
+    parser.add_argument("--model", default=settings.MODEL_PATH)
+    parser.add_argument("--scaler", default=settings.SCALER_PATH)
+    parser.add_argument("--mapping", default=DEFAULT_MAPPING_PATH)
+    parser.add_argument("--output", default=settings.MODEL_BUNDLE_PATH)
+    args = parser.parse_args(argv)
+
+    info = convert(args.model, args.scaler, args.mapping, args.output)
+    trees = info["trees"]
+    print(
+        f"✓ Wrote {info['path']} ({info['bytes'] / 1e6:.1f} MB): model version {info['model_version']}, "
+        f"{trees['n_trees']} trees / {trees['n_nodes']} nodes, "
+        f"{'raw' if trees['raw_features'] else 'scaled'} features (max diff {trees['max_diff']:.3g})"
+    )
+
+
+if __name__ == "__main__":
+    main()
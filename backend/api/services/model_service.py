@@ -3,28 +3,97 @@ Model Service - Simple prediction using saved LightGBM model + saved StandardSca
 Based on working Flask approach
 """
 import os
-import joblib
+import threading
+import time
 import numpy as np
 import pandas as pd
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
 from api.config import settings
+from api.services.model_bundle import (
+    DEFAULT_MAPPING_PATH, ModelBundle, artifact_version, read_feature_mapping, scaler_arrays,
+)
+from api.services.result_builder import PatientResultBuilder, summarize, top_k_indices
+from api.services.tree_engine import TreeEnsemble, build_verified
+from api.services.prediction_cache import RowPredictionCache
+from api.services.metrics import span
+from api.services.parallel_scoring import score_parallel, score_parallel_probabilities, use_parallel
+from api.services.thread_policy import ThreadPolicy, thread_budget
+from api.services.payload_cache import CachedPayload, content_version
 
 
 class ModelService:
     """Service for making patient-level predictions using saved model + scaler"""
     
     def __init__(self):
-        self.model = None
-        self.scaler = None
+        self.bundle: Optional[ModelBundle] = None  # memory-mapped model bundle, if one is deployed
+        self.model = None  # LGBMClassifier (pickle only)
+        self.scaler = None  # StandardScaler (pickle only)
+        self.booster = None  # lightgbm.Booster; loaded from the bundle on first use
+        self.scaler_mean: Optional[np.ndarray] = None
+        self.scaler_scale: Optional[np.ndarray] = None
+        self.feature_importances: Optional[np.ndarray] = None
+        self.n_features_in = 0
+        self.model_version = ""  # content hash of the model + scaler files
+        self.tree_engine: Optional[TreeEnsemble] = None
+        self._tree_engine_on_raw = False  # scaler folded into the tree thresholds
+        # Pickles + INFERENCE_ENGINE=numpy: flattened and checked on first use (see _get_tree_engine)
+        self._tree_engine_pending = False
+        self._tree_engine_lock = threading.Lock()
         self.protein_mapping = {}
         self.feature_names = []  # Store the actual feature names (seq_*)
-        self._load_model_and_scaler()
-        self._load_protein_mapping()
-        self._initialize_feature_names()
+        self.feature_index: Dict[str, int] = {}  # feature name -> column in feature_names order
+        self._result_builders: Dict[tuple, PatientResultBuilder] = {}
+        # Static model metadata for compact responses (GET /model/metadata)
+        self.metadata: Optional[CachedPayload] = None
+        self.metadata_version = ""
+        if not self._load_bundle():
+            self._load_model_and_scaler()
+            self._load_feature_mapping()
+        self.thread_policy = ThreadPolicy.default(thread_budget())
+        self.row_cache = RowPredictionCache(
+            self.model_version, int(settings.ROW_CACHE_MAX_MB * 1024 * 1024), settings.ROW_CACHE_MAX_ROWS
+        )
+        self._load_tree_engine()
+        self._build_metadata()
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self.scaler_mean is not None and (self.booster is not None or self.tree_engine is not None)
+    
+    def _load_bundle(self) -> bool:
+        """Map the model bundle (see model_bundle.py); False means load the pickles instead"""
+        path = settings.MODEL_BUNDLE_PATH
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            bundle = ModelBundle.load(path)
+            
+            # A bundle converted from other pickles than the configured ones is stale
+            sources = [settings.MODEL_PATH, settings.SCALER_PATH]
+            if all(os.path.exists(p) for p in sources) and artifact_version(sources) != bundle.model_version:
+                print(f"⚠ Model bundle {path} is out of date with the model/scaler pickles, loading the pickles")
+                return False
+            
+            self.bundle = bundle
+            self.model_version = bundle.model_version
+            self.scaler_mean = bundle.arrays["scaler_mean"]
+            self.scaler_scale = bundle.arrays["scaler_scale"]
+            self.feature_importances = bundle.arrays["feature_importances"]
+            self.n_features_in = int(bundle.manifest["n_features"])
+            self.feature_names = bundle.feature_names
+            self.feature_index = {name: j for j, name in enumerate(self.feature_names)}
+            self.protein_mapping = dict(zip(self.feature_names, bundle.protein_names))
+            print(f"✓ Model bundle mapped from: {path} (version {self.model_version}, {len(self.feature_names)} features)")
+            return True
+        except Exception as e:
+            print(f"⚠ Could not load model bundle {path}, loading the pickles: {e}")
+            return False
     
     def _load_model_and_scaler(self):
         """Load the trained LightGBM model AND the saved StandardScaler"""
+        import joblib
+        
         try:
             # Load model
             if os.path.exists(settings.MODEL_PATH):
@@ -39,54 +108,218 @@ class ModelService:
                 print(f"✓ Scaler loaded from: {settings.SCALER_PATH}")
             else:
                 raise FileNotFoundError(f"Scaler not found at: {settings.SCALER_PATH}")
+            
+            self.booster = self.model.booster_
+            self.feature_importances = self.model.feature_importances_
+            self.n_features_in = int(getattr(self.scaler, "n_features_in_", self.booster.num_feature()))
+            self.scaler_mean, self.scaler_scale = scaler_arrays(self.scaler, self.n_features_in)
+            
+            # Version = content hash, so caches keyed on it never outlive the artifacts
+            self.model_version = artifact_version([settings.MODEL_PATH, settings.SCALER_PATH])
+            print(f"✓ Model version: {self.model_version}")
                 
         except Exception as e:
             print(f"✗ Error loading model/scaler: {e}")
             raise
     
-    def _load_protein_mapping(self):
-        """Load feature -> protein name mapping"""
+    def _load_tree_engine(self):
+        """
+        Set up the NumPy engine (if selected): the bundle's pre-verified trees
+        now, or (pickles) mark it to be built on first use
+        """
+        engine = settings.INFERENCE_ENGINE.lower()
+        if engine != "numpy":
+            if engine != "lightgbm":
+                print(f"⚠ Unknown INFERENCE_ENGINE '{settings.INFERENCE_ENGINE}', using lightgbm")
+            self._get_booster()
+            return
+        
+        if self.bundle is not None:
+            self.tree_engine = self.bundle.tree_ensemble()
+            self._tree_engine_on_raw = bool(self.bundle.manifest["trees"]["raw_features"])
+            print(f"✓ NumPy tree engine mapped from bundle: {self.tree_engine.n_trees} trees")
+            return
+        self._tree_engine_pending = True
+    
+    def _get_tree_engine(self) -> Optional[TreeEnsemble]:
+        """
+        The NumPy engine, or None for lightgbm
+        
+        With the pickles, the first call flattens the booster and checks it
+        against predict_proba. That prediction starts OpenMP threads, so it
+        must not happen in the pre-fork master (api/server.py): each worker
+        does it in warm_up instead.
+        """
+        if self._tree_engine_pending:
+            with self._tree_engine_lock:
+                if self._tree_engine_pending:
+                    self._build_tree_engine()
+                    self._tree_engine_pending = False
+        return self.tree_engine
+    
+    def _build_tree_engine(self):
+        """Flatten the booster with the scaler folded into its split thresholds and check it against predict_proba"""
         try:
-            mapping_path = os.path.join(os.path.dirname(__file__), "../data/feature_protein_mapping.csv")
-            if os.path.exists(mapping_path):
-                df = pd.read_csv(mapping_path)
-                self.protein_mapping = dict(zip(df['seq_column'], df['protein_name']))
-                print(f"✓ Loaded {len(self.protein_mapping)} protein mappings")
-            else:
-                print(f"⚠ Protein mapping file not found at {mapping_path}, using seq names only")
-                self.protein_mapping = {}
+            tree_engine, on_raw, max_diff = build_verified(
+                self.booster, self.scaler_mean, self.scaler_scale,
+                transform=self.transform,
+                reference=lambda X_scaled: self.model.predict_proba(X_scaled)[:, 1],
+            )
+            if max_diff > settings.INFERENCE_ENGINE_TOLERANCE:
+                print(f"⚠ NumPy engine differs from predict_proba by {max_diff:.3g}, using lightgbm")
+                return
+            
+            self.tree_engine = tree_engine
+            self._tree_engine_on_raw = on_raw
+            print(
+                f"✓ NumPy tree engine ready: {tree_engine.n_trees} trees, "
+                f"{'raw' if on_raw else 'scaled'} features (max diff {max_diff:.3g})"
+            )
         except Exception as e:
-            print(f"⚠ Could not load protein mapping: {e}")
-            self.protein_mapping = {}
+            print(f"⚠ Could not build NumPy tree engine, using lightgbm: {e}")
     
-    def _initialize_feature_names(self):
-        """Initialize feature names from the mapping file (these are the 50 selected seq_* features)"""
+    def _build_metadata(self):
+        """
+        Everything the verbose response repeats per request (feature names,
+        protein names, importances, top biomarkers), serialized once. Compact
+        responses carry only its version and index into ``features``.
+        """
+        if not self.feature_names or self.feature_importances is None:
+            return
+        content = {
+            "model_version": self.model_version,
+            "feature_count": len(self.feature_names),
+            "features": [
+                {
+                    "index": j,
+                    "feature": name,
+                    "protein_name": self.protein_mapping.get(name, name),
+                    "display_name": f"{self.protein_mapping.get(name, name)} ({name})",
+                    "importance": float(self.feature_importances[j]),
+                }
+                for j, name in enumerate(self.feature_names)
+            ],
+            "top_biomarkers": self._get_feature_importance(self.feature_names),
+        }
+        self.metadata_version = content_version(content)
+        self.metadata = CachedPayload.from_content(
+            {"metadata_version": self.metadata_version, **content}, self.metadata_version
+        )
+    
+    def warm_up(self):
+        """Score one dummy patient (the feature means) so lazy initialization isn't paid by a real request"""
+        X = np.asarray(self.scaler_mean, dtype=np.float64).reshape(1, -1)
+        probabilities = self._score_probabilities(X)
+        if self.feature_names:
+            self._get_result_builder(self.feature_names).build(X, probabilities)
+        self.calibrate_threads()
+    
+    def calibrate_threads(self):
+        """
+        Replace the heuristic thread policy with one timed on this machine
+        (once per process; must run after fork, it starts OpenMP threads)
+        """
+        if self.thread_policy.calibrated or not settings.PREDICT_THREADS_CALIBRATE:
+            return
+        if self._get_tree_engine() is not None and settings.CONTRIBUTION_METHOD.lower() != "shap":
+            return  # the NumPy engine doesn't use LightGBM threads
+        booster = self._get_booster()
+        started = time.perf_counter()
+        self.thread_policy = ThreadPolicy.calibrate(
+            lambda X, threads: booster.predict(X, num_threads=threads), booster.num_feature(), thread_budget()
+        )
+        print(
+            f"✓ Prediction threads calibrated in {(time.perf_counter() - started) * 1000:.0f} ms: "
+            f"{self.thread_policy.describe()}"
+        )
+    
+    def _get_booster(self):
+        """The LightGBM booster (from the bundle's model text on first use)"""
+        if self.booster is None and self.bundle is not None:
+            import lightgbm as lgb
+            self.booster = lgb.Booster(model_str=self.bundle.booster_text())
+            print(f"✓ LightGBM booster loaded from bundle: {self.booster.num_trees()} trees")
+        return self.booster
+    
+    def _load_feature_mapping(self):
+        """Load the 50 selected seq_* feature names (model order) and their protein names"""
         try:
-            mapping_path = os.path.join(os.path.dirname(__file__), "../data/feature_protein_mapping.csv")
-            if os.path.exists(mapping_path):
-                df = pd.read_csv(mapping_path)
-                self.feature_names = df['seq_column'].tolist()
-                print(f"✓ Initialized {len(self.feature_names)} feature names")
+            if os.path.exists(DEFAULT_MAPPING_PATH):
+                self.feature_names, protein_names = read_feature_mapping(DEFAULT_MAPPING_PATH)
+                self.feature_index = {name: j for j, name in enumerate(self.feature_names)}
+                self.protein_mapping = dict(zip(self.feature_names, protein_names))
+                print(f"✓ Loaded {len(self.protein_mapping)} protein mappings, {len(self.feature_names)} feature names")
             else:
-                print(f"⚠ Could not initialize feature names, file not found")
-                self.feature_names = []
+                print(f"⚠ Protein mapping file not found at {DEFAULT_MAPPING_PATH}, using seq names only")
         except Exception as e:
-            print(f"⚠ Could not initialize feature names: {e}")
+            print(f"⚠ Could not load protein mapping: {e}")
+            self.protein_mapping = {}
             self.feature_names = []
+            self.feature_index = {}
     
-    def predict(self, data: pd.DataFrame) -> Dict[str, Any]:
+    def predict(self, data: pd.DataFrame, compact: bool = False) -> Dict[str, Any]:
         """
         Make predictions for patients using SAVED scaler (transform only, no fit!)
         
         Input: CSV with rows=patients, columns=50 biomarkers (seq_* columns)
         Output: For EACH patient → prediction (0/1) + probability (0-100%)
+        
+        ``compact`` leaves out the static model metadata (see _build_metadata)
+        and reports each patient's top contributors as feature indices.
         """
-        if self.model is None or self.scaler is None:
+        if not self.is_loaded:
             raise ValueError("Model or Scaler not loaded")
+        if compact:
+            self.require_metadata()
         
         n_patients = len(data)
         print(f"📊 Received {n_patients} patients")
         
+        with span("validate", rows=n_patients):
+            X_np, used_features = self._select_features(data)
+        
+        # Get predictions from model (scales with the SAVED scaler unless it is
+        # folded into the NumPy engine's thresholds) and build per-patient
+        # results (vectorized; see result_builder), chunked across the
+        # scoring pool for huge batches
+        if use_parallel(n_patients) and used_features == self.feature_names:
+            patients, probabilities = score_parallel(X_np, compact=compact)  # P(PD)
+        else:
+            patients, probabilities = self._score_and_build(X_np, used_features, compact=compact)  # P(PD)
+        predictions = (probabilities >= 0.5).astype(int)  # 0 or 1
+        
+        # Summary counts
+        summary = summarize(n_patients, int(predictions.sum()), float(np.mean(probabilities)))
+        
+        return self.build_response(patients, summary, used_features, compact=compact)
+    
+    def score(self, data: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+        """
+        Validate and score without building per-patient results
+        
+        Returns P(PD) per row and the features used; for callers that encode
+        the response straight from the probabilities (see serialization.py).
+        """
+        if not self.is_loaded:
+            raise ValueError("Model or Scaler not loaded")
+        with span("validate", rows=len(data)):
+            X_np, used_features = self._select_features(data)
+        return self.score_matrix(X_np), used_features
+    
+    def score_matrix(self, X: np.ndarray) -> np.ndarray:
+        """P(PD) for a feature matrix in feature_names order (no per-patient results; huge batches use the scoring pool)"""
+        with span("score", rows=len(X)):
+            if use_parallel(len(X)):
+                return score_parallel_probabilities(X)
+            return self.predict_probabilities(np.asarray(X, dtype=np.float64))
+    
+    def require_metadata(self):
+        """Compact responses index into the model metadata; raise ValueError if there is none"""
+        if self.metadata is None:
+            raise ValueError("Compact responses need the model's feature list (feature_protein_mapping.csv).")
+    
+    def _select_features(self, data: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+        """Validate the uploaded columns and return the feature matrix (float64) + the features used"""
         # Get required feature names from model
         required_features = self.feature_names if self.feature_names else []
         
@@ -102,12 +335,7 @@ class ModelService:
             # Check if all required features are present
             missing_features = [f for f in required_features if f not in data.columns]
             if missing_features:
-                raise ValueError(
-                    f"Missing required features: {', '.join(missing_features[:10])}"
-                    f"{'...' if len(missing_features) > 10 else ''} "
-                    f"({len(missing_features)} of {len(required_features)} missing). "
-                    f"Please ensure your CSV contains all required columns."
-                )
+                raise self._missing_features_error(missing_features)
             # Use required features in correct order
             X_df = data[required_features].copy()
             used_features = required_features
@@ -124,86 +352,126 @@ class ModelService:
             used_features = seq_cols[:50]
         
         # Validate against scaler expectation
-        if hasattr(self.scaler, "n_features_in_"):
-            expected_n = int(self.scaler.n_features_in_)
+        if self.n_features_in:
+            expected_n = self.n_features_in
             if X_df.shape[1] != expected_n:
                 raise ValueError(f"Number of features ({X_df.shape[1]}) doesn't match scaler's expected ({expected_n})")
         
         # Convert to numpy
-        X_np = X_df.to_numpy()
+        X_np = X_df.to_numpy(dtype=np.float64)
+        return X_np, used_features
+    
+    def predict_matrix(
+        self, X: np.ndarray, patient_id_offset: int = 0, compact: bool = False
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """
+        Score a feature matrix that is already in feature_names order
         
-        # Apply SAVED scaler (transform only - do NOT fit!)
-        X_scaled = self.scaler.transform(X_np)
+        Returns the per-patient results (numbered from patient_id_offset + 1)
+        and P(PD) for each row. Used for block-wise scoring of large uploads.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        return self._score_and_build(X, self.feature_names, patient_id_offset, compact)
+    
+    def _score_and_build(
+        self, X: np.ndarray, feature_names: List[str], patient_id_offset: int = 0, compact: bool = False
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """P(PD) and patient results, with contributions from CONTRIBUTION_METHOD"""
+        builder = self._get_result_builder(feature_names)
+        method = settings.CONTRIBUTION_METHOD.lower()
+        if method != "shap":
+            if method != "importance":
+                print(f"⚠ Unknown CONTRIBUTION_METHOD '{settings.CONTRIBUTION_METHOD}', using importance")
+            with span("score", rows=len(X)):
+                probabilities = self.predict_probabilities(X)
+            patients = builder.build(X, probabilities, patient_id_offset=patient_id_offset, compact=compact)
+            return patients, probabilities
         
-        # Get predictions from model
-        probabilities = self.model.predict_proba(X_scaled)[:, 1]  # P(PD)
-        predictions = (probabilities >= 0.5).astype(int)  # 0 or 1
+        # Exact TreeSHAP: probabilities come out of the same booster pass
+        with span("scale", rows=len(X)):
+            X_scaled = self.transform(X)
+        if settings.CONTRIBUTION_TOP_K_ONLY:
+            with span("explain", rows=len(X)):
+                probabilities, top = self.explain(X_scaled, top_k=builder.top_k)
+            patients = builder.build(
+                X, probabilities, X_scaled=X_scaled, top_contributions=top,
+                patient_id_offset=patient_id_offset, compact=compact,
+            )
+        else:
+            with span("explain", rows=len(X)):
+                probabilities, contributions = self.explain(X_scaled)
+            patients = builder.build(
+                X, probabilities, X_scaled=X_scaled, contributions=contributions,
+                patient_id_offset=patient_id_offset, compact=compact,
+            )
+        return patients, probabilities
+    
+    def explain(self, X_scaled: np.ndarray, top_k: Optional[int] = None, chunk_rows: int = 4096):
+        """
+        Exact per-feature SHAP contributions (log-odds) from the booster's TreeSHAP
         
-        # Get global feature importances once
-        feature_importances = self.model.feature_importances_
-        feature_names = used_features
+        Takes the SCALED feature matrix. Returns (probabilities, contributions):
+        contributions is the full (n_patients, n_features) matrix, or with
+        ``top_k`` a pair of (column indices, values) for each row's top_k
+        largest |contribution|, so the full matrix is never held. P(PD) is the
+        sigmoid of each row's contributions plus the bias term.
+        """
+        booster = self._get_booster()
+        sigmoid = float(booster.params.get("sigmoid", 1.0))
+        n_rows = X_scaled.shape[0]
+        probabilities = np.empty(n_rows, dtype=np.float64)
+        if top_k is None:
+            contributions = np.empty_like(X_scaled, dtype=np.float64)
+        else:
+            top_idx = np.empty((n_rows, top_k), dtype=np.intp)
+            top_values = np.empty((n_rows, top_k), dtype=np.float64)
         
-        # Build per-patient results
-        patients = []
-        for i in range(n_patients):
-            prob = float(probabilities[i])
-            pred = int(predictions[i])
-            conf_delta = abs(prob - 0.5)
-            confidence = 'High' if conf_delta > 0.3 else 'Medium' if conf_delta > 0.15 else 'Low'
-            
-            # Get patient's original feature values
-            patient_features = {}
-            for j, feat_name in enumerate(feature_names):
-                patient_features[feat_name] = float(X_np[i, j])
-            
-            # Calculate per-patient feature contributions (simple: value * importance)
-            contributions = []
-            for j, feat_name in enumerate(feature_names):
-                contribution = float(X_scaled[i, j] * feature_importances[j])
-                protein_name = self.protein_mapping.get(feat_name, feat_name)
-                contributions.append({
-                    "feature": feat_name,
-                    "protein_name": protein_name,
-                    "display_name": f"{protein_name} ({feat_name})",
-                    "value": float(X_np[i, j]),
-                    "scaled_value": float(X_scaled[i, j]),
-                    "contribution": contribution,
-                    "importance": float(feature_importances[j])
-                })
-            
-            # Sort by absolute contribution and get top 5
-            contributions_sorted = sorted(contributions, key=lambda x: abs(x["contribution"]), reverse=True)
-            top_contributors = contributions_sorted[:5]
-            
-            patients.append({
-                "patient_id": i + 1,
-                "prediction": pred,  # 0 = Healthy, 1 = PD
-                "probability": round(prob * 100, 2),  # as percentage 0-100
-                "risk_level": self._get_risk_level(prob),
-                "confidence": confidence,
-                "interpretation": "Parkinson's Disease" if pred == 1 else "Healthy",
-                "features": patient_features,  # Original feature values
-                "top_contributors": top_contributors  # Top 5 features for this patient
-            })
+        for start in range(0, n_rows, chunk_rows):
+            stop = min(start + chunk_rows, n_rows)
+            threads, _ = self.thread_policy.threads_for(stop - start)
+            contrib = booster.predict(X_scaled[start:stop], pred_contrib=True, num_threads=threads)
+            probabilities[start:stop] = 1.0 / (1.0 + np.exp(-sigmoid * contrib.sum(axis=1)))
+            phi = contrib[:, :-1]  # last column is the bias (expected value)
+            if top_k is None:
+                contributions[start:stop] = phi
+            else:
+                idx = top_k_indices(np.abs(phi), top_k)
+                top_idx[start:stop] = idx
+                top_values[start:stop] = np.take_along_axis(phi, idx, axis=1)
         
-        # Summary counts
-        total = n_patients
-        pd_positive = int(predictions.sum())
-        pd_negative = total - pd_positive
-        avg_prob = round(float(np.mean(probabilities)) * 100, 2)
+        if top_k is None:
+            return probabilities, contributions
+        return probabilities, (top_idx, top_values)
+    
+    def validate_columns(self, columns: List[str]):
+        """Raise ValueError if any required feature is missing from the columns"""
+        present = set(columns)
+        missing_features = [f for f in self.feature_names if f not in present]
+        if missing_features:
+            raise self._missing_features_error(missing_features)
+    
+    def build_response(
+        self, patients: List[Dict[str, Any]], summary: Dict[str, Any], used_features: List[str], compact: bool = False
+    ) -> Dict[str, Any]:
+        """Assemble the batch prediction response around the patient results"""
+        total = summary["total_patients"]
+        print(f"✓ Predictions: {summary['pd_positive']} PD positive, {summary['pd_negative']} healthy out of {total}")
         
-        print(f"✓ Predictions: {pd_positive} PD positive, {pd_negative} healthy out of {total}")
+        if compact:
+            # Feature names, proteins and biomarkers live in GET /model/metadata
+            return {
+                "success": True,
+                "message": f"Analyzed {total} patients",
+                "summary": summary,
+                "patients": patients,
+                "metadata_version": self.metadata_version,
+                "feature_count": len(used_features),
+            }
         
         return {
             "success": True,
             "message": f"Analyzed {total} patients",
-            "summary": {
-                "total_patients": total,
-                "pd_positive": pd_positive,
-                "pd_negative": pd_negative,
-                "positive_rate": round(pd_positive / total * 100, 2),
-                "average_probability": avg_prob
-            },
+            "summary": summary,
             "patients": patients,
             "top_biomarkers": self._get_feature_importance(used_features),
             "used_features": used_features,
@@ -211,6 +479,95 @@ class ModelService:
             "feature_protein_map": {seq: self.protein_mapping.get(seq, seq) for seq in used_features}
         }
     
+    def _missing_features_error(self, missing_features: List[str]) -> ValueError:
+        return ValueError(
+            f"Missing required features: {', '.join(missing_features[:10])}"
+            f"{'...' if len(missing_features) > 10 else ''} "
+            f"({len(missing_features)} of {len(self.feature_names)} missing). "
+            f"Please ensure your CSV contains all required columns."
+        )
+    
+    def feature_vector(self, values: Dict[str, float]) -> np.ndarray:
+        """Build one patient's feature row (in feature_names order) from a name -> value dict"""
+        row = np.empty(len(self.feature_names), dtype=np.float64)
+        missing_features = []
+        for name, j in self.feature_index.items():
+            value = values.get(name)
+            if value is None:
+                missing_features.append(name)
+            else:
+                row[j] = value
+        if missing_features:
+            raise self._missing_features_error(missing_features)
+        return row
+    
+    def feature_matrix(self, patients: List[Iterable[Tuple[str, float]]]) -> Tuple[np.ndarray, List[List[str]]]:
+        """
+        Feature matrix (feature_names order) for many patients' (name, value) pairs, without pandas
+        
+        Values go through feature_index into one preallocated matrix; names the
+        model doesn't use are ignored. Also returns, per patient, the required
+        features it lacks (NaN in the matrix; such rows must not be scored).
+        """
+        index = self.feature_index
+        rows, cols, values = [], [], []
+        for i, items in enumerate(patients):
+            for name, value in items:
+                j = index.get(name)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+                    values.append(value)
+        
+        shape = (len(patients), len(self.feature_names))
+        X = np.full(shape, np.nan)
+        present = np.zeros(shape, dtype=bool)
+        X[rows, cols] = values
+        present[rows, cols] = True
+        
+        missing: List[List[str]] = [[] for _ in patients]
+        for i, j in zip(*np.nonzero(~present)):
+            missing[i].append(self.feature_names[j])
+        return X, missing
+    
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """Apply the SAVED scaler (transform only - do NOT fit!)"""
+        return (np.asarray(X, dtype=np.float64) - self.scaler_mean) / self.scaler_scale
+    
+    def predict_probabilities(self, X: np.ndarray) -> np.ndarray:
+        """P(PD) for each row of the raw (unscaled) feature matrix; small batches only score uncached rows"""
+        if self.row_cache.applies(len(X)):
+            return self.row_cache.predict(X, self._score_probabilities)
+        return self._score_probabilities(X)
+    
+    def _score_probabilities(self, X: np.ndarray) -> np.ndarray:
+        """P(PD) for each row of the raw (unscaled) feature matrix, using the selected engine"""
+        tree_engine = self._get_tree_engine()
+        if tree_engine is not None and self._tree_engine_on_raw:
+            with span("model", rows=len(X)):
+                return tree_engine.predict_probability(X)
+        with span("scale", rows=len(X)):
+            X_scaled = self.transform(X)
+        with span("model", rows=len(X)):
+            if tree_engine is not None:
+                return tree_engine.predict_probability(X_scaled)
+            threads, _ = self.thread_policy.threads_for(len(X_scaled))
+            return self._get_booster().predict(X_scaled, num_threads=threads)
+    
+    def _get_result_builder(self, feature_names: List[str]) -> PatientResultBuilder:
+        """Get (or create) the result builder for this feature order"""
+        key = tuple(feature_names)
+        builder = self._result_builders.get(key)
+        if builder is None:
+            builder = PatientResultBuilder(
+                feature_names=feature_names,
+                feature_importances=self.feature_importances,
+                protein_mapping=self.protein_mapping,
+                transform=self.transform,
+            )
+            self._result_builders[key] = builder
+        return builder
+    
     def _get_risk_level(self, probability: float) -> str:
         """Convert probability to human-readable risk level"""
         if probability < 0.3:
@@ -224,11 +581,11 @@ class ModelService:
     
     def _get_feature_importance(self, feature_names: List[str] = None, top_n: int = 10) -> List[Dict]:
         """Get top biomarkers by model importance"""
-        if self.model is None:
+        if self.feature_importances is None:
             return []
         
         try:
-            importances = self.model.feature_importances_
+            importances = self.feature_importances
             total_importance = importances.sum()
             indices = np.argsort(importances)[::-1][:top_n]
             
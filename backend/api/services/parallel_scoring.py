@@ -0,0 +1,149 @@
+"""
+Parallel Scoring - Huge ModelService batches across a process pool
+The feature matrix is copied once into shared memory; each pool process
+maps it, scores PARALLEL_SCORING_CHUNK_ROWS rows at a time and builds
+their per-patient results (the part that holds the GIL), and the chunks
+are merged in row order. ModelService.score_matrix (the JSON fast path,
+binary bodies) uses the same pool for P(PD) alone. Pool processes are
+spawned and load their own ModelService (mapped, with a model bundle);
+each predicts with one thread, since the processes are the parallelism.
+
+The output equals the serial path: every row's P(PD) is computed the same
+way whatever the chunk, patient ids continue across chunks, and the
+summary is taken over the merged P(PD) array.
+"""
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from api.config import settings
+from api.services.metrics import span
+from api.services.thread_policy import available_cpus
+
+
+# Settings that shape the results, sent with every chunk: pool processes only
+# see the environment, not values changed at runtime in this process
+CHUNK_SETTINGS = ("CONTRIBUTION_METHOD", "CONTRIBUTION_TOP_K_ONLY")
+
+
+def scoring_processes() -> int:
+    """PARALLEL_SCORING_PROCESSES, or this worker's share of the CPUs"""
+    if settings.PARALLEL_SCORING_PROCESSES > 0:
+        return settings.PARALLEL_SCORING_PROCESSES
+    return max(1, available_cpus() // max(1, settings.SERVER_WORKERS))
+
+
+def use_parallel(n_rows: int) -> bool:
+    """Whether a batch of n_rows is big enough for the pool (and there is more than one process)"""
+    min_rows = settings.PARALLEL_SCORING_MIN_ROWS
+    return 0 < min_rows <= n_rows and scoring_processes() > 1
+
+
+def init_worker():
+    """Pool process initializer: one LightGBM thread per process, model loaded before the first chunk"""
+    from api.services.model_service import get_model_service
+
+    settings.PREDICT_THREADS_MAX = 1
+    get_model_service()
+
+
+def score_shared_chunk(
+    name: str, shape: Tuple[int, int], start: int, stop: int, compact: bool, options: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Pool process body: patient results and P(PD) for rows [start, stop) of the shared matrix"""
+    from api.services.model_service import get_model_service
+
+    for setting, value in options.items():
+        setattr(settings, setting, value)
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        X = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)[start:stop]
+        patients, probabilities = get_model_service().predict_matrix(X, patient_id_offset=start, compact=compact)
+        del X  # no views may outlive close()
+        return patients, probabilities
+    finally:
+        shm.close()
+
+
+def score_shared_probabilities(name: str, shape: Tuple[int, int], start: int, stop: int) -> np.ndarray:
+    """Pool process body: P(PD) for rows [start, stop) of the shared matrix"""
+    from api.services.model_service import get_model_service
+
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        X = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)[start:stop]
+        probabilities = get_model_service().predict_probabilities(X)
+        del X  # no views may outlive close()
+        return probabilities
+    finally:
+        shm.close()
+
+
+def score_parallel(X: np.ndarray, compact: bool = False) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """
+    Patient results and P(PD) for a feature matrix in feature_names order,
+    like ModelService.predict_matrix but chunked across the scoring pool
+    """
+    options = {setting: getattr(settings, setting) for setting in CHUNK_SETTINGS}
+    chunks = _map_chunks(X, score_shared_chunk, compact, options)
+
+    with span("merge", rows=len(X)):
+        patients = []
+        for chunk_patients, _ in chunks:
+            patients.extend(chunk_patients)
+        probabilities = np.concatenate([chunk_probabilities for _, chunk_probabilities in chunks])
+    return patients, probabilities
+
+
+def score_parallel_probabilities(X: np.ndarray) -> np.ndarray:
+    """P(PD) for a feature matrix, like ModelService.predict_probabilities but chunked across the scoring pool"""
+    chunks = _map_chunks(X, score_shared_probabilities)
+    with span("merge", rows=len(X)):
+        return np.concatenate(chunks)
+
+
+def _map_chunks(X: np.ndarray, body: Callable[..., Any], *args) -> List[Any]:
+    """
+    Share X and run ``body(name, shape, start, stop, *args)`` per chunk in
+    the pool; results in row order
+
+    A pool found broken before anything was submitted (a process died since
+    the last batch) is replaced and the batch goes to the new one. Raises
+    WorkerCrashed if a process dies while scoring this batch; the broken pool
+    is dropped, so the next call starts a fresh one. That batch is not
+    retried: it would most likely kill a process again.
+    """
+    from api.services.executors import WorkerCrashed, discard_broken_pool, get_scoring_executor
+
+    X = np.asarray(X, dtype=np.float64)
+    n_rows = len(X)
+    chunk_rows = max(1, settings.PARALLEL_SCORING_CHUNK_ROWS)
+    # Smaller chunks when there wouldn't be one per process
+    chunk_rows = min(chunk_rows, -(-n_rows // scoring_processes()))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, X.nbytes))
+    try:
+        with span("share", rows=n_rows):
+            shared = np.ndarray(X.shape, dtype=np.float64, buffer=shm.buf)
+            shared[:] = X
+            del shared
+        with span("parallel_score", rows=n_rows):
+            chunks = [(start, min(start + chunk_rows, n_rows)) for start in range(0, n_rows, chunk_rows)]
+            executor = get_scoring_executor()
+            try:
+                first = executor.submit(body, shm.name, X.shape, *chunks[0], *args)
+            except BrokenProcessPool:
+                discard_broken_pool(executor)
+                executor = get_scoring_executor()
+                first = executor.submit(body, shm.name, X.shape, *chunks[0], *args)
+            try:
+                futures = [first] + [executor.submit(body, shm.name, X.shape, *chunk, *args) for chunk in chunks[1:]]
+                return [future.result() for future in futures]
+            except BrokenProcessPool:
+                discard_broken_pool(executor)
+                raise WorkerCrashed("A scoring process died (the batch may be too large for the available memory)")
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,64 @@
+"""
+Upload Parsing - Turns uploaded CSV / Excel bytes into a DataFrame
+Kept free of app state so it can run in a worker process.
+
+When the caller knows which columns it needs (the model's features), CSV
+uploads are parsed with only those columns, as a fixed numeric dtype, so
+wide panels (thousands of seq_* columns) cost little more than the 50 the
+model uses. pandas' multithreaded pyarrow engine is used when installed.
+"""
+import io
+from typing import List, Optional
+
+import pandas as pd
+
+from api.services.ingest import read_header
+
+try:
+    import pyarrow  # noqa: F401  (enables pandas' "pyarrow" CSV engine)
+    HAS_PYARROW = True
+except ImportError:  # optional: fall back to the C engine
+    HAS_PYARROW = False
+
+
+def csv_engine(preferred: str = "auto") -> str:
+    """pandas CSV engine for projected parsing: "pyarrow" if requested / available, else "c" """
+    if preferred == "auto":
+        return "pyarrow" if HAS_PYARROW else "c"
+    if preferred == "pyarrow" and not HAS_PYARROW:
+        return "c"
+    return preferred
+
+
+def read_csv_columns(contents: bytes) -> List[str]:
+    """Column names from the header line only (the body is not parsed)"""
+    return read_header(io.BytesIO(contents))
+
+
+def read_upload(
+    contents: bytes,
+    filename: str,
+    columns: Optional[List[str]] = None,
+    dtype: Optional[str] = None,
+    engine: str = "auto",
+) -> pd.DataFrame:
+    """
+    Parse an uploaded CSV or Excel file
+
+    With ``columns``, a CSV is parsed with ``usecols`` (every column must be
+    present; check the header with read_csv_columns first) and ``dtype``
+    applied to them; other columns are never materialized.
+    """
+    if filename.endswith('.csv'):
+        if columns is None:
+            return pd.read_csv(io.StringIO(contents.decode('utf-8')))
+        engine = csv_engine(engine)
+        return pd.read_csv(
+            io.BytesIO(contents),
+            usecols=columns,
+            dtype={name: dtype for name in columns} if dtype else None,
+            engine=engine,
+            # pyarrow skips a byte order mark itself (and transcodes anything but utf-8 slowly)
+            encoding="utf-8-sig" if engine == "c" else None,
+        )
+    return pd.read_excel(io.BytesIO(contents))
@@ -0,0 +1,57 @@
+"""
+Payload Cache - Pre-serialized JSON bodies served with ETags
+For responses that only change with the model (feature importance,
+biomarkers, model metadata): serialize once, then answer from bytes with a
+strong ETag and Cache-Control, and with 304 when the client already has it.
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from starlette.requests import Request
+
+from api.config import settings
+
+
+def content_version(content: Any) -> str:
+    """Short content hash of a JSON-able object (key order doesn't matter)"""
+    text = json.dumps(jsonable_encoder(content), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class CachedPayload:
+    """Serialized JSON body and its ETag"""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+
+    @classmethod
+    def from_content(cls, content: Any, tag: str) -> "CachedPayload":
+        """Serialize like FastAPI's default JSON response; ``tag`` becomes the (quoted) ETag"""
+        return cls(JSONResponse(content=jsonable_encoder(content)).body, f'"{tag}"')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def cached_response(request: Request, payload: CachedPayload) -> Response:
+    """200 with the precomputed body, or 304 if the client already has it"""
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": f"public, max-age={settings.FEATURE_CACHE_MAX_AGE_SECONDS}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
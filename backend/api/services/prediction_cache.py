@@ -0,0 +1,170 @@
+"""
+Prediction Cache - Content-addressed LRU caches for repeated predictions
+Row cache: P(PD) keyed by a hash of the ordered feature vector and the
+model version, so re-queried patients are not re-scored. Only batches of
+up to ROW_CACHE_MAX_ROWS rows use it: hashing and inserting every row of a
+large upload costs about as much as scoring it.
+Response cache: serialized responses keyed by the upload's digest, so an
+identical file is answered without parsing it at all.
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from api.config import settings
+
+
+def _row_entry_bytes() -> int:
+    """
+    Memory of one row-cache entry's objects, measured with sys.getsizeof:
+    16-byte key + float + (value, size) tuple, each rounded up to the
+    allocator's 8-byte granularity. The table itself is counted by LRUCache.
+    """
+    key, value = bytes(16), 0.5
+    return sum(-(-sys.getsizeof(obj) // 8) * 8 for obj in (key, value, (value, 0)))
+
+
+ROW_ENTRY_BYTES = _row_entry_bytes()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by the total size of its values plus the
+    table holding them (sys.getsizeof of the OrderedDict, which matters when
+    there are many small entries)
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, int(max_bytes))
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: List[Hashable]) -> List[Optional[Any]]:
+        """Look up several keys under one lock; misses are None"""
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    self.misses += 1
+                    values.append(None)
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    values.append(entry[0])
+        return values
+
+    def put(self, key: Hashable, value: Any, size: int):
+        self.put_many([(key, value)], size)
+
+    def put_many(self, items: List[tuple], size: int):
+        """Insert (key, value) pairs that each take ``size`` bytes, evicting the least recently used"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            for key, value in items:
+                old = self._data.pop(key, None)
+                if old is not None:
+                    self.current_bytes -= old[1]
+                self._data[key] = (value, size)
+                self.current_bytes += size
+            while self.current_bytes + sys.getsizeof(self._data) > self.max_bytes and self._data:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._data),
+            "bytes": self.current_bytes + sys.getsizeof(self._data),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class RowPredictionCache:
+    """Per-row P(PD) cache keyed by (model version, ordered feature vector)"""
+
+    def __init__(self, model_version: str, max_bytes: int, max_rows: int = 1024):
+        self.model_version = model_version
+        self.max_rows = max(0, int(max_rows))
+        self._key = model_version.encode()[:64]
+        self.cache = LRUCache(max_bytes)
+
+    def applies(self, n_rows: int) -> bool:
+        """Whether a batch of n_rows goes through the cache (small batches only)"""
+        return self.cache.enabled and n_rows <= self.max_rows
+
+    def row_keys(self, X: np.ndarray) -> List[bytes]:
+        """16-byte digest of each row's float64 values, salted with the model version"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        buf = memoryview(X).cast("B")
+        stride = X.shape[1] * X.itemsize
+        key = self._key
+        return [
+            hashlib.blake2b(buf[start:start + stride], digest_size=16, key=key).digest()
+            for start in range(0, len(buf), stride)
+        ]
+
+    def predict(self, X: np.ndarray, score: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """P(PD) for every row of X, calling ``score`` only for rows not in the cache"""
+        keys = self.row_keys(X)
+        cached = self.cache.get_many(keys)
+        misses = [i for i, value in enumerate(cached) if value is None]
+
+        probabilities = np.array([0.0 if value is None else value for value in cached], dtype=np.float64)
+        if misses:
+            scored = score(X[misses] if len(misses) < len(keys) else X)
+            probabilities[misses] = scored
+            self.cache.put_many(list(zip((keys[i] for i in misses), scored.tolist())), ROW_ENTRY_BYTES)
+        return probabilities
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model_version": self.model_version, "max_rows": self.max_rows, "entry_bytes": ROW_ENTRY_BYTES,
+            **self.cache.stats(),
+        }
+
+
+def upload_digest(contents: bytes, filename: str, model_version: str, variant: str = "") -> str:
+    """Cache key for a whole upload: file content + file type + model version (+ response variant)"""
+    h = hashlib.sha256(contents)
+    h.update(filename.rsplit(".", 1)[-1].lower().encode())
+    h.update(model_version.encode())
+    h.update(variant.encode())
+    return h.hexdigest()
+
+
+# Singleton
+_response_cache: Optional[LRUCache] = None
+
+def get_response_cache() -> LRUCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = LRUCache(int(settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024))
+    return _response_cache
@@ -0,0 +1,247 @@
+"""
+Result Builder - Vectorized assembly of per-patient prediction results
+Computes contributions, top contributors, risk and confidence levels as
+NumPy arrays and only converts to Python objects when serializing.
+"""
+import time
+import numpy as np
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from api.services.metrics import record, span
+
+
+RISK_LEVELS = np.array(["Low", "Moderate", "High", "Very High"], dtype=object)
+RISK_BINS = np.array([0.3, 0.5, 0.7])
+
+CONFIDENCE_LEVELS = np.array(["Low", "Medium", "High"], dtype=object)
+CONFIDENCE_BINS = np.array([0.15, 0.3])
+
+INTERPRETATIONS = np.array(["Healthy", "Parkinson's Disease"], dtype=object)
+
+
+def risk_levels(probabilities: np.ndarray) -> np.ndarray:
+    """Map P(PD) to Low / Moderate / High / Very High (same cut-offs as ModelService._get_risk_level)"""
+    return RISK_LEVELS[np.searchsorted(RISK_BINS, probabilities, side="right")]
+
+
+def confidence_levels(probabilities: np.ndarray) -> np.ndarray:
+    """Map distance from the 0.5 decision boundary to Low / Medium / High"""
+    conf_delta = np.abs(probabilities - 0.5)
+    return CONFIDENCE_LEVELS[np.searchsorted(CONFIDENCE_BINS, conf_delta, side="left")]
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Column indices of the k largest scores per row, largest first.
+
+    Ties are broken by the lower column index, which matches a stable
+    ``sorted(..., reverse=True)`` over the columns in their original order.
+    """
+    n_rows, n_cols = scores.shape
+    k = min(k, n_cols)
+    if k == 0 or n_rows == 0:
+        return np.empty((n_rows, k), dtype=np.intp)
+
+    # NaN never outranks a real contribution
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+
+    if k < n_cols:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n_cols), (n_rows, n_cols)).copy()
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+
+    # argpartition picks an arbitrary member of a tie at the k-th position;
+    # redo those (rare) rows with a stable sort so the lowest index wins
+    if k < n_cols:
+        kth = candidate_scores.min(axis=1)
+        ambiguous = np.flatnonzero((scores >= kth[:, None]).sum(axis=1) > k)
+        if len(ambiguous):
+            stable = np.argsort(-scores[ambiguous], axis=1, kind="stable")[:, :k]
+            candidates[ambiguous] = stable
+            candidate_scores[ambiguous] = np.take_along_axis(scores[ambiguous], stable, axis=1)
+
+    order = np.lexsort((candidates, -candidate_scores), axis=-1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class PatientResultBuilder:
+    """Builds the per-patient result dicts for a batch of predictions"""
+
+    def __init__(
+        self,
+        feature_names: List[str],
+        feature_importances: np.ndarray,
+        protein_mapping: Optional[Dict[str, str]] = None,
+        transform: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        top_k: int = 5,
+    ):
+        protein_mapping = protein_mapping or {}
+        self.feature_names = list(feature_names)
+        self.feature_importances = np.asarray(feature_importances)
+        self.transform = transform
+        self.top_k = top_k
+
+        # Static per-feature fields, shared by every patient
+        self._protein_names = [protein_mapping.get(f, f) for f in self.feature_names]
+        self._display_names = [f"{p} ({f})" for f, p in zip(self.feature_names, self._protein_names)]
+        self._importances = [float(v) for v in self.feature_importances]
+
+    def contributions(self, X_scaled: np.ndarray) -> np.ndarray:
+        """Per-patient feature contributions (simple: scaled value * importance)"""
+        return X_scaled * self.feature_importances
+
+    def build(
+        self,
+        X: np.ndarray,
+        probabilities: np.ndarray,
+        X_scaled: Optional[np.ndarray] = None,
+        contributions: Optional[np.ndarray] = None,
+        top_contributions: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        patient_id_offset: int = 0,
+        compact: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Build patient result dicts from the raw features and P(PD).
+
+        Contributions default to scaled value * importance; pass a full
+        ``contributions`` matrix or, to avoid materializing one, the per-row
+        ``top_contributions`` as (column indices, values). Scaled values are
+        only computed here (via ``transform``) when the caller has not already
+        produced them. All ranking and level assignment happens on arrays;
+        Python objects are only created for the fields that end up in the
+        response.
+
+        ``compact`` results leave out the feature values and the contributor
+        dicts; the top contributors are only named by column index
+        (``top_features``), as names and importances are static model metadata.
+        """
+        if X_scaled is None:
+            X_scaled = self.transform(X)
+        predictions = (probabilities >= 0.5).astype(int)
+
+        with span("contributions", rows=len(X)):
+            if top_contributions is not None:
+                top_idx, top_contrib = top_contributions
+                top_contrib = np.asarray(top_contrib).tolist()
+            else:
+                if contributions is None:
+                    contributions = self.contributions(X_scaled)
+                top_idx = top_k_indices(np.abs(contributions), self.top_k)
+                top_contrib = np.take_along_axis(contributions, top_idx, axis=1).tolist()
+
+        if compact:
+            return self._build_compact(probabilities, predictions, top_idx, patient_id_offset)
+
+        started = time.perf_counter()
+        top_values = np.take_along_axis(X, top_idx, axis=1).tolist()
+        top_scaled = np.take_along_axis(X_scaled, top_idx, axis=1).tolist()
+
+        prob_list = probabilities.tolist()
+        pred_list = predictions.tolist()
+        risk_list = risk_levels(probabilities).tolist()
+        confidence_list = confidence_levels(probabilities).tolist()
+        interpretation_list = INTERPRETATIONS[predictions].tolist()
+
+        feature_names = self.feature_names
+        protein_names = self._protein_names
+        display_names = self._display_names
+        importances = self._importances
+
+        patients = []
+        for i, (row, idx_row) in enumerate(zip(X.tolist(), top_idx.tolist())):
+            top_contributors = [
+                {
+                    "feature": feature_names[j],
+                    "protein_name": protein_names[j],
+                    "display_name": display_names[j],
+                    "value": value,
+                    "scaled_value": scaled,
+                    "contribution": contribution,
+                    "importance": importances[j],
+                }
+                for j, value, scaled, contribution in zip(idx_row, top_values[i], top_scaled[i], top_contrib[i])
+            ]
+            patients.append({
+                "patient_id": patient_id_offset + i + 1,
+                "prediction": pred_list[i],  # 0 = Healthy, 1 = PD
+                "probability": round(prob_list[i] * 100, 2),  # as percentage 0-100
+                "risk_level": risk_list[i],
+                "confidence": confidence_list[i],
+                "interpretation": interpretation_list[i],
+                "features": dict(zip(feature_names, row)),  # Original feature values
+                "top_contributors": top_contributors  # Top 5 features for this patient
+            })
+
+        record("results", time.perf_counter() - started, len(patients))
+        return patients
+
+    def _build_compact(
+        self,
+        probabilities: np.ndarray,
+        predictions: np.ndarray,
+        top_idx: np.ndarray,
+        patient_id_offset: int,
+    ) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        prob_list = [round(p * 100, 2) for p in probabilities.tolist()]
+        pred_list = predictions.tolist()
+        risk_list = risk_levels(probabilities).tolist()
+        confidence_list = confidence_levels(probabilities).tolist()
+        interpretation_list = INTERPRETATIONS[predictions].tolist()
+
+        patients = [
+            {
+                "patient_id": patient_id_offset + i + 1,
+                "prediction": pred_list[i],
+                "probability": prob_list[i],
+                "risk_level": risk_list[i],
+                "confidence": confidence_list[i],
+                "interpretation": interpretation_list[i],
+                "top_features": idx_row,  # columns of the top contributors, largest first
+            }
+            for i, idx_row in enumerate(top_idx.tolist())
+        ]
+        record("results", time.perf_counter() - started, len(patients))
+        return patients
+
+
+def summarize(total: int, pd_positive: int, mean_probability: float) -> Dict[str, Any]:
+    """Summary counts for a batch of predictions"""
+    return {
+        "total_patients": total,
+        "pd_positive": pd_positive,
+        "pd_negative": total - pd_positive,
+        "positive_rate": round(pd_positive / total * 100, 2),
+        "average_probability": round(mean_probability * 100, 2)
+    }
+
+
+class SummaryAccumulator:
+    """Running summary over batches that are scored one block at a time"""
+
+    def __init__(self):
+        self.total = 0
+        self.pd_positive = 0
+        self.probability_sum = 0.0
+
+    def add(self, probabilities: np.ndarray):
+        self.total += len(probabilities)
+        self.pd_positive += int((probabilities >= 0.5).sum())
+        self.probability_sum += float(probabilities.sum())
+
+    def summary(self) -> Dict[str, Any]:
+        return summarize(self.total, self.pd_positive, self.probability_sum / self.total)
+
+    def state(self) -> Dict[str, Any]:
+        """Running totals, JSON-able (for jobs that persist progress between chunks)"""
+        return {"total": self.total, "pd_positive": self.pd_positive, "probability_sum": self.probability_sum}
+
+    @classmethod
+    def from_state(cls, state: Optional[Dict[str, Any]]) -> "SummaryAccumulator":
+        accumulator = cls()
+        if state:
+            accumulator.total = int(state["total"])
+            accumulator.pd_positive = int(state["pd_positive"])
+            accumulator.probability_sum = float(state["probability_sum"])
+        return accumulator
@@ -0,0 +1,92 @@
+"""
+Serialization - Fast JSON for batch prediction responses
+Writes the /model/predict-csv body straight from the P(PD) array with
+orjson, instead of building per-patient result dicts, revalidating them
+through PredictionResponse and running FastAPI's JSON encoder.
+
+The output follows the response models passed in: declared fields in
+declaration order, nested models projected the same way, extra keys kept
+only where the model allows them. The body therefore parses to the same
+JSON as the Pydantic path; only float spelling may differ (1e-05 vs 0.00001).
+"""
+import json
+import typing
+from typing import Any, Dict, Iterable, List, Type
+
+import numpy as np
+from pydantic import BaseModel
+
+from api.services.result_builder import INTERPRETATIONS, confidence_levels, risk_levels
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON (orjson if installed; NumPy arrays/scalars allowed with orjson)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _project_value(value: Any, annotation: Any) -> Any:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel) and isinstance(value, dict):
+        return project(value, annotation)
+    if typing.get_origin(annotation) in (list, List) and isinstance(value, list):
+        (item_type,) = typing.get_args(annotation) or (Any,)
+        if isinstance(item_type, type) and issubclass(item_type, BaseModel):
+            return [project(item, item_type) if isinstance(item, dict) else item for item in value]
+    return value
+
+
+def project(data: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """``data`` shaped like ``model.model_dump()`` would shape it, without validating"""
+    fields = model.model_fields
+    out = {name: _project_value(data[name], field.annotation) for name, field in fields.items() if name in data}
+    if model.model_config.get("extra") == "allow":
+        out.update((name, value) for name, value in data.items() if name not in fields)
+    return out
+
+
+def patient_columns(probabilities: np.ndarray, patient_id_offset: int = 0) -> Dict[str, list]:
+    """Per-patient response fields as columns, computed on the P(PD) array"""
+    predictions = (probabilities >= 0.5).astype(int)
+    n = len(probabilities)
+    return {
+        "patient_id": list(range(patient_id_offset + 1, patient_id_offset + n + 1)),
+        "prediction": predictions.tolist(),
+        "probability": [round(p * 100, 2) for p in probabilities.tolist()],
+        "risk_level": risk_levels(probabilities).tolist(),
+        "confidence": confidence_levels(probabilities).tolist(),
+        "interpretation": INTERPRETATIONS[predictions].tolist(),
+    }
+
+
+def patient_records(
+    probabilities: np.ndarray, fields: Iterable[str], patient_id_offset: int = 0
+) -> List[Dict[str, Any]]:
+    """One dict per patient with exactly ``fields`` (e.g. a model's ``model_fields``), in that order"""
+    columns = patient_columns(probabilities, patient_id_offset)
+    fields = list(fields)
+    missing = [name for name in fields if name not in columns]
+    if missing:
+        raise ValueError(f"No fast-path column for patient field(s): {', '.join(missing)}")
+    return [dict(zip(fields, values)) for values in zip(*(columns[name] for name in fields))]
+
+
+def encode_prediction_response(
+    result: Dict[str, Any],
+    probabilities: np.ndarray,
+    response_model: Type[BaseModel],
+    patient_model: Type[BaseModel],
+) -> bytes:
+    """
+    JSON body for ``result`` (as built by ModelService.build_response, minus
+    patients) with the patients generated from ``probabilities``.
+    """
+    body = project({**result, "patients": []}, response_model)
+    # Patients are already in their final shape; set in place (keeps the key order)
+    body["patients"] = patient_records(probabilities, patient_model.model_fields)
+    return dumps(body)
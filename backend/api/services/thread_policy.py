@@ -0,0 +1,163 @@
+"""
+Thread Policy - LightGBM prediction threads chosen per call by batch size
+The model is pickled with its training-time num_threads, so every
+prediction would otherwise start OpenMP on all cores: slower than one
+thread for a handful of rows, and with several workers the cores are
+oversubscribed. Each call instead gets 1 thread below the calibrated
+row threshold and up to the worker's share of the CPUs
+(CPUs / SERVER_WORKERS) above it.
+
+Thresholds come from a short micro-benchmark when the worker warms up
+(calibrate); until then (or with PREDICT_THREADS_CALIBRATE off) a fixed
+heuristic applies. PREDICT_THREADS > 0 pins every call to that many threads.
+"""
+import bisect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from api.config import settings
+from api.services.metrics import PREDICT_CALLS, PREDICT_ROWS
+
+
+# Rows from which the uncalibrated policy uses all threads of the budget
+DEFAULT_PARALLEL_MIN_ROWS = 1024
+
+# Calibration: batch sizes timed (ascending), best of CALIBRATION_REPEATS per
+# thread count; a size is skipped when it would overrun CALIBRATION_BUDGET_SECONDS
+CALIBRATION_SIZES = (1, 8, 64, 512, 4096)
+CALIBRATION_REPEATS = 3
+CALIBRATION_BUDGET_SECONDS = 2.0
+# More threads must be at least this much faster to win a batch size (noise margin)
+CALIBRATION_MIN_GAIN = 0.10
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        return os.cpu_count() or 1
+
+
+def thread_budget() -> int:
+    """Most threads one prediction call may use: PREDICT_THREADS_MAX, or this worker's share of the CPUs"""
+    if settings.PREDICT_THREADS_MAX > 0:
+        return settings.PREDICT_THREADS_MAX
+    return max(1, available_cpus() // max(1, settings.SERVER_WORKERS))
+
+
+def candidate_threads(budget: int) -> List[int]:
+    """1, 2, 4, ... up to the budget (always including it)"""
+    candidates = []
+    threads = 1
+    while threads < budget:
+        candidates.append(threads)
+        threads *= 2
+    candidates.append(budget)
+    return candidates
+
+
+class ThreadPolicy:
+    """Batch size -> thread count, as ascending (min_rows, threads) steps"""
+
+    def __init__(self, budget: int, steps: List[Tuple[int, int]], calibrated: bool = False,
+                 timings: Optional[Dict[str, Dict[str, float]]] = None):
+        self.budget = budget
+        self.steps = sorted(steps)
+        self.calibrated = calibrated
+        self.timings = timings or {}  # rows -> threads -> best seconds (calibration only)
+        self._min_rows = [min_rows for min_rows, _ in self.steps]
+        self._lock = threading.Lock()
+        self._counts: Dict[Tuple[str, int], List[int]] = {}  # (regime, threads) -> [calls, rows]
+
+    @classmethod
+    def default(cls, budget: int) -> "ThreadPolicy":
+        steps = [(0, 1)]
+        if budget > 1:
+            steps.append((DEFAULT_PARALLEL_MIN_ROWS, budget))
+        return cls(budget, steps)
+
+    @classmethod
+    def calibrate(cls, predict: Callable[[np.ndarray, int], Any], n_features: int, budget: int) -> "ThreadPolicy":
+        """
+        Time ``predict(X, threads)`` for each calibration size and candidate
+        thread count. Each size's winner is the fewest threads within
+        CALIBRATION_MIN_GAIN of its fastest; a size then gets the smallest
+        winner of itself and all larger sizes, so one noisy win at a small
+        size doesn't turn on threads for everything above it.
+        """
+        candidates = candidate_threads(budget)
+        if len(candidates) == 1:
+            return cls(budget, [(0, 1)], calibrated=True)
+
+        rng = np.random.default_rng(0)
+        X_all = rng.standard_normal((CALIBRATION_SIZES[-1], n_features))  # scaled-feature space
+        started = time.perf_counter()
+        timings: Dict[str, Dict[str, float]] = {}
+        winners: List[Tuple[int, int]] = []
+        size_seconds, previous_rows = 0.0, 1
+        for n_rows in CALIBRATION_SIZES:
+            elapsed = time.perf_counter() - started
+            if elapsed + size_seconds * n_rows / previous_rows > CALIBRATION_BUDGET_SECONDS:
+                break
+            size_started, previous_rows = time.perf_counter(), n_rows
+            X = X_all[:n_rows]
+            best = {}
+            for threads in candidates:
+                predict(X, threads)  # first call per thread count starts the OpenMP team
+                seconds = []
+                for _ in range(CALIBRATION_REPEATS):
+                    t0 = time.perf_counter()
+                    predict(X, threads)
+                    seconds.append(time.perf_counter() - t0)
+                best[threads] = min(seconds)
+            fastest = min(best.values())
+            winners.append((n_rows, next(t for t in candidates if best[t] <= fastest * (1 + CALIBRATION_MIN_GAIN))))
+            timings[str(n_rows)] = {str(t): round(s, 6) for t, s in best.items()}
+            size_seconds = time.perf_counter() - size_started
+
+        steps = [(0, 1)]
+        for i, (n_rows, _) in enumerate(winners):
+            threads = min(winner for _, winner in winners[i:])
+            if threads > steps[-1][1]:
+                steps.append((n_rows, threads))
+        return cls(budget, steps, calibrated=True, timings=timings)
+
+    def threads_for(self, n_rows: int) -> Tuple[int, str]:
+        """(threads, regime) for a prediction over ``n_rows`` rows, counted in the metrics"""
+        if settings.PREDICT_THREADS > 0:
+            threads, regime = settings.PREDICT_THREADS, "override"
+        else:
+            threads = self.steps[bisect.bisect_right(self._min_rows, n_rows) - 1][1]
+            regime = "serial" if threads == 1 else "parallel"
+        if settings.METRICS_ENABLED:
+            PREDICT_CALLS.inc(1, regime, str(threads))
+            PREDICT_ROWS.inc(n_rows, regime, str(threads))
+        with self._lock:
+            counts = self._counts.setdefault((regime, threads), [0, 0])
+            counts[0] += 1
+            counts[1] += n_rows
+        return threads, regime
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            regimes = [
+                {"regime": regime, "threads": threads, "calls": calls, "rows": rows}
+                for (regime, threads), (calls, rows) in sorted(self._counts.items())
+            ]
+        return {
+            "override": settings.PREDICT_THREADS or None,
+            "budget": self.budget,
+            "cpus": available_cpus(),
+            "calibrated": self.calibrated,
+            "steps": [{"min_rows": min_rows, "threads": threads} for min_rows, threads in self.steps],
+            "calibration_seconds": self.timings,
+            "regimes": regimes,
+        }
+
+    def describe(self) -> str:
+        return ", ".join(f"{threads} thread{'s' if threads > 1 else ''} from {min_rows} rows" for min_rows, threads in self.steps)
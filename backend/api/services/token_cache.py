@@ -0,0 +1,120 @@
+"""
+Token Cache - Verified JWTs mapped to their user
+get_current_user decodes and verifies the bearer token, then looks the user
+up; the result is kept here so a repeated token costs one dict lookup.
+Entries expire with the token's own ``exp`` (or after TOKEN_CACHE_TTL_SECONDS,
+whichever comes first) and are dropped when the user's record changes:
+get_current_user syncs the user store before every lookup, so a change
+made by another worker evicts the user's tokens before they are served.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+from api.config import settings
+
+
+class TokenCache:
+    """Thread-safe LRU of token -> user record, bounded by entry count and TTL"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        # token -> (user record, expires at (unix time))
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tokens_by_email: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """User for a previously verified, still valid token; None on a miss"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            user, expires_at = entry
+            if time.time() >= expires_at:
+                self._remove(token)
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(token)
+            self.hits += 1
+            return user
+
+    def put(self, token: str, user: Dict[str, Any], exp: Optional[float] = None):
+        """Remember a verified token until its ``exp`` claim (capped by the TTL)"""
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            self._remove(token)
+            self._data[token] = (user, expires_at)
+            self._tokens_by_email.setdefault(user["email"], set()).add(token)
+            while len(self._data) > self.max_entries:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def _remove(self, token: str):
+        entry = self._data.pop(token, None)
+        if entry is not None:
+            email = entry[0]["email"]
+            tokens = self._tokens_by_email.get(email)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_email[email]
+
+    def invalidate_user(self, email: str):
+        """Drop every cached token of this user (hooked to user store changes)"""
+        with self._lock:
+            for token in list(self._tokens_by_email.get(email, ())):
+                self._remove(token)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tokens_by_email.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Singleton instance
+_token_cache: Optional[TokenCache] = None
+
+def get_token_cache() -> TokenCache:
+    global _token_cache
+    if _token_cache is None:
+        from api.services.user_store import get_user_store
+
+        _token_cache = TokenCache(settings.TOKEN_CACHE_MAX_ENTRIES, settings.TOKEN_CACHE_TTL_SECONDS)
+        get_user_store().add_listener(_token_cache.invalidate_user)
+    return _token_cache
@@ -0,0 +1,304 @@
+"""
+Tree Engine - Pure-NumPy inference for the LightGBM tree ensemble
+Flattens the booster's trees into node arrays once at load time and walks
+all trees for a whole batch of patients with vectorized array ops. The
+result matches predict_proba (to ~1e-15), but it is slower than LightGBM's
+own C++ traversal: on the checked-in model (576 trees, depth 16) about
+6x for one row and 3x for 20k rows, single-threaded. It is kept as an
+exact, dependency-light reference (and for the model bundle's flat trees),
+not as a way to cut latency.
+"""
+import numpy as np
+from typing import Callable, Dict, Any, Optional, Tuple
+
+
+# LightGBM missing value handling (see LightGBM tree.h, NumericalDecision)
+MISSING_NONE = 0
+MISSING_ZERO = 1
+MISSING_NAN = 2
+_MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+_ZERO_THRESHOLD = 1e-35
+
+# Rows scored per traversal pass; bounds the (rows x trees) working arrays
+DEFAULT_CHUNK_ROWS = 2048
+
+
+class TreeEnsemble:
+    """
+    Flat array representation of a binary LightGBM tree ensemble.
+
+    Every node of every tree lives in the same set of arrays, indexed by a
+    global node id. Leaves have ``feature == -1`` and point to themselves.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        default_left: np.ndarray,
+        missing_type: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features: int,
+        sigmoid: float = 1.0,
+        average_output: bool = False,
+        nan_fill: Optional[np.ndarray] = None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.sigmoid = float(sigmoid)
+        self.average_output = bool(average_output)
+        # Value a NaN takes on splits that don't route missing values (0.0 in LightGBM)
+        self.nan_fill = np.zeros(self.n_features) if nan_fill is None else np.asarray(nan_fill, dtype=np.float64)
+        self._has_zero_missing = bool((missing_type == MISSING_ZERO).any())
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @classmethod
+    def from_booster(cls, booster, num_iteration: Optional[int] = None) -> "TreeEnsemble":
+        """Flatten a lightgbm.Booster (e.g. LGBMClassifier.booster_) into node arrays"""
+        return cls.from_dump(booster.dump_model(num_iteration=num_iteration))
+
+    @classmethod
+    def from_dump(cls, model_dump: Dict[str, Any]) -> "TreeEnsemble":
+        """Flatten the dict returned by Booster.dump_model()"""
+        if model_dump.get("num_tree_per_iteration", 1) != 1:
+            raise ValueError("Only binary (single tree per iteration) models are supported")
+
+        objective = str(model_dump.get("objective", ""))
+        if not objective.startswith("binary"):
+            raise ValueError(f"Unsupported objective: {objective}")
+        sigmoid = 1.0
+        for token in objective.split()[1:]:
+            if token.startswith("sigmoid:"):
+                sigmoid = float(token.split(":", 1)[1])
+
+        feature, threshold, left, right = [], [], [], []
+        value, default_left, missing_type = [], [], []
+        roots = []
+        max_depth = 0
+
+        def add_node() -> int:
+            feature.append(-1)
+            threshold.append(0.0)
+            left.append(-1)
+            right.append(-1)
+            value.append(0.0)
+            default_left.append(False)
+            missing_type.append(MISSING_NONE)
+            return len(feature) - 1
+
+        for tree in model_dump["tree_info"]:
+            root = add_node()
+            roots.append(root)
+            stack = [(tree["tree_structure"], root, 0)]
+            while stack:
+                node, idx, depth = stack.pop()
+                if "leaf_value" in node:
+                    value[idx] = float(node["leaf_value"])
+                    left[idx] = right[idx] = idx
+                    max_depth = max(max_depth, depth)
+                    continue
+                if node.get("decision_type", "<=") != "<=":
+                    raise ValueError("Categorical splits are not supported by the NumPy engine")
+                feature[idx] = int(node["split_feature"])
+                threshold[idx] = float(node["threshold"])
+                default_left[idx] = bool(node.get("default_left", True))
+                missing_type[idx] = _MISSING_TYPES[node.get("missing_type", "None")]
+                left[idx] = add_node()
+                right[idx] = add_node()
+                stack.append((node["left_child"], left[idx], depth + 1))
+                stack.append((node["right_child"], right[idx], depth + 1))
+
+        return cls(
+            feature=np.asarray(feature, dtype=np.int32),
+            threshold=np.asarray(threshold, dtype=np.float64),
+            left=np.asarray(left, dtype=np.int32),
+            right=np.asarray(right, dtype=np.int32),
+            value=np.asarray(value, dtype=np.float64),
+            default_left=np.asarray(default_left, dtype=bool),
+            missing_type=np.asarray(missing_type, dtype=np.int8),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            n_features=int(model_dump.get("max_feature_idx", -1)) + 1,
+            sigmoid=sigmoid,
+            average_output=bool(model_dump.get("average_output", False)),
+        )
+
+    def fold_scaler(self, mean: np.ndarray, scale: np.ndarray) -> "TreeEnsemble":
+        """
+        Equivalent ensemble that takes raw (unscaled) features.
+
+        A split ``(x - mean) / scale <= t`` on StandardScaler output becomes
+        ``x <= t'`` on the raw value, where t' is the largest double for which
+        the scaled comparison still holds. Every input is therefore routed
+        exactly as scaler.transform + the original trees would route it.
+        """
+        if self._has_zero_missing:
+            raise ValueError("Splits treating zero as missing cannot be folded into raw-feature space")
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+
+        internal = np.flatnonzero(self.feature >= 0)
+        feat = self.feature[internal]
+        m, s, t = mean[feat], scale[feat], self.threshold[internal]
+
+        def holds(x):
+            with np.errstate(over="ignore", invalid="ignore"):
+                return (x - m) / s <= t
+
+        # t * s + m is within a few ulps of the boundary; step onto it exactly
+        raw = t * s + m
+        for _ in range(64):
+            too_high = ~holds(raw)
+            if not too_high.any():
+                break
+            raw = np.where(too_high, np.nextafter(raw, -np.inf), raw)
+        for _ in range(64):
+            step = np.nextafter(raw, np.inf)
+            still_holds = holds(step)
+            if not still_holds.any():
+                break
+            raw = np.where(still_holds, step, raw)
+        if not holds(raw).all() or holds(np.nextafter(raw, np.inf)).any():
+            raise ValueError("Could not find exact raw-space thresholds for all splits")
+
+        threshold = self.threshold.copy()
+        threshold[internal] = raw
+        return TreeEnsemble(
+            feature=self.feature,
+            threshold=threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            default_left=self.default_left,
+            missing_type=self.missing_type,
+            roots=self.roots,
+            max_depth=self.max_depth,
+            n_features=self.n_features,
+            sigmoid=self.sigmoid,
+            average_output=self.average_output,
+            # A NaN is 0.0 after scaling, i.e. the feature mean in raw space
+            nan_fill=mean,
+        )
+
+    def boundary_probe(self, n_rows: int, seed: int = 0) -> np.ndarray:
+        """Rows whose values sit exactly on (or one ulp above) this ensemble's split thresholds"""
+        rng = np.random.default_rng(seed)
+        X = rng.normal(0.0, 1.0, size=(n_rows, self.n_features))
+        internal = np.flatnonzero(self.feature >= 0)
+        for j in range(self.n_features):
+            thresholds = self.threshold[internal[self.feature[internal] == j]]
+            if len(thresholds):
+                X[:, j] = rng.choice(thresholds, size=n_rows)
+        upper = rng.random(X.shape) < 0.5
+        return np.where(upper, np.nextafter(X, np.inf), X)
+
+    def _leaf_indices(self, X: np.ndarray) -> np.ndarray:
+        """Global leaf node id reached by every (row, tree) pair, shape (n_rows, n_trees)"""
+        n_rows = X.shape[0]
+        n_trees = self.n_trees
+        node = np.tile(self.roots, n_rows)
+        rows = np.repeat(np.arange(n_rows), n_trees)
+
+        # Missing-value routing only matters for NaNs or "zero as missing" splits
+        check_missing = self._has_zero_missing or bool(np.isnan(X).any())
+
+        # Only (row, tree) pairs still sitting on an internal node are advanced
+        active = np.flatnonzero(self.feature[node] >= 0)
+        while len(active):
+            current = node[active]
+            feat = self.feature[current]
+            fval = X[rows[active], feat]
+
+            if check_missing:
+                mtype = self.missing_type[current]
+                is_nan = np.isnan(fval)
+                fval = np.where(is_nan & (mtype != MISSING_NAN), self.nan_fill[feat], fval)
+                use_default = (
+                    ((mtype == MISSING_ZERO) & (np.abs(fval) <= _ZERO_THRESHOLD))
+                    | ((mtype == MISSING_NAN) & is_nan)
+                )
+                go_left = np.where(use_default, self.default_left[current], fval <= self.threshold[current])
+            else:
+                go_left = fval <= self.threshold[current]
+
+            nxt = np.where(go_left, self.left[current], self.right[current])
+            node[active] = nxt
+            active = active[self.feature[nxt] >= 0]
+
+        return node.reshape(n_rows, n_trees)
+
+    def predict_raw(self, X: np.ndarray, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> np.ndarray:
+        """Raw margin (sum of leaf values) for each row of X"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected a 2-D array with {self.n_features} features, got shape {X.shape}")
+
+        raw = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_rows):
+            stop = min(start + chunk_rows, X.shape[0])
+            leaves = self._leaf_indices(X[start:stop])
+            raw[start:stop] = self.value[leaves].sum(axis=1)
+        if self.average_output and self.n_trees:
+            raw /= self.n_trees
+        return raw
+
+    def predict_probability(self, X: np.ndarray, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> np.ndarray:
+        """P(class 1) for each row of X, as LightGBM's binary objective computes it"""
+        raw = self.predict_raw(X, chunk_rows=chunk_rows)
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * raw))
+
+
+def build_verified(
+    booster,
+    mean: np.ndarray,
+    scale: np.ndarray,
+    transform: Callable[[np.ndarray], np.ndarray],
+    reference: Callable[[np.ndarray], np.ndarray],
+    n_probe: int = 256,
+) -> Tuple[TreeEnsemble, bool, float]:
+    """
+    Flatten ``booster``, fold the scaler into its thresholds when possible and
+    compare it with ``reference`` (P(PD) from LightGBM on scaled rows).
+
+    The probe batch is random rows with missing values plus rows sitting on
+    split thresholds. Returns (ensemble, takes raw features, max |difference|).
+    """
+    tree_engine = TreeEnsemble.from_booster(booster)
+    try:
+        tree_engine = tree_engine.fold_scaler(mean, scale)
+        on_raw = True
+    except ValueError as e:
+        print(f"⚠ Could not fold scaler into tree thresholds ({e}), scaling before prediction")
+        on_raw = False
+
+    rng = np.random.default_rng(0)
+    X_probe = rng.normal(mean, 2.0 * scale, size=(n_probe, tree_engine.n_features))
+    X_probe[rng.random(X_probe.shape) < 0.02] = np.nan
+    X_boundary = tree_engine.boundary_probe(n_probe)
+    if on_raw:
+        X_engine = np.vstack([X_probe, X_boundary])
+        X_scaled = transform(X_engine)
+    else:
+        X_scaled = np.vstack([transform(X_probe), X_boundary])
+        X_engine = X_scaled
+    max_diff = float(np.max(np.abs(tree_engine.predict_probability(X_engine) - reference(X_scaled))))
+    return tree_engine, on_raw, max_diff
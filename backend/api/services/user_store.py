@@ -0,0 +1,242 @@
+"""
+User Store - Email-indexed users with an append-only journal
+Users are loaded once into a dict keyed by email, so authenticating a
+request is a hash lookup instead of re-reading users.json. Sign-ups are
+appended to ``users.json.journal`` (one JSON line each); every
+USER_JOURNAL_COMPACT_EVERY entries the journal is folded into users.json
+(temp file + rename) and started afresh.
+
+Several workers can share the files: writers hold an exclusive fcntl lock
+on ``users.json.lock``, and each worker picks up the others' sign-ups by
+checking the journal's size before a lookup. Compactions are detected by
+a generation counter kept in the lock file (which is never replaced),
+since a renamed-in journal can get the inode number of the one it
+replaced. Listeners (e.g. the token cache) hear about every changed user,
+whichever worker changed it, at the next lookup or sync.
+"""
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from api.config import settings
+
+
+# Width of the generation counter in the lock file (fixed, so rewrites never need a truncate)
+GENERATION_WIDTH = 20
+
+
+class UserExistsError(ValueError):
+    """Raised when registering an email that is already taken"""
+
+
+class UserStore:
+    """users.json snapshot + journal, indexed by email"""
+
+    def __init__(self, path: str, compact_every: int = 1000):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.lock_path = f"{path}.lock"
+        self.compact_every = max(1, int(compact_every))
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._max_id = 0
+        # Compaction generation the index was loaded at, and how much of the journal is in it
+        self._generation = 0
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+        # Kept open for reading / bumping the generation (pread / pwrite, no shared offset)
+        self._generation_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._lock, self._file_lock(fcntl.LOCK_SH):
+            self._reload()
+        print(f"✓ User store loaded: {len(self._users)} users")
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """Call ``callback(email)`` whenever an existing user's record changes"""
+        self._listeners.append(callback)
+
+    def _notify(self, email: str):
+        for callback in self._listeners:
+            callback(email)
+
+    @contextmanager
+    def _file_lock(self, operation: int):
+        """flock on the lock file; a fresh descriptor per call, so threads contend too"""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, operation)
+            yield
+        finally:
+            os.close(fd)  # releases the lock
+
+    def _read_generation(self) -> int:
+        """Compaction generation in the lock file (0 before the first compaction, -1 if unreadable)"""
+        data = os.pread(self._generation_fd, GENERATION_WIDTH, 0)
+        try:
+            return int(data) if data else 0
+        except ValueError:  # read mid-write, or not ours
+            return -1
+
+    def _journal_size(self) -> int:
+        try:
+            return os.stat(self.journal_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _reload(self):
+        """Rebuild the index from the snapshot and the whole journal"""
+        previous = self._users
+        self._users = {}
+        self._max_id = 0
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for user in json.load(f).get("users", []):
+                    self._put(user)
+        self._generation = self._read_generation()
+        self._journal_offset, self._journal_entries = 0, 0
+        self._read_journal()
+        for email, user in previous.items():
+            if self._users.get(email) != user:
+                self._notify(email)
+
+    def _read_journal(self):
+        """Apply journal lines past the current offset (complete lines only)"""
+        try:
+            f = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(self._journal_offset)
+            data = f.read()
+
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                print(f"⚠ Skipping damaged line in {self.journal_path}")
+                continue
+            if entry.get("op") == "put":
+                self._put(entry["user"])
+                self._journal_entries += 1
+        self._journal_offset += end
+
+    def _put(self, user: Dict[str, Any]):
+        previous = self._users.get(user["email"])
+        self._users[user["email"]] = user
+        self._max_id = max(self._max_id, int(user["id"]))
+        if previous is not None and previous != user:
+            self._notify(user["email"])
+
+    def _catch_up(self):
+        """Apply other processes' writes; caller holds the file lock"""
+        size = self._journal_size()
+        if self._read_generation() != self._generation or size < self._journal_offset:
+            # Compacted by another worker (or one that crashed mid-compaction): snapshot changed too
+            self._reload()
+        elif size > self._journal_offset:
+            self._read_journal()
+
+    def _sync(self):
+        if self._journal_size() == self._journal_offset and self._read_generation() == self._generation:
+            return
+        with self._file_lock(fcntl.LOCK_SH):
+            self._catch_up()
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        """User record for this email, or None"""
+        with self._lock:
+            self._sync()
+            return self._users.get(email)
+
+    def sync(self):
+        """Apply other workers' changes now (one stat + one read when there are none), telling the listeners"""
+        with self._lock:
+            self._sync()
+
+    def add(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Register a user and return the stored record (``id`` assigned here).
+        Raises UserExistsError if the email is already registered, including
+        by another worker.
+        """
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._catch_up()
+            if user["email"] in self._users:
+                raise UserExistsError(user["email"])
+
+            record = {"id": self._max_id + 1, **user}
+            self._append(record)
+            return record
+
+    def update(self, email: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Change fields of an existing user (not id / email); None if unknown"""
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._catch_up()
+            user = self._users.get(email)
+            if user is None:
+                return None
+            record = {**user, **changes, "id": user["id"], "email": email}
+            self._append(record)
+            return record
+
+    def _append(self, record: Dict[str, Any]):
+        """Journal one record and apply it; caller holds the exclusive lock"""
+        line = json.dumps({"op": "put", "user": record}) + "\n"
+        with open(self.journal_path, "ab") as f:
+            if f.tell() > self._journal_offset:
+                # Torn last line from a crashed writer: keep ours on its own line
+                line = "\n" + line
+            f.write(line.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        self._catch_up()
+
+        if self._journal_entries >= self.compact_every:
+            self._compact()
+
+    def compact(self):
+        """Fold the journal into users.json now"""
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._catch_up()
+            self._compact()
+
+    def _compact(self):
+        # The generation goes first, so other workers reload even if we crash
+        # part-way; a crash between the two renames only replays journal
+        # entries already in the snapshot
+        self._generation = max(0, self._read_generation()) + 1
+        os.pwrite(self._generation_fd, str(self._generation).zfill(GENERATION_WIDTH).encode("ascii"), 0)
+        users = sorted(self._users.values(), key=lambda user: user["id"])
+        _write_atomic(self.path, json.dumps({"users": users}, indent=2))
+        _write_atomic(self.journal_path, "")
+        self._journal_offset, self._journal_entries = 0, 0
+        print(f"✓ User journal compacted into {self.path} ({len(users)} users)")
+
+
+def _write_atomic(path: str, text: str):
+    """Write to a temp file and rename it over ``path``, so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# Singleton instance
+_user_store: Optional[UserStore] = None
+
+def get_user_store() -> UserStore:
+    global _user_store
+    if _user_store is None:
+        _user_store = UserStore(settings.USERS_FILE, settings.USER_JOURNAL_COMPACT_EVERY)
+    return _user_store
@@ -0,0 +1,131 @@
+"""
+Binary Endpoint Benchmark - /model/predict-binary vs /model/predict-csv
+Scores the same synthetic cohorts through the ASGI app (no network) as a
+pipeline service would: from an in-memory matrix to per-row P(PD), with
+the client-side encoding (CSV text vs the binary matrix / Arrow IPC) and
+response decoding included in the timing. The prediction caches are
+disabled so every run scores every row.
+
+Usage (from backend/):
+    python -m benchmarks.binary [--sizes 1000 10000 100000] [--output binary.json]
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import write_results
+from benchmarks.cohort import cohort_csv
+from benchmarks.pipeline import quiet
+from api.config import settings
+
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def formats() -> List[str]:
+    from api.services.binary_matrix import pyarrow
+
+    return ["csv", "matrix"] + (["arrow"] if pyarrow is not None else [])
+
+
+async def score_once(client, fmt: str, X: np.ndarray, columns: List[str]) -> np.ndarray:
+    """Client-side encode + request + decode; returns P(PD) per row"""
+    from api.client import PREDICT_BINARY_PATH, decode_response, encode_request
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        pd.DataFrame(X, columns=columns).to_csv(buffer, index=False)
+        response = await client.post(
+            "/api/v1/model/predict-csv", files={"file": ("cohort.csv", buffer.getvalue().encode(), "text/csv")}
+        )
+        response.raise_for_status()
+        return np.array([patient["probability"] / 100.0 for patient in response.json()["patients"]])
+    body, headers = encode_request(X, columns, fmt)
+    response = await client.post(PREDICT_BINARY_PATH, content=body, headers=headers)
+    return decode_response(response)[0]
+
+
+async def bench(sizes: List[int], args) -> List[Dict[str, Any]]:
+    import httpx
+    from api.main import app
+    from api.services.executors import shutdown_executors
+    from api.services.model_service import get_model_service
+
+    feature_names = get_model_service().feature_names
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        # Warm-up (spawns the parse processes)
+        warm = np.ones((1, len(feature_names)), dtype=np.float32)
+        with quiet():
+            for fmt in formats():
+                await score_once(client, fmt, warm, feature_names)
+
+        for n_rows in sizes:
+            df = pd.read_csv(cohort_csv(n_rows, seed=args.seed, data_dir=args.data_dir))
+            X = df[feature_names].to_numpy(dtype=np.float32)
+            del df
+            repeats = args.repeats or max(1, min(10, 100_000 // n_rows))
+            metrics = {}
+            reference = None
+            for fmt in formats():
+                timings = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    with quiet():
+                        probabilities = await score_once(client, fmt, X, feature_names)
+                    timings.append(time.perf_counter() - started)
+                if reference is None:
+                    reference = probabilities
+                elif np.abs(probabilities - reference).max() > 1e-4:
+                    raise SystemExit(f"✗ {fmt} disagrees with csv at rows={n_rows}")
+                metrics[f"{fmt}_s"] = statistics.median(timings)
+                metrics[f"{fmt}_rows_per_s"] = n_rows / metrics[f"{fmt}_s"]
+            for fmt in formats()[1:]:
+                metrics[f"{fmt}_speedup"] = metrics["csv_s"] / metrics[f"{fmt}_s"]
+            results.append({
+                "key": f"rows={n_rows}",
+                "rows": n_rows,
+                "repeats": repeats,
+                "metrics": {name: round(value, 6) for name, value in metrics.items()},
+            })
+    shutdown_executors()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of /model/predict-binary vs /model/predict-csv")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeats", type=int, default=0, help="runs per size (default: more for small cohorts)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    if args.data_dir is None:
+        from benchmarks.cohort import DEFAULT_DATA_DIR
+        args.data_dir = DEFAULT_DATA_DIR
+
+    settings.ROW_CACHE_MAX_MB = 0
+    settings.RESPONSE_CACHE_MAX_MB = 0
+    settings.MODEL_BUNDLE_PATH = ""
+
+    results = asyncio.run(bench(sorted(args.sizes), args))
+    for result in results:
+        m = result["metrics"]
+        line = "  ".join(f"{fmt} {m[f'{fmt}_rows_per_s']:10.0f} rows/s" for fmt in formats())
+        print(f"{result['key']:14s} {line}")
+
+    write_results(args.output, "binary", {
+        "sizes": sorted(args.sizes),
+        "formats": formats(),
+        "engine": settings.INFERENCE_ENGINE,
+    }, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Synthetic Cohorts - Patient x biomarker CSVs for benchmarks
+Values are log-normal per biomarker, matched to the saved scaler's mean and
+standard deviation, so the model sees realistic inputs. Columns are
+patient_id, the 50 seq_* features from feature_protein_mapping.csv (in that
+order) and an unused ``age`` column, as in real uploads. ``extra_columns``
+adds unused seq_* columns after them, like a full SomaScan panel export.
+
+Usage (from backend/):
+    python -m benchmarks.cohort ROWS [OUTPUT.csv] [--seed 0] [--missing-rate 0.0] [--extra-columns 0]
+"""
+import argparse
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import BACKEND_DIR  # noqa: F401  (puts backend/ on sys.path)
+
+
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "parkinsons-benchmarks")
+WRITE_CHUNK_ROWS = 100_000
+
+
+def feature_stats() -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Feature names with the saved scaler's mean / scale (offline, from the checked-in artifacts)"""
+    from api.services.model_service import get_model_service
+
+    model_service = get_model_service()
+    return model_service.feature_names, model_service.scaler_mean, model_service.scaler_scale
+
+
+def make_features(n_rows: int, mean: np.ndarray, scale: np.ndarray, seed: int = 0, missing_rate: float = 0.0) -> np.ndarray:
+    """(n_rows, n_features) positive values with the given per-feature mean / std"""
+    rng = np.random.default_rng(seed)
+    mean = np.maximum(np.asarray(mean, dtype=np.float64), 1e-6)
+    sigma2 = np.log1p((np.asarray(scale, dtype=np.float64) / mean) ** 2)
+    X = rng.lognormal(np.log(mean) - sigma2 / 2, np.sqrt(sigma2), size=(n_rows, len(mean)))
+    if missing_rate > 0:
+        X[rng.random(X.shape) < missing_rate] = np.nan
+    return X
+
+
+def infer_payload(feature_names: List[str], seed: int = 0) -> Dict[str, Any]:
+    """Request body for /model/infer with one synthetic patient"""
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(7, 1, len(feature_names))
+    return {"proteomics": [{"name": name, "value": float(v)} for name, v in zip(feature_names, values)]}
+
+
+def make_cohort(n_rows: int, seed: int = 0, missing_rate: float = 0.0, extra_columns: int = 0) -> pd.DataFrame:
+    feature_names, mean, scale = feature_stats()
+    X = make_features(n_rows, mean, scale, seed, missing_rate)
+    df = pd.DataFrame(X, columns=feature_names)
+    df.insert(0, "patient_id", [f"P{i:07d}" for i in range(1, n_rows + 1)])
+    df["age"] = np.random.default_rng(seed + 1).integers(40, 90, n_rows)
+    if extra_columns:
+        # Unused panel proteins, same value range as the model's features
+        extra_mean = np.resize(mean, extra_columns)
+        extra_scale = np.resize(scale, extra_columns)
+        extra = make_features(n_rows, extra_mean, extra_scale, seed + 2, missing_rate)
+        extra_names = [f"seq_{90000 + i}_{i % 97 + 1}" for i in range(extra_columns)]
+        df = pd.concat([df, pd.DataFrame(extra, columns=extra_names, index=df.index)], axis=1)
+    return df
+
+
+def write_cohort_csv(path: str, n_rows: int, seed: int = 0, missing_rate: float = 0.0, extra_columns: int = 0):
+    """Write the cohort in chunks so 1M-row files don't need the whole frame as text"""
+    tmp_path = f"{path}.tmp"
+    for start in range(0, max(n_rows, 1), WRITE_CHUNK_ROWS):
+        rows = min(WRITE_CHUNK_ROWS, n_rows - start)
+        chunk = make_cohort(rows, seed + start, missing_rate, extra_columns)
+        chunk["patient_id"] = [f"P{i:07d}" for i in range(start + 1, start + rows + 1)]
+        chunk.to_csv(tmp_path, mode="w" if start == 0 else "a", header=start == 0, index=False, float_format="%.4f")
+    os.replace(tmp_path, path)
+
+
+def cohort_csv(
+    n_rows: int, seed: int = 0, missing_rate: float = 0.0, data_dir: str = DEFAULT_DATA_DIR, extra_columns: int = 0
+) -> str:
+    """Path of a cached synthetic cohort CSV, generated on first use"""
+    os.makedirs(data_dir, exist_ok=True)
+    wide = f"_w{extra_columns}" if extra_columns else ""
+    path = os.path.join(data_dir, f"cohort_{n_rows}_s{seed}_m{missing_rate:g}{wide}.csv")
+    if not os.path.exists(path):
+        write_cohort_csv(path, n_rows, seed, missing_rate, extra_columns)
+    return path
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Write a synthetic cohort CSV")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--missing-rate", type=float, default=0.0)
+    parser.add_argument("--extra-columns", type=int, default=0, help="unused seq_* columns (wide panel exports)")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        write_cohort_csv(args.output, args.rows, args.seed, args.missing_rate, args.extra_columns)
+        path = args.output
+    else:
+        path = cohort_csv(args.rows, args.seed, args.missing_rate, extra_columns=args.extra_columns)
+    print(f"✓ {args.rows} patients written to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
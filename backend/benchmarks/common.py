@@ -0,0 +1,110 @@
+"""
+Benchmark Helpers - Stage timing, memory tracking and result files
+Results are JSON documents: the benchmark name, the environment they were
+measured in, the run configuration and a list of entries, each with a
+``key`` (e.g. "rows=10000") and flat ``metrics`` that compare.py diffs.
+"""
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+class StageRecorder:
+    """Accumulates wall time (and optionally tracemalloc peak) per named stage"""
+
+    def __init__(self, track_memory: bool = False):
+        self.track_memory = track_memory
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.peak_mb: Dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name: str):
+        if self.track_memory:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+            if self.track_memory:
+                peak = tracemalloc.get_traced_memory()[1] / 1e6
+                self.peak_mb[name] = max(self.peak_mb[name], peak)
+
+
+@contextmanager
+def tracing_memory():
+    """tracemalloc on for the duration (peaks are Python + NumPy allocations)"""
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+
+def rss_peak_mb() -> float:
+    """Peak resident set size of this process so far"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def environment() -> Dict[str, Any]:
+    """Where the numbers came from: interpreter, libraries, machine, commit"""
+    import numpy
+    import pandas
+
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+    }
+    try:
+        import lightgbm
+        info["lightgbm"] = lightgbm.__version__
+    except ImportError:
+        pass
+    try:
+        info["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def write_results(path: Optional[str], benchmark: str, config: Dict[str, Any], results: List[Dict[str, Any]]):
+    """Write a result document (no-op without a path)"""
+    if not path:
+        return
+    document = {
+        "benchmark": benchmark,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": environment(),
+        "config": config,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"✓ Results written to {path}")
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_s") or metric.endswith("_speedup")
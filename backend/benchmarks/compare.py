@@ -0,0 +1,73 @@
+"""
+Compare Benchmarks - Diff two result files and flag regressions
+Matches entries by key and metric name; timings and memory are better when
+lower, throughput (``*_per_s``) and speedups when higher. Exits with status
+1 when any metric regressed by more than the threshold.
+
+Usage (from backend/):
+    python -m benchmarks.compare BASELINE.json CURRENT.json [--threshold 0.10]
+"""
+import argparse
+import sys
+from typing import Any, Dict, List
+
+from benchmarks.common import higher_is_better, load_results
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """One row per metric present in both files, with the relative change and a regression flag"""
+    base_entries = {entry["key"]: entry["metrics"] for entry in baseline["results"]}
+    rows = []
+    for entry in current["results"]:
+        base_metrics = base_entries.get(entry["key"])
+        if base_metrics is None:
+            continue
+        for metric, value in entry["metrics"].items():
+            base = base_metrics.get(metric)
+            if base is None or not base:
+                continue
+            change = (value - base) / abs(base)
+            worse = -change if higher_is_better(metric) else change
+            rows.append({
+                "key": entry["key"],
+                "metric": metric,
+                "baseline": base,
+                "current": value,
+                "change": change,
+                "regression": worse > threshold,
+            })
+    return rows
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    parser.add_argument("--metrics", nargs="*", help="only these metrics (default: all)")
+    args = parser.parse_args(argv)
+
+    baseline, current = load_results(args.baseline), load_results(args.current)
+    if baseline.get("benchmark") != current.get("benchmark"):
+        print(f"⚠ Comparing different benchmarks: {baseline.get('benchmark')} vs {current.get('benchmark')}")
+
+    rows = compare(baseline, current, args.threshold)
+    if args.metrics:
+        rows = [row for row in rows if row["metric"] in args.metrics]
+    for row in rows:
+        flag = "⚠ REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['key']:32s} {row['metric']:22s} {row['baseline']:14.6g} -> {row['current']:14.6g} "
+            f"{row['change'] * 100:+8.1f}%  {flag}"
+        )
+
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"⚠ {len(regressions)} metric(s) regressed by more than {args.threshold * 100:.0f}%")
+        return 1
+    print(f"✓ No regressions above {args.threshold * 100:.0f}% ({len(rows)} metrics compared)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
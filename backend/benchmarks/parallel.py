@@ -0,0 +1,179 @@
+"""
+Parallel Scoring Benchmark - ModelService.predict scaling from 1 to N processes
+Scores one synthetic cohort through ModelService.predict serially (1) and
+chunked across the shared-memory scoring pool (services/parallel_scoring.py)
+with 2..N processes, checks every parallel result equals the serial one, and
+records the scaling curve (time, rows/s, speedup, efficiency). Pool start-up
+(spawning processes, loading the model) is timed separately. The row cache
+is disabled so every run scores every row.
+
+--crash-check instead kills pool processes (between batches and during
+one) and checks the next batch is scored by a fresh pool, with the same
+result.
+
+Usage (from backend/):
+    python -m benchmarks.parallel [--rows 200000] [--processes 1 2 4 8] [--compact] [--output parallel.json]
+    python -m benchmarks.parallel --crash-check [--rows 200000]
+"""
+import argparse
+import os
+import signal
+import statistics
+import threading
+import time
+from typing import Any, Dict, List
+
+from benchmarks.common import write_results
+from benchmarks.cohort import make_cohort
+from benchmarks.pipeline import quiet
+from api.config import settings
+
+
+def default_processes() -> List[int]:
+    """1, 2, 4, ... up to the CPU count (always including it)"""
+    from api.services.thread_policy import available_cpus, candidate_threads
+
+    return candidate_threads(available_cpus())
+
+
+def bench(model_service, df, processes: List[int], args) -> List[Dict[str, Any]]:
+    from api.services.executors import shutdown_executors
+
+    results = []
+    serial = None
+    serial_s = None
+    for n_processes in processes:
+        shutdown_executors()  # a pool of the new size
+        settings.PARALLEL_SCORING_MIN_ROWS = 0 if n_processes == 1 else 1
+        settings.PARALLEL_SCORING_PROCESSES = n_processes
+
+        startup_s = 0.0
+        if n_processes > 1:
+            started = time.perf_counter()
+            with quiet():
+                model_service.predict(df.head(n_processes), args.compact)
+            startup_s = time.perf_counter() - started
+
+        timings = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            with quiet():
+                result = model_service.predict(df, args.compact)
+            timings.append(time.perf_counter() - started)
+        if serial is None:
+            serial = result
+        elif result != serial:
+            raise SystemExit(f"✗ {n_processes} processes: result differs from the serial path")
+        del result
+
+        seconds = statistics.median(timings)
+        if serial_s is None:
+            serial_s = seconds
+        speedup = serial_s / seconds
+        results.append({
+            "key": f"processes={n_processes}",
+            "processes": n_processes,
+            "rows": len(df),
+            "metrics": {
+                "seconds": round(seconds, 6),
+                "rows_per_s": round(len(df) / seconds, 1),
+                "speedup": round(speedup, 4),
+                "efficiency": round(speedup / n_processes, 4),
+                "pool_startup_s": round(startup_s, 6),
+            },
+        })
+    shutdown_executors()
+    return results
+
+
+def kill_pool_process():
+    """SIGKILL one process of the scoring pool (as the OOM killer would) and wait until the pool notices"""
+    from api.services import executors
+
+    executor = executors.get_scoring_executor()
+    os.kill(next(iter(executor._processes)), signal.SIGKILL)
+    deadline = time.monotonic() + 10
+    while not executor._broken and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def check_recovery(model_service, df):
+    """Scoring recovers from dead pool processes: killed between batches, and during one"""
+    from api.services.executors import WorkerCrashed, shutdown_executors
+
+    X, _ = model_service._select_features(df)
+    settings.PARALLEL_SCORING_MIN_ROWS = 0
+    expected = model_service.score_matrix(X)
+    settings.PARALLEL_SCORING_MIN_ROWS = 1
+    settings.PARALLEL_SCORING_PROCESSES = max(2, settings.PARALLEL_SCORING_PROCESSES)
+
+    def score(label):
+        probabilities = model_service.score_matrix(X)
+        if not (probabilities == expected).all():
+            raise SystemExit(f"✗ {label}: result differs from the serial path")
+
+    with quiet():
+        score("warm-up")  # starts the pool
+
+        kill_pool_process()
+        score("after a process died between batches")
+    print("✓ A process killed between batches: the next batch went to a fresh pool")
+
+    with quiet():
+        killer = threading.Timer(0.05, kill_pool_process)
+        killer.start()
+        try:
+            score("during the kill")
+            crashed = False
+        except WorkerCrashed:
+            crashed = True
+        killer.join()
+        score("after a process died during a batch")
+    print(f"✓ A process killed during a batch ({'WorkerCrashed' if crashed else 'finished first'}): the next batch went to a fresh pool")
+    shutdown_executors()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ModelService.predict scaling across the parallel scoring pool")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--processes", type=int, nargs="+", default=None, help="default: 1, 2, 4, ... CPUs")
+    parser.add_argument("--chunk-rows", type=int, default=settings.PARALLEL_SCORING_CHUNK_ROWS)
+    parser.add_argument("--compact", action="store_true", help="compact patient results (no feature values)")
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--crash-check", action="store_true", help="check recovery from killed pool processes instead")
+    args = parser.parse_args()
+    processes = sorted(set(args.processes or default_processes()) | {1})
+
+    from api.services.model_service import get_model_service
+
+    settings.ROW_CACHE_MAX_MB = 0
+    os.environ["ROW_CACHE_MAX_MB"] = "0"  # pool processes read their settings from the environment
+    settings.PARALLEL_SCORING_CHUNK_ROWS = args.chunk_rows
+    with quiet():
+        model_service = get_model_service()
+    df = make_cohort(args.rows, seed=args.seed)
+    if args.crash_check:
+        check_recovery(model_service, df)
+        return
+
+    results = bench(model_service, df, processes, args)
+    for result in results:
+        m = result["metrics"]
+        print(
+            f"{result['key']:14s} {m['seconds']:8.2f} s  {m['rows_per_s']:10.0f} rows/s  "
+            f"speedup {m['speedup']:5.2f}x  efficiency {m['efficiency']:5.0%}  (pool start {m['pool_startup_s']:.1f} s)"
+        )
+
+    write_results(args.output, "parallel", {
+        "rows": args.rows,
+        "processes": processes,
+        "chunk_rows": args.chunk_rows,
+        "compact": args.compact,
+        "contribution_method": settings.CONTRIBUTION_METHOD,
+    }, results)
+
+
+if __name__ == "__main__":
+    main()
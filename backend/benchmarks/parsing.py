@@ -0,0 +1,144 @@
+"""
+Parsing Benchmark - Full vs column-projected CSV parsing on wide uploads
+Parses synthetic cohorts with extra unused seq_* columns (full SomaScan
+panel exports) the way /model/predict-csv used to (every column, pandas
+defaults) and the way it does now (header check, then only the model's
+features as CSV_PARSE_DTYPE, with the C and, if installed, pyarrow engines).
+Records wall time and tracemalloc peak per mode, and how far P(PD) moves
+when the features are parsed as float32 instead of float64 (the opt-in
+CSV_PARSE_DTYPE / CSV_STREAM_DTYPE saving).
+
+Usage (from backend/):
+    python -m benchmarks.parsing [--rows 10000] [--extra-columns 0 1000 5000] [--output parsing.json]
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.common import tracing_memory, write_results
+from benchmarks.cohort import cohort_csv
+from api.config import settings
+from api.services.parsing import HAS_PYARROW, read_csv_columns, read_upload
+
+
+def parse_full(contents: bytes, feature_names: List[str]):
+    df = read_upload(contents, "cohort.csv")
+    return df[feature_names]
+
+
+def parse_projected(engine: str):
+    def parse(contents: bytes, feature_names: List[str]):
+        missing = set(feature_names) - set(read_csv_columns(contents))
+        assert not missing
+        return read_upload(contents, "cohort.csv", feature_names, settings.CSV_PARSE_DTYPE, engine)
+    return parse
+
+
+def modes() -> Dict[str, Any]:
+    parsers = {"full": parse_full, "projected_c": parse_projected("c")}
+    if HAS_PYARROW:
+        parsers["projected_pyarrow"] = parse_projected("pyarrow")
+    return parsers
+
+
+def float32_drift(contents: bytes, feature_names: List[str]) -> Dict[str, float]:
+    """Max |P(PD) float32 - P(PD) float64| and how many patients' P(PD) / prediction / risk level change"""
+    from api.services.model_service import get_model_service
+    from api.services.result_builder import risk_levels
+
+    model_service = get_model_service()
+    probabilities = {}
+    for dtype in ("float64", "float32"):
+        X = read_upload(contents, "cohort.csv", feature_names, dtype, "c")[feature_names].to_numpy(np.float64)
+        probabilities[dtype] = model_service._score_probabilities(X)
+    p64, p32 = probabilities["float64"], probabilities["float32"]
+    return {
+        "float32_max_abs_dp": float(np.max(np.abs(p32 - p64))),
+        "float32_changed": int((p32 != p64).sum()),
+        "float32_prediction_flips": int(((p32 >= 0.5) != (p64 >= 0.5)).sum()),
+        "float32_risk_level_flips": int((risk_levels(p32) != risk_levels(p64)).sum()),
+    }
+
+
+def bench_width(feature_names: List[str], n_rows: int, extra_columns: int, args) -> Dict[str, Any]:
+    path = cohort_csv(n_rows, seed=args.seed, data_dir=args.data_dir, extra_columns=extra_columns)
+    with open(path, "rb") as f:
+        contents = f.read()
+
+    metrics = {}
+    for name, parse in modes().items():
+        timings = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            df = parse(contents, feature_names)
+            timings.append(time.perf_counter() - started)
+        assert df.shape == (n_rows, len(feature_names))
+        del df
+        with tracing_memory():
+            parse(contents, feature_names)
+            peak = tracemalloc.get_traced_memory()[1]
+        metrics[f"{name}_s"] = statistics.median(timings)
+        metrics[f"{name}_peak_mb"] = peak / 1e6
+        metrics[f"{name}_rows_per_s"] = n_rows / metrics[f"{name}_s"]
+    for name in modes():
+        if name != "full":
+            metrics[f"{name}_speedup"] = metrics["full_s"] / metrics[f"{name}_s"]
+    if args.drift:
+        metrics.update(float32_drift(contents, feature_names))
+
+    return {
+        "key": f"rows={n_rows},extra_columns={extra_columns}",
+        "rows": n_rows,
+        "columns": len(feature_names) + 2 + extra_columns,
+        "csv_mb": round(len(contents) / 1e6, 2),
+        "metrics": {name: round(value, 6) for name, value in metrics.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full vs column-projected CSV parsing")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--extra-columns", type=int, nargs="+", default=[0, 1000, 5000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--no-drift", dest="drift", action="store_false", help="skip the float32 P(PD) drift check")
+    args = parser.parse_args()
+    if args.data_dir is None:
+        from benchmarks.cohort import DEFAULT_DATA_DIR
+        args.data_dir = DEFAULT_DATA_DIR
+
+    from benchmarks.cohort import feature_stats
+    feature_names = feature_stats()[0]
+
+    results = []
+    for extra_columns in sorted(args.extra_columns):
+        result = bench_width(feature_names, args.rows, extra_columns, args)
+        results.append(result)
+        m = result["metrics"]
+        line = "  ".join(
+            f"{name} {m[f'{name}_s'] * 1000:8.1f} ms / {m[f'{name}_peak_mb']:7.1f} MB" for name in modes()
+        )
+        print(f"{result['key']:30s} ({result['csv_mb']:7.1f} MB csv)  {line}")
+        if args.drift:
+            print(
+                f"{'':30s} float32 vs float64: max |dP(PD)| {m['float32_max_abs_dp']:.3g}, "
+                f"{m['float32_changed']} patients changed, {m['float32_prediction_flips']} prediction / "
+                f"{m['float32_risk_level_flips']} risk level flips"
+            )
+
+    write_results(args.output, "parsing", {
+        "rows": args.rows,
+        "extra_columns": sorted(args.extra_columns),
+        "pyarrow": HAS_PYARROW,
+        "dtype": settings.CSV_PARSE_DTYPE,
+    }, results)
+
+
+if __name__ == "__main__":
+    main()
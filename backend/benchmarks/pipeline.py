@@ -0,0 +1,246 @@
+"""
+Pipeline Benchmark - Per-stage timings and peak memory for batch prediction
+Runs the /model/predict-csv pipeline on synthetic cohorts stage by stage
+(parse, validate, scale, predict, contributions, build, serialize), then the
+routes themselves in-process, and stores the results as JSON for
+benchmarks/compare.py. Runs offline against the checked-in pickles; the
+prediction caches are disabled so every run scores every row.
+
+Above --block-rows, build + serialize run block by block (as the streaming
+route does); whole-response JSON for a million patients doesn't fit in memory.
+
+Usage (from backend/):
+    python -m benchmarks.pipeline [--sizes 1 100 10000 1000000] [--output results.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.common import StageRecorder, rss_peak_mb, tracing_memory, write_results
+from benchmarks.cohort import cohort_csv, infer_payload
+from api.config import settings
+
+
+STAGES = ("parse", "validate", "scale", "predict", "contributions", "build", "serialize")
+DEFAULT_SIZES = (1, 100, 10_000, 1_000_000)
+
+
+def configure(args):
+    """Benchmark settings must be in place before the model service is created"""
+    settings.ROW_CACHE_MAX_MB = 0
+    settings.RESPONSE_CACHE_MAX_MB = 0
+    if not args.bundle:
+        settings.MODEL_BUNDLE_PATH = ""
+    if args.engine:
+        settings.INFERENCE_ENGINE = args.engine
+    if args.contributions:
+        settings.CONTRIBUTION_METHOD = args.contributions
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the service's per-request log lines while timing"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def run_pipeline(model_service, contents: bytes, recorder: StageRecorder, block_rows: int):
+    """One pass of the batch pipeline with each stage timed separately"""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from api.routes.prediction import PredictionResponse
+    from api.services.parsing import read_upload
+    from api.services.result_builder import summarize, top_k_indices
+
+    feature_names = model_service.feature_names
+    builder = model_service._get_result_builder(feature_names)
+
+    with recorder.stage("parse"):
+        df = read_upload(contents, "cohort.csv", feature_names, settings.CSV_PARSE_DTYPE, settings.CSV_PARSE_ENGINE)
+    with recorder.stage("validate"):
+        model_service.validate_columns(list(df.columns))
+        X = df[feature_names].to_numpy(dtype=np.float64)
+    del df
+    with recorder.stage("scale"):
+        X_scaled = model_service.transform(X)
+    with recorder.stage("predict"):
+        tree_engine = model_service._get_tree_engine()
+        if tree_engine is not None:
+            X_engine = X if model_service._tree_engine_on_raw else X_scaled
+            probabilities = tree_engine.predict_probability(X_engine)
+        else:
+            probabilities = model_service._get_booster().predict(X_scaled)
+    with recorder.stage("contributions"):
+        if settings.CONTRIBUTION_METHOD.lower() == "shap":
+            _, top = model_service.explain(X_scaled, top_k=builder.top_k)
+        else:
+            contributions = builder.contributions(X_scaled)
+            top_idx = top_k_indices(np.abs(contributions), builder.top_k)
+            top = (top_idx, np.take_along_axis(contributions, top_idx, axis=1))
+            del contributions
+
+    n_rows = len(X)
+    summary = summarize(n_rows, int((probabilities >= 0.5).sum()), float(np.mean(probabilities)) if n_rows else 0.0)
+    body_bytes = 0
+    for start in range(0, n_rows, block_rows):
+        stop = min(start + block_rows, n_rows)
+        with recorder.stage("build"):
+            patients = builder.build(
+                X[start:stop], probabilities[start:stop], X_scaled=X_scaled[start:stop],
+                top_contributions=(top[0][start:stop], top[1][start:stop]), patient_id_offset=start,
+            )
+        with recorder.stage("serialize"):
+            result = model_service.build_response(patients, summary, feature_names)
+            body_bytes += len(JSONResponse(content=jsonable_encoder(PredictionResponse(**result))).body)
+        del patients, result
+    return body_bytes
+
+
+def bench_size(model_service, n_rows: int, args) -> Dict[str, Any]:
+    path = cohort_csv(n_rows, seed=args.seed, data_dir=args.data_dir, extra_columns=args.extra_columns)
+    with open(path, "rb") as f:
+        contents = f.read()
+    block_rows = n_rows if n_rows <= args.block_rows else args.block_rows
+    repeats = args.repeats or max(1, min(20, 10_000 // max(n_rows, 1)))
+
+    runs = []
+    for _ in range(repeats):
+        recorder = StageRecorder()
+        with quiet():
+            body_bytes = run_pipeline(model_service, contents, recorder, block_rows)
+        runs.append(recorder.seconds)
+
+    metrics = {f"{stage}_s": statistics.median(run[stage] for run in runs) for stage in STAGES}
+    metrics["total_s"] = sum(metrics[f"{stage}_s"] for stage in STAGES)
+    metrics["rows_per_s"] = n_rows / metrics["total_s"] if metrics["total_s"] > 0 else 0.0
+
+    if args.memory:
+        recorder = StageRecorder(track_memory=True)
+        with tracing_memory(), quiet():
+            run_pipeline(model_service, contents, recorder, block_rows)
+        metrics.update({f"{stage}_peak_mb": recorder.peak_mb[stage] for stage in STAGES})
+    metrics["rss_peak_mb"] = rss_peak_mb()
+
+    return {
+        "key": f"rows={n_rows}",
+        "rows": n_rows,
+        "repeats": repeats,
+        "build_mode": "blocked" if block_rows < n_rows else "whole",
+        "csv_mb": round(len(contents) / 1e6, 2),
+        "response_mb": round(body_bytes / 1e6, 2),
+        "metrics": {name: round(value, 6) for name, value in metrics.items()},
+    }
+
+
+async def bench_routes(sizes: List[int], args) -> List[Dict[str, Any]]:
+    """End-to-end /model/predict-csv and /model/infer through the ASGI app (no network)"""
+    import httpx
+    from api.main import app
+    from api.services.executors import shutdown_executors
+    from api.services.model_service import get_model_service
+
+    feature_names = get_model_service().feature_names
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def predict_csv(contents: bytes) -> float:
+            started = time.perf_counter()
+            response = await client.post("/api/v1/model/predict-csv", files={"file": ("cohort.csv", contents, "text/csv")})
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        # Warm-up (spawns the parse processes)
+        with open(cohort_csv(1, seed=args.seed, data_dir=args.data_dir), "rb") as f, quiet():
+            await predict_csv(f.read())
+
+        for n_rows in sizes:
+            if n_rows > args.route_max_rows:
+                continue
+            with open(cohort_csv(n_rows, seed=args.seed, data_dir=args.data_dir, extra_columns=args.extra_columns), "rb") as f:
+                contents = f.read()
+            repeats = args.repeats or max(1, min(20, 10_000 // max(n_rows, 1)))
+            with quiet():
+                timings = [await predict_csv(contents) for _ in range(repeats)]
+            results.append({
+                "key": f"route=predict-csv,rows={n_rows}",
+                "rows": n_rows,
+                "repeats": repeats,
+                "metrics": {"route_s": round(statistics.median(timings), 6), "rows_per_s": round(n_rows / statistics.median(timings), 2)},
+            })
+
+        payload = infer_payload(feature_names, args.seed)
+        latencies = []
+        for _ in range(args.infer_requests):
+            started = time.perf_counter()
+            response = await client.post("/api/v1/model/infer", json=payload)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000.0)
+        p50, p95 = np.percentile(latencies, [50, 95])
+        results.append({
+            "key": "route=infer",
+            "rows": 1,
+            "repeats": args.infer_requests,
+            "metrics": {"latency_p50_ms": round(float(p50), 4), "latency_p95_ms": round(float(p95), 4)},
+        })
+    shutdown_executors()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage benchmark of the batch prediction pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeats", type=int, default=0, help="runs per size (default: more for small cohorts)")
+    parser.add_argument("--block-rows", type=int, default=50_000, help="build/serialize block size for large cohorts")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc pass")
+    parser.add_argument("--no-routes", dest="routes", action="store_false", help="skip the in-process route benchmark")
+    parser.add_argument("--route-max-rows", type=int, default=10_000)
+    parser.add_argument("--infer-requests", type=int, default=200)
+    parser.add_argument("--engine", choices=["lightgbm", "numpy"])
+    parser.add_argument("--contributions", choices=["importance", "shap"])
+    parser.add_argument("--bundle", action="store_true", help="use the model bundle if present instead of the pickles")
+    parser.add_argument("--extra-columns", type=int, default=0, help="unused seq_* columns per row (wide panel exports)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    if args.data_dir is None:
+        from benchmarks.cohort import DEFAULT_DATA_DIR
+        args.data_dir = DEFAULT_DATA_DIR
+
+    configure(args)
+    from api.services.model_service import get_model_service
+    model_service = get_model_service()
+
+    results = []
+    for n_rows in sorted(args.sizes):
+        result = bench_size(model_service, n_rows, args)
+        results.append(result)
+        m = result["metrics"]
+        stages = "  ".join(f"{stage} {m[f'{stage}_s'] * 1000:9.2f}" for stage in STAGES)
+        print(f"rows={n_rows:<8d} ms: {stages}  | total {m['total_s']:8.3f}s  {m['rows_per_s']:10.0f} rows/s  rss {m['rss_peak_mb']:.0f} MB")
+
+    if args.routes:
+        for result in asyncio.run(bench_routes(sorted(args.sizes), args)):
+            results.append(result)
+            print(f"{result['key']:32s} " + "  ".join(f"{k} {v}" for k, v in result["metrics"].items()))
+
+    write_results(args.output, "pipeline", {
+        "sizes": sorted(args.sizes),
+        "block_rows": args.block_rows,
+        "extra_columns": args.extra_columns,
+        "csv_parse": f"{settings.CSV_PARSE_ENGINE}/{settings.CSV_PARSE_DTYPE}",
+        "engine": settings.INFERENCE_ENGINE,
+        "contributions": settings.CONTRIBUTION_METHOD,
+        "model_version": model_service.model_version,
+        "model_format": "bundle" if model_service.bundle is not None else "pickle",
+    }, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Pre-fork Benchmark - Per-worker memory and first-request latency
+Starts the API with the current setup (uvicorn --workers, model loaded lazily
+in every worker) and with the pre-fork launcher (python -m api.server), then
+compares per-worker RSS / PSS / private memory and the latency of the first
+requests each server answers.
+
+Usage (from backend/):
+    python -m benchmarks.prefork [--workers 2] [--requests 8] [--output prefork.json]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+
+from benchmarks.common import BACKEND_DIR, write_results
+from benchmarks.cohort import infer_payload
+from api.services.model_bundle import read_feature_mapping
+
+
+SERVERS = {
+    "uvicorn": lambda port, workers: [
+        sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1",
+        "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ],
+    "prefork": lambda port, workers: [
+        sys.executable, "-m", "api.server", "--host", "127.0.0.1",
+        "--port", str(port), "--workers", str(workers),
+    ],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_memory(pid: int) -> Dict[str, float]:
+    """RSS, PSS (shared pages split between sharers) and private memory in MB, from /proc"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1]) / 1024.0
+    return {
+        "rss_mb": round(fields.get("Rss", 0.0), 1),
+        "pss_mb": round(fields.get("Pss", 0.0), 1),
+        "private_mb": round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1),
+        "shared_mb": round(fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0), 1),
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        if ppid == pid and b"resource_tracker" not in cmdline:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def wait_until_up(url: str, timeout: float = 120.0) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            httpx.get(f"{url}/", timeout=1.0)
+            return time.perf_counter() - started
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Server at {url} did not come up within {timeout:g}s")
+
+
+def timed_requests(url: str, payload: Dict[str, Any], n: int) -> List[float]:
+    """Latency (ms) of n concurrent /model/infer requests"""
+    def one(_):
+        started = time.perf_counter()
+        response = httpx.post(f"{url}/api/v1/model/infer", json=payload, timeout=120.0)
+        response.raise_for_status()
+        return (time.perf_counter() - started) * 1000.0
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return sorted(pool.map(one, range(n)))
+
+
+def run_server(name: str, workers: int, n_requests: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen(
+        SERVERS[name](port, workers), cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        startup_s = wait_until_up(url)
+        first = timed_requests(url, payload, n_requests)
+        # Make sure every worker has served (and therefore loaded the model)
+        for _ in range(3):
+            timed_requests(url, payload, n_requests)
+        steady = timed_requests(url, payload, n_requests)
+
+        master = process_memory(proc.pid)
+        worker_memory = [process_memory(pid) for pid in child_pids(proc.pid)]
+        return {
+            "key": f"server={name}",
+            "workers": workers,
+            "master": master,
+            "worker_memory": worker_memory,
+            "metrics": {
+                "startup_s": round(startup_s, 3),
+                "first_request_max_ms": round(first[-1], 1),
+                "first_request_median_ms": round(float(np.median(first)), 1),
+                "steady_request_median_ms": round(float(np.median(steady)), 1),
+                "worker_rss_mean_mb": round(float(np.mean([m["rss_mb"] for m in worker_memory])), 1),
+                "worker_private_mean_mb": round(float(np.mean([m["private_mb"] for m in worker_memory])), 1),
+                "total_pss_mb": round(master["pss_mb"] + sum(m["pss_mb"] for m in worker_memory), 1),
+            },
+        }
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=8, help="concurrent requests per wave")
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    payload = infer_payload(read_feature_mapping()[0])
+    results = []
+    for name in args.servers:
+        result = run_server(name, args.workers, args.requests, payload)
+        results.append(result)
+        m = result["metrics"]
+        per_worker = ", ".join(f"{w['rss_mb']:.0f}/{w['pss_mb']:.0f}/{w['private_mb']:.0f}" for w in result["worker_memory"])
+        print(
+            f"{name:8s} startup {m['startup_s']:6.2f}s | first requests max {m['first_request_max_ms']:8.1f} ms, "
+            f"steady median {m['steady_request_median_ms']:6.1f} ms | "
+            f"worker RSS/PSS/private MB: {per_worker} | total PSS {m['total_pss_mb']:.0f} MB"
+        )
+
+    write_results(args.output, "prefork", {"workers": args.workers, "requests": args.requests}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Serialization Benchmark - Pydantic response path vs the JSON fast path
+Times turning scored probabilities into the /model/predict-csv body: the
+Pydantic path (per-patient result dicts, PredictionResponse validation,
+jsonable_encoder, json) against api/services/serialization.py (columns from
+P(PD), projected onto the response models, orjson). Checks that both bodies
+parse to the same JSON before timing. Runs offline against the checked-in
+pickles.
+
+Usage (from backend/):
+    python -m benchmarks.serialization [--sizes 1000 10000 100000] [--output serialization.json]
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import write_results
+from benchmarks.cohort import cohort_csv
+from benchmarks.pipeline import quiet
+from api.config import settings
+
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def pydantic_body(model_service, X: np.ndarray, probabilities: np.ndarray, summary, compact: bool) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from api.routes.prediction import response_model_for
+
+    feature_names = model_service.feature_names
+    builder = model_service._get_result_builder(feature_names)
+    patients = builder.build(X, probabilities, compact=compact)
+    result = model_service.build_response(patients, summary, feature_names, compact)
+    return JSONResponse(content=jsonable_encoder(response_model_for(compact)(**result))).body
+
+
+def fast_body(model_service, X: np.ndarray, probabilities: np.ndarray, summary, compact: bool) -> bytes:
+    from api.routes.prediction import encode_body
+
+    result = model_service.build_response([], summary, model_service.feature_names, compact)
+    return encode_body(result, probabilities, compact)
+
+
+PATHS = {"pydantic": pydantic_body, "fast": fast_body}
+
+
+def bench_size(model_service, n_rows: int, compact: bool, args) -> Dict[str, Any]:
+    from api.services.result_builder import summarize
+
+    df = pd.read_csv(cohort_csv(n_rows, seed=args.seed, data_dir=args.data_dir))
+    X = df[model_service.feature_names].to_numpy(dtype=np.float64)
+    del df
+    probabilities = model_service.predict_probabilities(X)
+    summary = summarize(n_rows, int((probabilities >= 0.5).sum()), float(np.mean(probabilities)))
+    repeats = args.repeats or max(1, min(20, 100_000 // n_rows))
+
+    bodies = {}
+    metrics = {}
+    for name, encode in PATHS.items():
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            with quiet():
+                bodies[name] = encode(model_service, X, probabilities, summary, compact)
+            timings.append(time.perf_counter() - started)
+        metrics[f"{name}_s"] = statistics.median(timings)
+        metrics[f"{name}_rows_per_s"] = n_rows / metrics[f"{name}_s"]
+
+    if json.loads(bodies["pydantic"]) != json.loads(bodies["fast"]):
+        raise SystemExit(f"✗ Bodies differ at rows={n_rows} compact={compact}")
+    metrics["fast_speedup"] = metrics["pydantic_s"] / metrics["fast_s"]
+
+    return {
+        "key": f"format={'compact' if compact else 'verbose'},rows={n_rows}",
+        "rows": n_rows,
+        "repeats": repeats,
+        "response_mb": round(len(bodies["fast"]) / 1e6, 2),
+        "metrics": {name: round(value, 6) for name, value in metrics.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization: Pydantic path vs JSON fast path")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeats", type=int, default=0, help="runs per size (default: more for small cohorts)")
+    parser.add_argument("--no-compact", dest="compact", action="store_false", help="only the verbose format")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    if args.data_dir is None:
+        from benchmarks.cohort import DEFAULT_DATA_DIR
+        args.data_dir = DEFAULT_DATA_DIR
+
+    settings.MODEL_BUNDLE_PATH = ""
+    from api.services.model_service import get_model_service
+    from api.services.serialization import orjson
+    model_service = get_model_service()
+
+    results = []
+    for compact in ((False, True) if args.compact else (False,)):
+        for n_rows in sorted(args.sizes):
+            result = bench_size(model_service, n_rows, compact, args)
+            results.append(result)
+            m = result["metrics"]
+            print(
+                f"{result['key']:28s} pydantic {m['pydantic_s'] * 1000:9.2f} ms  fast {m['fast_s'] * 1000:9.2f} ms"
+                f"  x{m['fast_speedup']:.1f}  ({result['response_mb']} MB)"
+            )
+
+    write_results(args.output, "serialization", {
+        "sizes": sorted(args.sizes),
+        "encoder": "orjson" if orjson is not None else "json",
+        "model_version": model_service.model_version,
+    }, results)
+
+
+if __name__ == "__main__":
+    main()
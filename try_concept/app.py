@@ -242,6 +242,7 @@ scaler = None
 last_predictions_df = None     # store last predictions (for download)
 last_used_X_df = None          # store last used features dataframe (for SHAP)
 last_feature_cols = None       # store last used feature list
+shap_explainer = None          # built once on first /shap request
 
 try:
     model = joblib.load(MODEL_PATH)
@@ -592,13 +593,16 @@ def shap_waterfall(idx):
     if idx < 0 or idx >= len(X_df):
         return jsonify({'success': False, 'error': f'Index {idx} out of range (0..{len(X_df)-1}).'}), 400
 
-    # Prepare scaled data
-    X_np = X_df.to_numpy()
+    # Prepare scaled data (only the requested sample is explained)
+    X_np = X_df.iloc[idx:idx + 1].to_numpy()
     X_scaled = scaler.transform(X_np)
 
     # SHAP computation
+    global shap_explainer
     try:
-        explainer = shap.TreeExplainer(model)
+        if shap_explainer is None:
+            shap_explainer = shap.TreeExplainer(model)
+        explainer = shap_explainer
         shap_vals = explainer.shap_values(X_scaled)
         # shap_vals may be list for multiclass — handle binary
         if isinstance(shap_vals, list):
@@ -607,7 +611,7 @@ def shap_waterfall(idx):
         # create waterfall/force plot for sample idx
         # Using shap.plots.waterfall (modern) or waterfall_legacy
         fig = plt.figure(figsize=(8,4))
-        shap.plots._waterfall.waterfall_legacy(explainer.expected_value, shap_vals[idx], X_df.iloc[idx], show=False)
+        shap.plots._waterfall.waterfall_legacy(explainer.expected_value, shap_vals[0], X_df.iloc[idx], show=False)
         buf = io.BytesIO()
         plt.savefig(buf, format='png', bbox_inches='tight')
         buf.seek(0)